@@ -0,0 +1,54 @@
+"""Per-application state.
+
+create_app() builds one AppState per Settings object and keeps it on
+app.state.services; route handlers get it through a dependency instead of
+module globals, so two apps in one process (tests, benchmarks) never share a
+Mongo client, cache or in-memory board. The Mongo-bound services are filled
+in by the lifespan when the worker starts. The process pools for
+verification, RTP simulation and image variants belong to the app too and
+are shut down with it.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from bet_archive import BetArchive
+from bet_feed import BetFeed
+from data_access import DataAccess
+from health import ReadinessProbe
+from image_service import ImageDerivativeService
+from leaderboard import LeaderboardService
+from rate_limit import RateLimiter
+from rtp_simulator import RtpSimulator
+from seed_pairs import SeedPairStore
+from session_sweeper import MinesSessionSweeper
+from settings import Settings
+from settlement import SettlementCore
+from slow_query import SlowQueryMonitor, get_slow_query_monitor
+from verification import VerificationService
+
+class AppState:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.upload_dir = Path(settings.upload_dir)
+        self.image_service = ImageDerivativeService(self.upload_dir, max_workers=settings.image_workers)
+        self.verification_service = VerificationService(max_workers=settings.verify_workers)
+        self.rtp_simulator = RtpSimulator(max_workers=settings.sim_workers, rounds=settings.sim_dry_run_rounds)
+        self.slow_query_monitor: SlowQueryMonitor = get_slow_query_monitor()
+        self.rate_limiter = RateLimiter()
+        self.leaderboard = LeaderboardService(k=settings.leaderboard_size)
+        self.bet_feed = BetFeed(size=settings.bet_feed_size)
+        self.bet_archive = BetArchive(settings.archive_dir)
+        # Game configuration cache, reloaded after settings.game_config_ttl seconds
+        self.game_settings: Dict[str, Dict[str, Any]] = {}
+        self.game_settings_loaded_at = 0.0
+
+        # Opened by the lifespan
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db = None
+        self.data_access: Optional[DataAccess] = None
+        self.seed_pairs: Optional[SeedPairStore] = None
+        self.session_sweeper: Optional[MinesSessionSweeper] = None
+        self.settlement_core: Optional[SettlementCore] = None
+        self.readiness: Optional[ReadinessProbe] = None
@@ -0,0 +1,232 @@
+"""Columnar archive tier for old bets.
+
+Bets older than the archive horizon are moved out of db.bets into zstd
+compressed Parquet files partitioned by day and game:
+
+    <archive_dir>/day=2024-01-31/game=dice/part-<digest>.parquet
+
+Queries prune partitions by directory name before reading any file, then
+filter rows inside each file. Rows hold bets in the API shape (game_data as
+JSON), so readers get the same dicts as decode_bet(). Run the job with:
+
+    python bet_archive.py archive --older-than-days 90
+    python bet_archive.py export --start 2024-01-01 --end 2024-02-01 > bets.jsonl
+
+Only compact bet documents are archived; run `python bet_codec.py migrate` first.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from bet_codec import decode_bet
+
+DEFAULT_BATCH_SIZE = 5000
+# Widest [start, end) an API request may scan (one partition per day and game)
+MAX_QUERY_DAYS = 31
+COLUMNS = ["id", "user_id", "game_type", "amount", "multiplier", "result", "payout", "game_data",
+           "seed_pair_id", "nonce", "seed_hash", "seed_reveal", "created_at"]
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("game_type", pa.string()),
+        ("amount", pa.float64()),
+        ("multiplier", pa.float64()),
+        ("result", pa.string()),
+        ("payout", pa.float64()),
+        ("game_data", pa.string()),
+        ("seed_pair_id", pa.string()),
+        ("nonce", pa.int64()),
+        ("seed_hash", pa.string()),
+        ("seed_reveal", pa.string()),
+        ("created_at", pa.timestamp("ms"))
+    ])
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def check_query_window(start: Optional[datetime], end: Optional[datetime],
+                       max_days: int = MAX_QUERY_DAYS) -> None:
+    """Raise ValueError unless [start, end) is bounded and at most max_days wide"""
+    if start is None or end is None:
+        raise ValueError("start and end are required to search the bet archive")
+    start, end = _naive_utc(start), _naive_utc(end)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > timedelta(days=max_days):
+        raise ValueError(f"The bet archive can be searched at most {max_days} days at a time")
+
+def _to_row(bet: Dict[str, Any]) -> Dict[str, Any]:
+    row = {column: bet.get(column) for column in COLUMNS}
+    row["game_data"] = json.dumps(bet.get("game_data") or {}, separators=(",", ":"))
+    return row
+
+def _from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    bet = {column: value for column, value in row.items() if value is not None}
+    bet["game_data"] = json.loads(bet.get("game_data") or "{}")
+    return bet
+
+class BetArchive:
+    """Day/game partitioned Parquet files under one directory"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def write(self, bets: Iterable[Dict[str, Any]]) -> List[Path]:
+        """Write decoded bets, one file per day/game partition.
+
+        File names are derived from the bet ids, so rewriting the same batch
+        after an interrupted run replaces the files instead of duplicating rows.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partitions: Dict[tuple, List[Dict[str, Any]]] = {}
+        for bet in bets:
+            key = (bet["created_at"].strftime("%Y-%m-%d"), bet["game_type"])
+            partitions.setdefault(key, []).append(_to_row(bet))
+
+        written = []
+        for (day, game_type), rows in sorted(partitions.items()):
+            directory = self.root / f"day={day}" / f"game={game_type}"
+            directory.mkdir(parents=True, exist_ok=True)
+            digest = hashlib.sha1("\n".join(row["id"] for row in rows).encode()).hexdigest()[:16]
+            path = directory / f"part-{digest}.parquet"
+            tmp_path = path.with_suffix(".tmp")
+            pq.write_table(pa.Table.from_pylist(rows, schema=_schema()), tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+            written.append(path)
+        return written
+
+    def files(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              game_types: Optional[Iterable[str]] = None) -> List[Path]:
+        """Partition files that can hold bets in [start, end), newest day first"""
+        start, end = _naive_utc(start), _naive_utc(end)
+        first = start.strftime("%Y-%m-%d") if start else None
+        last = (end - timedelta(microseconds=1)).strftime("%Y-%m-%d") if end else None
+        games = set(game_types) if game_types else None
+        if not self.root.is_dir():
+            return []
+
+        paths = []
+        for day_dir in sorted(self.root.glob("day=*"), reverse=True):
+            day = day_dir.name[len("day="):]
+            if (first and day < first) or (last and day > last):
+                continue
+            for game_dir in sorted(day_dir.glob("game=*")):
+                if games is None or game_dir.name[len("game="):] in games:
+                    paths.extend(sorted(game_dir.glob("*.parquet")))
+        return paths
+
+    def read_file(self, path: Path, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  user_id: Optional[str] = None, bet_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        import pyarrow.parquet as pq
+
+        filters = []
+        if start:
+            filters.append(("created_at", ">=", _naive_utc(start)))
+        if end:
+            filters.append(("created_at", "<", _naive_utc(end)))
+        if user_id:
+            filters.append(("user_id", "=", user_id))
+        if bet_ids:
+            filters.append(("id", "in", list(bet_ids)))
+        table = pq.read_table(path, filters=filters or None)
+        return [_from_row(row) for row in table.to_pylist()]
+
+    def iter_bets(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  game_types: Optional[Iterable[str]] = None, user_id: Optional[str] = None,
+                  bet_ids: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        for path in self.files(start, end, game_types):
+            yield from self.read_file(path, start, end, user_id, bet_ids)
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              game_types: Optional[Iterable[str]] = None, user_id: Optional[str] = None,
+              bet_ids: Optional[List[str]] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Archived bets matching the filters, newest partitions first"""
+        paths = self.files(start, end, game_types)
+        bets, scanned = [], 0
+        for path in paths:
+            scanned += 1
+            bets.extend(self.read_file(path, start, end, user_id, bet_ids))
+            if limit is not None and len(bets) >= limit:
+                bets = bets[:limit]
+                break
+        return {"bets": bets, "partitions_matched": len(paths), "files_scanned": scanned}
+
+# Archival job
+def archive_bets(db, archive: BetArchive, before: datetime, batch_size: int = DEFAULT_BATCH_SIZE,
+                 limit: Optional[int] = None) -> Dict[str, int]:
+    """Move compact bets created before `before` into the archive (sync pymongo).
+
+    Batches are taken in (t, _id) order and deleted only after their files are
+    written, so an interrupted run picks the same batch up again.
+    """
+    stats = {"archived": 0, "files": 0}
+    while limit is None or stats["archived"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["archived"])
+        docs = list(db.bets.find({"t": {"$lt": before}}).sort([("t", 1), ("_id", 1)]).limit(size))
+        if not docs:
+            break
+        stats["files"] += len(archive.write(decode_bet(doc) for doc in docs))
+        db.bets.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        stats["archived"] += len(docs)
+    return stats
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bet archive tools")
+    parser.add_argument("--archive-dir", default=os.environ.get("ARCHIVE_DIR", "archive"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Move old bets from MongoDB to the archive")
+    archive_parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    archive_parser.add_argument("--db-name", default=os.environ.get("DB_NAME", "gamehub_pro"))
+    archive_parser.add_argument("--older-than-days", type=int,
+                                default=int(os.environ.get("ARCHIVE_HORIZON_DAYS", "90")))
+    archive_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    archive_parser.add_argument("--limit", type=int, default=None)
+
+    export_parser = subparsers.add_parser("export", help="Write archived bets as JSON lines")
+    export_parser.add_argument("--start", type=_parse_date, default=None)
+    export_parser.add_argument("--end", type=_parse_date, default=None)
+    export_parser.add_argument("--game", action="append", dest="games", help="Repeat for several games")
+    export_parser.add_argument("--user-id", default=None)
+    args = parser.parse_args()
+
+    archive = BetArchive(args.archive_dir)
+    if args.command == "export":
+        from bson import json_util
+
+        for bet in archive.iter_bets(args.start, args.end, args.games, args.user_id):
+            sys.stdout.write(json_util.dumps(bet) + "\n")
+        return
+
+    from pymongo import MongoClient
+
+    started = time.monotonic()
+    db = MongoClient(args.mongo_url)[args.db_name]
+    before = datetime.utcnow() - timedelta(days=args.older_than_days)
+    stats = archive_bets(db, archive, before, args.batch_size, args.limit)
+    print(f"Archived {stats['archived']} bets older than {before:%Y-%m-%d} into {stats['files']} files "
+          f"in {time.monotonic() - started:.1f}s")
+    legacy = db.bets.count_documents({"g": {"$exists": False}, "created_at": {"$lt": before}})
+    if legacy:
+        print(f"Skipped {legacy} legacy bets; run `python bet_codec.py migrate` and archive again")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Compact storage encoding for bet documents.
+
+Bets are the largest collection, so they are stored with short keys, the bet
+UUID as a binary _id (no separate ObjectId), integer minor-unit amounts, enum
+codes and positionally packed game_data:
+
+    {"_id": Binary(uuid), "u": Binary(uuid), "g": 1, "a": 1000, "m": 1.98, "r": 1,
+     "p": 1980, "d": [5000, True, 7312, 0.01], "sp": Binary(uuid), "n": 42, "t": datetime}
+
+decode_bet() turns both compact and legacy documents back into the API shape,
+so readers never see the storage format. Migrate existing bets with:
+
+    python bet_codec.py migrate --mongo-url mongodb://localhost:27017 --db-name gamehub_pro
+"""
+import argparse
+import math
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from bson import Binary, encode
+
+# Minor units per currency unit (cents)
+AMOUNT_SCALE = 100
+
+GAME_CODES = {"dice": 1, "mines": 2, "crash": 3}
+GAME_TYPES = {code: name for name, code in GAME_CODES.items()}
+RESULT_CODES = {"loss": 0, "win": 1, "manual": 2}
+RESULTS = {code: name for name, code in RESULT_CODES.items()}
+
+# Logical field -> storage key
+FIELDS = {
+    "id": "_id",
+    "user_id": "u",
+    "game_type": "g",
+    "amount": "a",
+    "multiplier": "m",
+    "result": "r",
+    "payout": "p",
+    "game_data": "d",
+    "seed_pair_id": "sp",
+    "nonce": "n",
+    "seed_hash": "sh",
+    "seed_reveal": "sr",
+    "created_at": "t"
+}
+UUID_FIELDS = {"id", "user_id", "seed_pair_id"}
+HEX_FIELDS = {"seed_hash", "seed_reveal"}
+MINOR_UNIT_FIELDS = {"amount", "payout"}
+# Keys left over from an unknown game_data shape
+EXTRA_GAME_DATA = "dx"
+
+# game_data fields per game, in packed order: (name, kind)
+# "hundredths" values are exact at two decimals (rolls, crash points)
+GAME_DATA_SCHEMAS = {
+    "dice": [("target", "float"), ("over", "bool"), ("roll", "hundredths"), ("house_edge", "float"),
+             ("max_multiplier", "float")],
+    "mines": [("mines_count", "int"), ("grid_size", "int"), ("house_edge", "float"), ("revealed_tiles", "tiles"),
+              ("hit_mine", "bool"), ("mine_position", "int"), ("cashed_out", "bool"), ("expired", "bool")],
+    "crash": [("crash_point", "hundredths"), ("auto_cash_out", "float"), ("manual_play", "bool"),
+              ("house_edge", "float"), ("max_multiplier", "float")]
+}
+
+class InvalidBet(ValueError):
+    """Bet that can't be stored in the compact format"""
+
+def to_minor_units(value: float) -> int:
+    return int(round(value * AMOUNT_SCALE))
+
+def from_minor_units(value: int) -> float:
+    return value / AMOUNT_SCALE
+
+def round_money(value: float) -> float:
+    """Amount as stored: whole minor units (wallet, stats and bets all use this value).
+
+    Non-finite values are returned unchanged for encode_bet/SettlementCore to refuse.
+    """
+    if not math.isfinite(value):
+        return value
+    return from_minor_units(to_minor_units(value))
+
+def uuid_key(value: str):
+    """Storage form of a UUID string (non-UUID ids are stored as-is)"""
+    try:
+        return Binary.from_uuid(uuid.UUID(value))
+    except (ValueError, TypeError, AttributeError):
+        return value
+
+def _uuid_value(value) -> str:
+    return str(value.as_uuid()) if isinstance(value, Binary) else str(value)
+
+def _pack_value(kind: str, value):
+    if value is None:
+        return None
+    if kind == "hundredths":
+        return int(round(value * 100))
+    if kind == "tiles":
+        # One byte per tile index
+        if any(not isinstance(tile, int) or not 0 <= tile < 256 for tile in value):
+            raise InvalidBet(f"Tile positions must be 0-255: {value}")
+        return Binary(bytes(value))
+    return value
+
+def _unpack_value(kind: str, value):
+    if kind == "hundredths":
+        return value / 100
+    if kind == "tiles":
+        return list(bytes(value))
+    if kind == "float":
+        return float(value)
+    return value
+
+def pack_game_data(game_type: str, game_data: Dict[str, Any]):
+    schema = GAME_DATA_SCHEMAS.get(game_type)
+    if schema is None:
+        return dict(game_data)
+    packed = [_pack_value(kind, game_data.get(name)) for name, kind in schema]
+    while packed and packed[-1] is None:
+        packed.pop()
+    extra = {key: value for key, value in game_data.items() if key not in dict(schema)}
+    if extra:
+        packed.append({EXTRA_GAME_DATA: extra})
+    return packed
+
+def unpack_game_data(game_type: str, packed) -> Dict[str, Any]:
+    if isinstance(packed, dict):
+        return dict(packed)
+    game_data = {}
+    if packed and isinstance(packed[-1], dict):
+        game_data.update(packed[-1][EXTRA_GAME_DATA])
+        packed = packed[:-1]
+    for (name, kind), value in zip(GAME_DATA_SCHEMAS[game_type], packed):
+        if value is not None:
+            game_data[name] = _unpack_value(kind, value)
+    return game_data
+
+def encode_bet(bet: Dict[str, Any]) -> Dict[str, Any]:
+    """Bet dict (Bet.to_doc()) -> compact storage document; raises InvalidBet for values it can't store"""
+    doc = {}
+    for name, key in FIELDS.items():
+        value = bet.get(name)
+        if value is None:
+            continue
+        if name in UUID_FIELDS:
+            value = uuid_key(value)
+        elif name in MINOR_UNIT_FIELDS:
+            if not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+                raise InvalidBet(f"{name} must be a non-negative amount: {value!r}")
+            value = to_minor_units(value)
+        elif name in HEX_FIELDS:
+            try:
+                value = Binary(bytes.fromhex(value))
+            except (ValueError, TypeError):
+                raise InvalidBet(f"{name} must be a hex string")
+        elif name == "game_type":
+            value = GAME_CODES.get(value, value)
+        elif name == "result":
+            value = RESULT_CODES.get(value, value)
+        elif name == "game_data":
+            value = pack_game_data(bet["game_type"], value)
+        doc[key] = value
+    return doc
+
+def is_encoded(doc: Dict[str, Any]) -> bool:
+    return "g" in doc
+
+def decode_bet(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact or legacy storage document -> bet dict in the API shape"""
+    if not is_encoded(doc):
+        bet = dict(doc)
+        bet.pop("_id", None)
+        return bet
+
+    bet = {}
+    game_type = GAME_TYPES.get(doc["g"], doc["g"])
+    for name, key in FIELDS.items():
+        value = doc.get(key)
+        if value is None:
+            continue
+        if name in UUID_FIELDS:
+            value = _uuid_value(value)
+        elif name in MINOR_UNIT_FIELDS:
+            value = from_minor_units(value)
+        elif name in HEX_FIELDS:
+            value = bytes(value).hex()
+        elif name == "game_type":
+            value = game_type
+        elif name == "result":
+            value = RESULTS.get(value, value)
+        elif name == "game_data":
+            value = unpack_game_data(game_type, value)
+        bet[name] = value
+    return bet
+
+def bet_seed_pair_id(doc: Dict[str, Any]) -> Optional[str]:
+    """Seed pair id of a bet in either storage format"""
+    if "sp" in doc:
+        return _uuid_value(doc["sp"])
+    return doc.get("seed_pair_id")
+
+def bet_id_query(bet_ids: List[str]) -> Dict[str, Any]:
+    """Match bets by id in either format"""
+    return {"$or": [{"_id": {"$in": [uuid_key(bet_id) for bet_id in bet_ids]}}, {"id": {"$in": bet_ids}}]}
+
+def bet_user_query(user_id: str) -> Dict[str, Any]:
+    return {"$or": [{"u": uuid_key(user_id)}, {"user_id": user_id}]}
+
+def bet_field_expr(name: str) -> Any:
+    """Aggregation expression for a logical field across compact and legacy documents"""
+    key = "$" + FIELDS[name]
+    if name in MINOR_UNIT_FIELDS:
+        return {"$ifNull": [{"$divide": [key, AMOUNT_SCALE]}, "$" + name]}
+    if name == "game_type":
+        return {"$ifNull": [key, {"$switch": {
+            "branches": [{"case": {"$eq": ["$game_type", game]}, "then": code} for game, code in GAME_CODES.items()],
+            "default": "$game_type"
+        }}]}
+    return {"$ifNull": [key, "$" + name]}
+
+# Migration
+def migrate(db, batch_size: int = 1000, limit: Optional[int] = None) -> Dict[str, int]:
+    """Re-encode legacy bets in place (resumable; safe to run while the API is live)"""
+    from pymongo.errors import BulkWriteError
+
+    stats = {"migrated": 0, "bytes_before": 0, "bytes_after": 0}
+    while limit is None or stats["migrated"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["migrated"])
+        legacy = list(db.bets.find({"g": {"$exists": False}}).limit(size))
+        if not legacy:
+            break
+        encoded = [encode_bet(doc) for doc in legacy]
+        try:
+            db.bets.insert_many(encoded, ordered=False)
+        except BulkWriteError as e:
+            # Already migrated by an earlier interrupted run; anything else is fatal
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        db.bets.delete_many({"_id": {"$in": [doc["_id"] for doc in legacy]}})
+        stats["migrated"] += len(legacy)
+        stats["bytes_before"] += sum(len(encode(doc)) for doc in legacy)
+        stats["bytes_after"] += sum(len(encode(doc)) for doc in encoded)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact bet storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Re-encode legacy bet documents")
+    migrate_parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    migrate_parser.add_argument("--db-name", default=os.environ.get("DB_NAME", "gamehub_pro"))
+    migrate_parser.add_argument("--batch-size", type=int, default=1000)
+    migrate_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    started = time.monotonic()
+    db = MongoClient(args.mongo_url)[args.db_name]
+    stats = migrate(db, args.batch_size, args.limit)
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    print(f"Migrated {stats['migrated']} bets in {time.monotonic() - started:.1f}s, "
+          f"{stats['bytes_before']} -> {stats['bytes_after']} bytes ({saved} saved)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from bet_codec import decode_bet
+
+# Events buffered per stream subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15.0
+
+def feed_entry(bet: Dict[str, Any], username: Optional[str] = None) -> Dict[str, Any]:
+    """Public fields of a settled bet"""
+    return {
+        "id": bet["id"],
+        "user_id": bet["user_id"],
+        "username": username,
+        "game_type": bet["game_type"],
+        "amount": bet["amount"],
+        "multiplier": bet["multiplier"],
+        "result": bet["result"],
+        "payout": bet["payout"],
+        "created_at": bet.get("created_at")
+    }
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class BetFeed:
+    """Ring buffer of the most recently settled bets with a push stream.
+
+    The settlement path publishes every bet; snapshots and streams are served
+    from memory. The buffer is per worker and seeded from Mongo once at startup.
+    """
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self._entries: deque = deque(maxlen=size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    async def seed(self, db) -> None:
+        """Fill the buffer with the latest stored bets"""
+        docs = await db.bets.find({}, {"d": 0, "game_data": 0}).sort("t", -1).limit(self.size).to_list(self.size)
+        bets = [decode_bet(doc) for doc in docs]
+        users = await db.users.find(
+            {"id": {"$in": list({bet["user_id"] for bet in bets})}}, {"_id": 0, "id": 1, "username": 1}
+        ).to_list(None)
+        usernames = {user["id"]: user["username"] for user in users}
+        self._entries.clear()
+        for bet in reversed(bets):
+            self._entries.append(feed_entry(bet, usernames.get(bet["user_id"])))
+
+    def publish(self, bet: Dict[str, Any], username: Optional[str] = None) -> None:
+        entry = feed_entry(bet, username)
+        self._entries.append(entry)
+        if not self._subscribers:
+            return
+        message = f"data: {json.dumps(entry, default=_default)}\n\n"
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # Slow consumer: drop its oldest event
+            queue.put_nowait(message)
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent bets first"""
+        entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Server-sent events: every bet settled from now on, with keepalive comments"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self._subscribers.discard(queue)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
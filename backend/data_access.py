@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+# Query classes
+HOT_PATH = "hot_path"
+HISTORY = "history"
+ANALYTICS = "analytics"
+
+@dataclass
+class QueryClass:
+    """How one class of queries reads: which members, what consistency and how long it may run"""
+    read_preference: str = "primary"
+    read_concern: Optional[str] = None
+    max_time_ms: Optional[int] = None
+    max_staleness_seconds: int = -1
+
+    def build_read_preference(self):
+        mode = READ_PREFERENCES[self.read_preference]
+        if mode is Primary:
+            return Primary()
+        return mode(max_staleness=self.max_staleness_seconds)
+
+class DataAccess:
+    """Route named query classes to collection handles with their own read settings.
+
+    Balance writes and the betting path stay on the primary (hot_path) while
+    dashboards (analytics) and user/admin listings (history) can be served by
+    secondaries under their own maxTimeMS budgets.
+    """
+
+    def __init__(self, db, query_classes: Dict[str, QueryClass]):
+        self.db = db
+        self.query_classes = query_classes
+        self._handles: Dict[Tuple[str, str], Any] = {}
+
+    def collection(self, name: str, query_class: str = HOT_PATH):
+        key = (name, query_class)
+        handle = self._handles.get(key)
+        if handle is None:
+            settings = self.query_classes[query_class]
+            handle = self._handles[key] = self.db.get_collection(
+                name,
+                read_preference=settings.build_read_preference(),
+                read_concern=ReadConcern(settings.read_concern) if settings.read_concern else None
+            )
+        return handle
+
+    def _max_time(self, query_class: str) -> Dict[str, int]:
+        max_time_ms = self.query_classes[query_class].max_time_ms
+        return {"maxTimeMS": max_time_ms} if max_time_ms else {}
+
+    def find(self, name: str, query_class: str, filter: Dict[str, Any] = None, *args, **kwargs):
+        cursor = self.collection(name, query_class).find(filter or {}, *args, **kwargs)
+        max_time_ms = self.query_classes[query_class].max_time_ms
+        return cursor.max_time_ms(max_time_ms) if max_time_ms else cursor
+
+    async def find_one(self, name: str, query_class: str, filter: Dict[str, Any], *args, **kwargs):
+        max_time_ms = self.query_classes[query_class].max_time_ms
+        if max_time_ms:
+            kwargs["max_time_ms"] = max_time_ms
+        return await self.collection(name, query_class).find_one(filter, *args, **kwargs)
+
+    async def count(self, name: str, query_class: str, filter: Dict[str, Any] = None) -> int:
+        return await self.collection(name, query_class).count_documents(filter or {}, **self._max_time(query_class))
+
+    def aggregate(self, name: str, query_class: str, pipeline: List[Dict[str, Any]]):
+        return self.collection(name, query_class).aggregate(pipeline, **self._max_time(query_class))
@@ -0,0 +1,163 @@
+"""Game engines: outcome and payout logic only.
+
+An engine validates a play against the game config and turns a round seed
+into an Outcome. Balance checks, seeds, the wallet update, the bet record and
+stats all live in the shared settlement path (server.py + settlement.py), so
+a new game is a new engine and nothing else.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List
+import uuid
+
+from bet_codec import round_money
+from provably_fair import (
+    calculate_mines_multiplier, dice_multiplier, generate_crash_multiplier, generate_mines_grid,
+    roll_dice
+)
+
+class BetRejected(Exception):
+    """Play not allowed by the game config (HTTP 400)"""
+
+@dataclass
+class Outcome:
+    result: str  # win/loss/manual
+    multiplier: float
+    payout: float
+    game_data: Dict[str, Any]
+    # Game-specific response fields
+    response: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Payouts are credited in whole minor units; the response reports what is credited
+        self.payout = round_money(self.payout)
+
+class GameEngine:
+    game_type: str = ""
+
+    def validate(self, play: Any, settings: Dict[str, Any]) -> None:
+        if play.amount < settings["min_bet"] or play.amount > settings["max_bet"]:
+            raise BetRejected(f"Bet amount must be between {settings['min_bet']} and {settings['max_bet']}")
+
+    def play(self, play: Any, settings: Dict[str, Any], seed: str) -> Outcome:
+        """Outcome of a single-step round"""
+        raise NotImplementedError
+
+class DiceGame(GameEngine):
+    game_type = "dice"
+    # Rolls are 0-99.99: outside these targets a bet can never win (or never lose)
+    MIN_TARGET = 0.01
+    MAX_TARGET = 99.98
+
+    def validate(self, play: Any, settings: Dict[str, Any]) -> None:
+        super().validate(play, settings)
+        if not self.MIN_TARGET <= play.target <= self.MAX_TARGET:
+            raise BetRejected(f"Target must be between {self.MIN_TARGET} and {self.MAX_TARGET}")
+
+    def play(self, play: Any, settings: Dict[str, Any], seed: str) -> Outcome:
+        # Random number 0-99.99
+        roll = roll_dice(seed)
+        win = (play.over and roll > play.target) or (not play.over and roll < play.target)
+        multiplier = dice_multiplier(play.target, play.over, settings["house_edge"],
+                                     settings["max_multiplier"]) if win else 0
+        return Outcome(
+            result="win" if win else "loss",
+            multiplier=multiplier,
+            payout=play.amount * multiplier,
+            game_data={"target": play.target, "over": play.over, "roll": roll, "house_edge": settings["house_edge"],
+                       "max_multiplier": settings["max_multiplier"]},
+            response={"roll": roll, "target": play.target, "over": play.over}
+        )
+
+class CrashGame(GameEngine):
+    game_type = "crash"
+
+    def play(self, play: Any, settings: Dict[str, Any], seed: str) -> Outcome:
+        crash_point = generate_crash_multiplier(seed, settings["house_edge"], settings["max_multiplier"])
+        if play.auto_cash_out:
+            # Wins unless the crash happened before the auto cash out
+            won = play.auto_cash_out <= crash_point
+            result, multiplier = ("win", play.auto_cash_out) if won else ("loss", 0)
+        else:
+            # Manual play - return crash point for client to handle
+            result, multiplier = "manual", 0
+        return Outcome(
+            result=result,
+            multiplier=multiplier,
+            payout=play.amount * multiplier,
+            game_data={
+                "crash_point": crash_point,
+                "auto_cash_out": play.auto_cash_out,
+                "house_edge": settings["house_edge"],
+                "max_multiplier": settings["max_multiplier"],
+                "manual_play": play.auto_cash_out is None
+            },
+            response={"crash_point": crash_point, "auto_cash_out": play.auto_cash_out}
+        )
+
+class MinesGame(GameEngine):
+    """Multi-step game: a session is opened with the stake and settled by a mine or a cashout"""
+    game_type = "mines"
+
+    def validate(self, play: Any, settings: Dict[str, Any]) -> None:
+        super().validate(play, settings)
+        if play.mines_count < settings["min_mines"] or play.mines_count > settings["max_mines"]:
+            raise BetRejected(f"Mines count must be between {settings['min_mines']} and {settings['max_mines']}")
+
+    def new_session(self, play: Any, settings: Dict[str, Any], user_id: str, seed: str) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "game_type": "mines",
+            "amount": play.amount,
+            "mines_count": play.mines_count,
+            "grid_size": settings["grid_size"],
+            "house_edge": settings["house_edge"],
+            "mines_positions": generate_mines_grid(play.mines_count, seed, settings["grid_size"]),
+            "revealed_tiles": [],
+            "status": "active",
+            "current_multiplier": 1.0,
+            "created_at": datetime.utcnow()
+        }
+
+    @staticmethod
+    def _game_data(session: Dict[str, Any], revealed_tiles: List[int]) -> Dict[str, Any]:
+        return {
+            "mines_count": session["mines_count"],
+            "grid_size": session.get("grid_size", 25),
+            "house_edge": session.get("house_edge", 0.01),
+            "revealed_tiles": revealed_tiles
+        }
+
+    def reveal(self, session: Dict[str, Any], tile_position: int) -> Outcome:
+        """Losing outcome for a mine; a safe tile has result "safe" and settles nothing"""
+        if tile_position in session["mines_positions"]:
+            game_data = self._game_data(session, session["revealed_tiles"] + [tile_position])
+            game_data.update({"hit_mine": True, "mine_position": tile_position})
+            return Outcome(
+                result="loss", multiplier=0, payout=0, game_data=game_data,
+                response={"result": "mine", "game_over": True, "tile_position": tile_position,
+                          "mines_positions": session["mines_positions"], "payout": 0}
+            )
+
+        revealed_tiles = session["revealed_tiles"] + [tile_position]
+        current_multiplier = calculate_mines_multiplier(len(revealed_tiles), session["mines_count"],
+                                                        session.get("grid_size", 25),
+                                                        session.get("house_edge", 0.01))
+        return Outcome(
+            result="safe", multiplier=current_multiplier, payout=0,
+            game_data={"revealed_tiles": revealed_tiles, "current_multiplier": current_multiplier},
+            response={"result": "safe", "game_over": False, "tile_position": tile_position,
+                      "current_multiplier": current_multiplier, "revealed_count": len(revealed_tiles)}
+        )
+
+    def cashout(self, session: Dict[str, Any]) -> Outcome:
+        if not session["revealed_tiles"]:
+            raise BetRejected("Must reveal at least one tile before cashing out")
+        multiplier = session["current_multiplier"]
+        game_data = self._game_data(session, session["revealed_tiles"])
+        game_data["cashed_out"] = True
+        return Outcome(result="win", multiplier=multiplier, payout=session["amount"] * multiplier,
+                       game_data=game_data)
+
+GAMES: Dict[str, GameEngine] = {engine.game_type: engine for engine in (DiceGame(), MinesGame(), CrashGame())}
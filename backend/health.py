@@ -0,0 +1,100 @@
+"""Liveness and readiness probes.
+
+/healthz only says the process is serving. /readyz runs the registered
+checks: gating checks (a Mongo ping) decide the status code, informational
+ones (MercadoPago reachability) are reported without failing readiness.
+Each check result is cached for its own interval and concurrent probes share
+one in-flight run, so load balancers polling every worker don't load Mongo
+or the payment API.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MERCADOPAGO_API_URL = "https://api.mercadopago.com"
+
+class Check:
+    __slots__ = ("name", "probe", "gating", "cache_seconds", "result", "checked_at", "_running")
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[Dict[str, Any]]], gating: bool,
+                 cache_seconds: float):
+        self.name = name
+        self.probe = probe
+        self.gating = gating
+        self.cache_seconds = cache_seconds
+        self.result: Optional[Dict[str, Any]] = None
+        self.checked_at = 0.0
+        self._running: Optional[asyncio.Future] = None
+
+    async def run(self, timeout: float) -> Dict[str, Any]:
+        if self.result is not None and time.monotonic() - self.checked_at < self.cache_seconds:
+            return self.result
+        if self._running is None:
+            self._running = asyncio.ensure_future(self._probe(timeout))
+        try:
+            return await asyncio.shield(self._running)
+        finally:
+            if self._running is not None and self._running.done():
+                self._running = None
+
+    async def _probe(self, timeout: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(self.probe(), timeout)
+            result = {"ok": True, **details}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"timed out after {timeout:g}s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.result, self.checked_at = result, time.monotonic()
+        return result
+
+class ReadinessProbe:
+    def __init__(self, timeout: float = 2.0):
+        self.timeout = timeout
+        self.checks: Dict[str, Check] = {}
+        # Cheap in-process state reported alongside the checks (never cached)
+        self.stats: Dict[str, Callable[[], Any]] = {}
+
+    def add_check(self, name: str, probe: Callable[[], Awaitable[Dict[str, Any]]], gating: bool = True,
+                  cache_seconds: float = 2.0) -> None:
+        self.checks[name] = Check(name, probe, gating, cache_seconds)
+
+    def add_stats(self, name: str, provider: Callable[[], Any]) -> None:
+        self.stats[name] = provider
+
+    async def check(self) -> Dict[str, Any]:
+        results = await asyncio.gather(*(check.run(self.timeout) for check in self.checks.values()))
+        checks = {}
+        ready = True
+        for check, result in zip(self.checks.values(), results):
+            checks[check.name] = {**result, "gating": check.gating}
+            if check.gating and not result["ok"]:
+                ready = False
+        report = {"status": "ready" if ready else "unavailable", "checks": checks}
+        for name, provider in self.stats.items():
+            try:
+                report[name] = provider()
+            except Exception as e:
+                logger.warning(f"Readiness stats {name} failed: {str(e)}")
+        return report
+
+def mongo_ping(db) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    async def probe() -> Dict[str, Any]:
+        await db.command("ping")
+        return {}
+    return probe
+
+def http_reachable(url: str) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """Any HTTP response counts as reachable; only connection errors fail"""
+    async def probe() -> Dict[str, Any]:
+        import httpx
+
+        async with httpx.AsyncClient() as client:
+            response = await client.head(url)
+        return {"status_code": response.status_code}
+    return probe
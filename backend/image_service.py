@@ -0,0 +1,135 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from static_service import precompress_file
+
+logger = logging.getLogger(__name__)
+
+# Widths generated for every uploaded branding image
+DERIVATIVE_WIDTHS = [320, 640, 1280]
+DERIVATIVE_FORMATS = ["avif", "webp"]
+MANIFEST_SUFFIX = ".variants.json"
+# Seconds a missing manifest is remembered before the disk is checked again
+MISSING_MANIFEST_TTL = 30.0
+
+def generate_derivatives(source_path: str, widths: List[int] = None, formats: List[str] = None) -> Dict[str, Any]:
+    """Resize an image into WebP/AVIF variants next to the original (runs in a worker process)"""
+    from PIL import Image, features
+
+    widths = widths or DERIVATIVE_WIDTHS
+    formats = formats or DERIVATIVE_FORMATS
+    source = Path(source_path)
+    variants = []
+
+    with Image.open(source) as image:
+        image.seek(0)  # Only the first frame of animated GIFs
+        original_width, original_height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        for fmt in formats:
+            if not features.check(fmt):
+                logger.warning(f"Pillow built without {fmt} support, skipping")
+                continue
+
+            # Never upscale; always keep one variant at the original width
+            target_widths = sorted({w for w in widths if w < original_width} | {original_width})
+            for width in target_widths:
+                height = max(1, round(original_height * width / original_width))
+                resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+                variant_name = f"{source.stem}-{width}w.{fmt}"
+                resized.save(source.with_name(variant_name), format=fmt.upper(), quality=80)
+                variants.append({
+                    "filename": variant_name,
+                    "type": f"image/{fmt}",
+                    "width": width,
+                    "height": height
+                })
+
+    manifest = {
+        "source": source.name,
+        "width": original_width,
+        "height": original_height,
+        "variants": variants
+    }
+    manifest_path = source.with_name(source.stem + MANIFEST_SUFFIX)
+    manifest_path.write_text(json.dumps(manifest))
+    precompress_file(manifest_path)
+    return manifest
+
+class ImageDerivativeService:
+    def __init__(self, upload_dir: Path, max_workers: Optional[int] = None):
+        self.upload_dir = upload_dir
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        # filename -> (srcset metadata or None, expiry of a miss)
+        self._srcset_cache: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[float]]] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def schedule(self, filename: str) -> None:
+        """Queue derivative generation for an uploaded file without waiting for it"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), generate_derivatives, str(self.upload_dir / filename))
+        self._pending[filename] = future
+        self._srcset_cache.pop(filename, None)
+        future.add_done_callback(lambda f: self._on_done(filename, f))
+
+    def _on_done(self, filename: str, future: asyncio.Future) -> None:
+        self._pending.pop(filename, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error:
+            logger.error(f"Error generating derivatives for {filename}: {str(error)}")
+            return
+        self._srcset_cache.pop(filename, None)
+
+    async def get_srcset(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return srcset metadata for an /uploads URL once its derivatives exist"""
+        if not url or not url.startswith("/uploads/"):
+            return None
+
+        filename = url[len("/uploads/"):]
+        cached = self._srcset_cache.get(filename)
+        if cached is not None:
+            metadata, expires_at = cached
+            if expires_at is None or time.monotonic() < expires_at:
+                return metadata
+
+        loop = asyncio.get_running_loop()
+        metadata = await loop.run_in_executor(None, self._read_srcset, filename)
+        # Misses are retried after a while (new uploads also clear them when their derivatives are done)
+        self._srcset_cache[filename] = (metadata, None if metadata else time.monotonic() + MISSING_MANIFEST_TTL)
+        return metadata
+
+    def _read_srcset(self, filename: str) -> Optional[Dict[str, Any]]:
+        manifest_path = self.upload_dir / (Path(filename).stem + MANIFEST_SUFFIX)
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None  # Not generated yet (or not an image we processed)
+
+        srcset = {}
+        for variant in manifest["variants"]:
+            srcset.setdefault(variant["type"], []).append(f"/uploads/{variant['filename']} {variant['width']}w")
+
+        return {
+            "width": manifest["width"],
+            "height": manifest["height"],
+            "sources": [{"type": mime, "srcset": ", ".join(entries)} for mime, entries in srcset.items()]
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_COLLECTION = "leaderboard_snapshots"
+ALL_GAMES = "all"
+# Board -> time window it is ranked over
+BOARD_WINDOWS = {"biggest_wins": "day", "top_wagered": "week"}
+
+def day_window(at: datetime) -> Tuple[str, datetime]:
+    """Window key and end (UTC day)"""
+    start = datetime(at.year, at.month, at.day)
+    return start.strftime("%Y-%m-%d"), start + timedelta(days=1)
+
+def week_window(at: datetime) -> Tuple[str, datetime]:
+    """Window key and end (ISO week, starting Monday)"""
+    start = datetime(at.year, at.month, at.day) - timedelta(days=at.weekday())
+    year, week, _ = at.isocalendar()
+    return f"{year}-W{week:02d}", start + timedelta(days=7)
+
+WINDOWS: Dict[str, Callable[[datetime], Tuple[str, datetime]]] = {"day": day_window, "week": week_window}
+
+class TopK:
+    """Bounded min-heap keeping the k highest-scored items"""
+
+    __slots__ = ("k", "_heap", "_seq")
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+    def push(self, score: float, item: Any) -> None:
+        self._seq += 1
+        entry = (score, self._seq, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Any]:
+        """Items by score, highest first"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+class LeaderboardService:
+    """Biggest wins (per day) and top wagered (per week) boards, per game and overall.
+
+    Each worker ranks the bets it settles in memory: biggest wins in bounded
+    top-K heaps, wagering as per-user totals. Workers periodically snapshot
+    their boards to Mongo under their own id and read the other workers'
+    snapshots, so a merged view covers every worker and bets survive restarts
+    (a restarted worker's old snapshot keeps counting until its window ends).
+    Reads are served from a merged view rebuilt at most every refresh_interval.
+    """
+
+    def __init__(self, k: int = 10, snapshot_interval: float = 5.0, refresh_interval: float = 1.0,
+                 snapshot_users: int = 1000):
+        self.k = k
+        self.snapshot_interval = snapshot_interval
+        self.refresh_interval = refresh_interval
+        # Per-user wager totals kept in a snapshot, per game
+        self.snapshot_users = snapshot_users
+        self.worker_id = str(uuid.uuid4())
+        self.windows: Dict[str, Tuple[str, datetime]] = {}
+        self.wins: Dict[str, TopK] = {}
+        self.wagered: Dict[str, Dict[str, float]] = {}
+        self.usernames: Dict[str, str] = {}
+        self._others: List[Dict[str, Any]] = []
+        self._view: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._view_built_at = 0.0
+        self._dirty = True
+        self._task: Optional[asyncio.Task] = None
+        self.db = None
+        self._next_roll = datetime.min
+        self._roll(datetime.utcnow())
+
+    # Recording (event loop, after each settled bet)
+    def _roll(self, now: datetime) -> None:
+        """Start new boards when a window boundary has passed"""
+        if now < self._next_roll:
+            return
+        for window, boundaries in WINDOWS.items():
+            current = boundaries(now)
+            if self.windows.get(window, ("",))[0] >= current[0]:
+                continue
+            self.windows[window] = current
+            if window == BOARD_WINDOWS["biggest_wins"]:
+                self.wins = {}
+            if window == BOARD_WINDOWS["top_wagered"]:
+                self.wagered = {}
+                self.usernames = {}
+            self._dirty = True
+        self._next_roll = min(ends_at for _, ends_at in self.windows.values())
+
+    def record(self, bet: Dict[str, Any], username: Optional[str] = None) -> None:
+        created_at = bet.get("created_at") or datetime.utcnow()
+        self._roll(created_at)
+        user_id, game_type = bet["user_id"], bet["game_type"]
+        if username:
+            self.usernames[user_id] = username
+
+        if created_at < self.windows[BOARD_WINDOWS["top_wagered"]][1] - timedelta(days=7):
+            return  # Settled in an earlier week
+        for game in (game_type, ALL_GAMES):
+            totals = self.wagered.setdefault(game, {})
+            totals[user_id] = totals.get(user_id, 0.0) + bet["amount"]
+
+        if bet["result"] == "win" and created_at >= self.windows[BOARD_WINDOWS["biggest_wins"]][1] - timedelta(days=1):
+            entry = {
+                "bet_id": bet["id"],
+                "user_id": user_id,
+                "username": username,
+                "game_type": game_type,
+                "amount": bet["amount"],
+                "multiplier": bet["multiplier"],
+                "payout": bet["payout"],
+                "created_at": created_at
+            }
+            for game in (game_type, ALL_GAMES):
+                self.wins.setdefault(game, TopK(self.k)).push(bet["payout"], entry)
+        self._dirty = True
+
+    # Reads
+    def get(self, board: str, game_type: str = ALL_GAMES, limit: Optional[int] = None) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        self._roll(now)
+        if self._dirty and time.monotonic() - self._view_built_at >= self.refresh_interval:
+            self._build_view()
+        window, ends_at = self.windows[BOARD_WINDOWS[board]]
+        entries = self._view.get(board, {}).get(game_type, [])
+        return {"board": board, "game_type": game_type, "window": window, "ends_at": ends_at,
+                "entries": entries[:limit or self.k]}
+
+    def _build_view(self) -> None:
+        """Merge this worker's boards with the other workers' snapshots"""
+        day, week = self.windows["day"][0], self.windows["week"][0]
+        wins = {game: top.items() for game, top in self.wins.items()}
+        wagered = {game: dict(totals) for game, totals in self.wagered.items()}
+        usernames = dict(self.usernames)
+        for snapshot in self._others:
+            if snapshot["windows"].get("day") == day:
+                for game, entries in snapshot["biggest_wins"].items():
+                    wins.setdefault(game, []).extend(entries)
+            if snapshot["windows"].get("week") == week:
+                for game, totals in snapshot["top_wagered"].items():
+                    merged = wagered.setdefault(game, {})
+                    for user_id, total in totals.items():
+                        merged[user_id] = merged.get(user_id, 0.0) + total
+                for user_id, username in snapshot.get("usernames", {}).items():
+                    usernames.setdefault(user_id, username)
+
+        biggest_wins = {}
+        for game, entries in wins.items():
+            top = heapq.nlargest(self.k, entries, key=lambda entry: entry["payout"])
+            biggest_wins[game] = [dict(entry, username=entry["username"] or usernames.get(entry["user_id"]))
+                                  for entry in top]
+        top_wagered = {
+            game: [{"user_id": user_id, "username": usernames.get(user_id), "wagered": round(total, 2)}
+                   for user_id, total in heapq.nlargest(self.k, totals.items(), key=lambda item: item[1])]
+            for game, totals in wagered.items()
+        }
+        self._view = {"biggest_wins": biggest_wins, "top_wagered": top_wagered}
+        self._view_built_at = time.monotonic()
+        self._dirty = False
+
+    @property
+    def worker_count(self) -> int:
+        """Workers merged into the view: this one plus those with a current snapshot"""
+        return 1 + len(self._others)
+
+    # Snapshots (background task)
+    def start(self, db) -> None:
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        if self.db is not None:
+            try:
+                await self.snapshot()
+            except PyMongoError as e:
+                logger.error(f"Error writing final leaderboard snapshot: {str(e)}")
+
+    async def _run(self) -> None:
+        await self.db[LEADERBOARD_COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+        while True:
+            try:
+                await self.refresh()
+            except PyMongoError as e:
+                logger.error(f"Error syncing leaderboard snapshots: {str(e)}")
+            await asyncio.sleep(self.snapshot_interval)
+
+    def _snapshot_doc(self) -> Dict[str, Any]:
+        top_wagered = {
+            game: dict(heapq.nlargest(self.snapshot_users, totals.items(), key=lambda item: item[1]))
+            for game, totals in self.wagered.items()
+        }
+        kept_users = {user_id for totals in top_wagered.values() for user_id in totals}
+        return {
+            "_id": self.worker_id,
+            "windows": {window: key for window, (key, _) in self.windows.items()},
+            "biggest_wins": {game: top.items() for game, top in self.wins.items()},
+            "top_wagered": top_wagered,
+            "usernames": {user_id: name for user_id, name in self.usernames.items() if user_id in kept_users},
+            # Dropped once the longest window has ended
+            "expires_at": self.windows["week"][1] + timedelta(days=1),
+            "updated_at": datetime.utcnow()
+        }
+
+    async def snapshot(self) -> None:
+        await self.db[LEADERBOARD_COLLECTION].replace_one({"_id": self.worker_id}, self._snapshot_doc(), upsert=True)
+
+    async def refresh(self) -> None:
+        """Write this worker's snapshot and load everyone else's for the current windows"""
+        self._roll(datetime.utcnow())
+        await self.snapshot()
+        self._others = await self.db[LEADERBOARD_COLLECTION].find(
+            {"_id": {"$ne": self.worker_id}, "windows.week": self.windows["week"][0]}
+        ).to_list(None)
+        self._dirty = True
@@ -0,0 +1,279 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+# Metrics are plain dicts of ints/floats updated without locks. Request and
+# settlement updates happen on the event loop thread; Mongo listener updates
+# come from Motor's executor threads and rely on the GIL, so a rare lost
+# increment under contention is accepted in exchange for zero locking.
+# Each uvicorn worker keeps its own registry.
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+MONGO_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+LOOP_LAG_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self.values.items()]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, labels: Tuple = ()) -> None:
+        self.values[labels] = value
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self.values.items()]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: List[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # labels -> [count per bucket..., count above last bucket, sum]
+        self.children: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        child = self.children.get(labels)
+        if child is None:
+            child = self.children[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        child[bisect_left(self.buckets, value)] += 1
+        child[-1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, child in self.children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], child):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {child[-1]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "gamehub_http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "gamehub_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "gamehub_http_requests_in_flight", "HTTP requests currently being served"))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "gamehub_mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"), MONGO_BUCKETS))
+MONGO_COMMAND_FAILURES = REGISTRY.register(Counter(
+    "gamehub_mongo_command_failures_total", "Failed MongoDB commands by collection and command",
+    ("collection", "command")))
+BETS_SETTLED = REGISTRY.register(Counter(
+    "gamehub_bets_settled_total", "Settled bets by game and result", ("game", "result")))
+BET_AMOUNT = REGISTRY.register(Counter(
+    "gamehub_bet_amount_total", "Total amount wagered by game", ("game",)))
+BET_PAYOUT = REGISTRY.register(Counter(
+    "gamehub_bet_payout_total", "Total amount paid out by game", ("game",)))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "gamehub_rate_limited_total", "Requests rejected by the per-user limiter by route and reason",
+    ("route", "reason")))
+WEBHOOKS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "gamehub_webhooks_in_progress", "Payment webhooks currently being processed"))
+EVENT_LOOP_LAG = REGISTRY.register(Gauge(
+    "gamehub_event_loop_lag_seconds", "Most recent event loop scheduling delay"))
+EVENT_LOOP_LAG_HISTOGRAM = REGISTRY.register(Histogram(
+    "gamehub_event_loop_lag_distribution_seconds", "Event loop scheduling delay", (), LOOP_LAG_BUCKETS))
+MONGO_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "gamehub_mongo_pool_connections", "Open MongoDB pool connections by server", ("address",)))
+MONGO_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "gamehub_mongo_pool_checked_out", "MongoDB pool connections in use by server", ("address",)))
+MONGO_POOL_WAITING = REGISTRY.register(Gauge(
+    "gamehub_mongo_pool_waiting", "Operations waiting for a MongoDB pool connection by server", ("address",)))
+
+for gauge in (HTTP_IN_FLIGHT, WEBHOOKS_IN_PROGRESS, EVENT_LOOP_LAG):
+    gauge.set(0)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status codes and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # FastAPI stores the matched route in the scope; mounts set root_path
+            route = scope.get("route")
+            path = route.path if route is not None else scope.get("root_path") or "<unmatched>"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(elapsed, (method, path))
+            HTTP_REQUESTS.inc((method, path, status))
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording per-collection command durations"""
+
+    def __init__(self):
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else "<none>"
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._collections.pop(event.request_id, "<none>")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, (collection, event.command_name))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._collections.pop(event.request_id, "<none>")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, (collection, event.command_name))
+        MONGO_COMMAND_FAILURES.inc((collection, event.command_name))
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """pymongo pool listener tracking open, in-use and awaited connections per server"""
+
+    def _address(self, event) -> Tuple:
+        host, port = event.address
+        return (f"{host}:{port}",)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        for gauge in (MONGO_POOL_CONNECTIONS, MONGO_POOL_CHECKED_OUT, MONGO_POOL_WAITING):
+            gauge.set(0, self._address(event))
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        for gauge in (MONGO_POOL_CONNECTIONS, MONGO_POOL_CHECKED_OUT, MONGO_POOL_WAITING):
+            gauge.values.pop(self._address(event), None)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.inc(self._address(event))
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.dec(self._address(event))
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        MONGO_POOL_WAITING.inc(self._address(event))
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        MONGO_POOL_WAITING.dec(self._address(event))
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        address = self._address(event)
+        MONGO_POOL_WAITING.dec(address)
+        MONGO_POOL_CHECKED_OUT.inc(address)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        MONGO_POOL_CHECKED_OUT.dec(self._address(event))
+
+def mongo_pool_stats() -> Dict[str, Dict[str, float]]:
+    """Current pool gauges per server address"""
+    return {
+        address: {
+            "connections": MONGO_POOL_CONNECTIONS.values.get((address,), 0),
+            "checked_out": MONGO_POOL_CHECKED_OUT.values.get((address,), 0),
+            "waiting": MONGO_POOL_WAITING.values.get((address,), 0)
+        }
+        for (address,) in list(MONGO_POOL_CONNECTIONS.values)
+    }
+
+def record_bet_settlement(game_type: str, result: str, amount: float, payout: float) -> None:
+    """Count a settled bet and its amounts"""
+    BETS_SETTLED.inc((game_type, result))
+    BET_AMOUNT.inc((game_type,), amount)
+    BET_PAYOUT.inc((game_type,), payout)
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late the event loop wakes up from a fixed sleep"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    return REGISTRY.render()
@@ -1,4 +1,3 @@
-import mercadopago
 import os
 import logging
 from typing import Dict, Any, Optional
@@ -6,14 +5,19 @@ from datetime import datetime
 import hashlib
 import hmac
 import json
+from tracing import traced
 
 logger = logging.getLogger(__name__)
 
 class MercadoPagoService:
     def __init__(self, access_token: str):
+        # Imported on the first payment rather than at worker startup
+        import mercadopago
+
         self.sdk = mercadopago.SDK(access_token)
         self.access_token = access_token
     
+    @traced("mercadopago", "mercadopago.preference.create")
     async def create_payment_preference(self, 
                                       amount: float, 
                                       description: str, 
@@ -65,6 +69,7 @@ class MercadoPagoService:
             logger.error(f"Exception creating preference: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    @traced("mercadopago", "mercadopago.payment.get")
     async def get_payment(self, payment_id: str) -> Dict[str, Any]:
         """Get payment details by payment ID"""
         try:
@@ -94,6 +99,7 @@ class MercadoPagoService:
             logger.error(f"Exception getting payment: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    @traced("mercadopago", "mercadopago.refund.create")
     async def create_refund(self, payment_id: str, amount: Optional[float] = None) -> Dict[str, Any]:
         """Create a refund for a payment"""
         try:
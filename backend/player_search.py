@@ -0,0 +1,133 @@
+"""Admin player search with keyset pagination.
+
+Every search is a single index range scan ordered by one of the SORTS with
+the user id as tiebreaker: username/email prefixes become case-insensitive
+range bounds on indexes built with SEARCH_COLLATION (U+FFFF sorts after every
+character, so [prefix, prefix + U+FFFF) is exactly the prefix), and the next
+page starts strictly after the last row's (sort value, id) instead of
+skipping rows. Other filters are applied to the rows the scan reads.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_access import HISTORY
+
+# Case-insensitive, accent-sensitive comparison for username/email prefixes
+SEARCH_COLLATION = {"locale": "en", "strength": 2}
+# Sort name -> (field, direction); the id tiebreaker uses the same direction
+SORTS = {
+    "username": ("username", 1),
+    "email": ("email", 1),
+    "created_at": ("created_at", -1),
+    "balance": ("balance", -1)
+}
+MAX_LIMIT = 200
+PLAYER_PROJECTION = {"_id": 0, "id": 1, "username": 1, "email": 1, "balance": 1, "is_admin": 1, "created_at": 1,
+                     "stats.bets": 1, "stats.wagered": 1, "stats.payout": 1}
+
+class InvalidSearch(ValueError):
+    pass
+
+async def ensure_indexes(db) -> None:
+    await db.users.create_index([("username", 1), ("id", 1)], name="username_search",
+                                collation=SEARCH_COLLATION)
+    await db.users.create_index([("email", 1), ("id", 1)], name="email_search", collation=SEARCH_COLLATION)
+    await db.users.create_index([("created_at", -1), ("id", -1)])
+    # Balance changes with every bet; this is the one search index on the settlement write path
+    await db.users.create_index([("balance", -1), ("id", -1)])
+
+def encode_cursor(value: Any, user_id: str) -> str:
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    return base64.urlsafe_b64encode(json.dumps([value, user_id]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidSearch("Invalid cursor")
+    return value, user_id
+
+def _prefix(value: str) -> Dict[str, str]:
+    return {"$gte": value, "$lt": value + "\uffff"}
+
+def build_search(username: Optional[str] = None, email: Optional[str] = None,
+                 min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                 created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                 sort: Optional[str] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Filter, sort and collation for one page.
+
+    A prefix search is ordered by its own field. Without an explicit sort, a
+    balance range is ordered by balance so it scans its own index range.
+    """
+    if username:
+        sort = "username"
+    elif email:
+        sort = "email"
+    elif sort is None:
+        sort = "balance" if min_balance is not None or max_balance is not None else "created_at"
+    if sort not in SORTS:
+        raise InvalidSearch(f"sort must be one of {', '.join(SORTS)}")
+    field, direction = SORTS[sort]
+
+    conditions: List[Dict[str, Any]] = []
+    if username:
+        conditions.append({"username": _prefix(username)})
+    if email:
+        conditions.append({"email": _prefix(email)})
+    if min_balance is not None or max_balance is not None:
+        conditions.append({"balance": {key: value for key, value in (("$gte", min_balance), ("$lte", max_balance))
+                                       if value is not None}})
+    if created_from or created_to:
+        conditions.append({"created_at": {key: value for key, value in (("$gte", created_from), ("$lt", created_to))
+                                          if value is not None}})
+    if cursor:
+        value, user_id = decode_cursor(cursor)
+        after = "$gt" if direction == 1 else "$lt"
+        conditions.append({"$or": [{field: {after: value}}, {field: value, "id": {after: user_id}}]})
+
+    search = {
+        "filter": {"$and": conditions} if conditions else {},
+        "sort": [(field, direction), ("id", direction)],
+        "field": field
+    }
+    # String orders and ranges use the SEARCH_COLLATION indexes; numeric/date sorts the simple ones
+    if field in ("username", "email"):
+        search["collation"] = SEARCH_COLLATION
+    return search
+
+def player_row(user: Dict[str, Any]) -> Dict[str, Any]:
+    stats = user.get("stats") or {}
+    wagered = stats.get("wagered", 0.0)
+    return {
+        "id": user["id"],
+        "username": user["username"],
+        "email": user["email"],
+        "balance": round(user.get("balance", 0.0), 2),
+        "is_admin": user.get("is_admin", False),
+        "created_at": user.get("created_at"),
+        "bets": stats.get("bets", 0),
+        "wagered": round(wagered, 2),
+        "net_profit": round(stats.get("payout", 0.0) - wagered, 2)
+    }
+
+async def search_players(data_access, limit: int = 50, **filters) -> Dict[str, Any]:
+    """One page of players and the cursor of the next page (None on the last page)"""
+    if limit < 1 or limit > MAX_LIMIT:
+        raise InvalidSearch(f"limit must be between 1 and {MAX_LIMIT}")
+    search = build_search(**filters)
+    kwargs = {"collation": search["collation"]} if "collation" in search else {}
+    users = await data_access.find(
+        "users", HISTORY, search["filter"], PLAYER_PROJECTION, **kwargs
+    ).sort(search["sort"]).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        last = users[-1]
+        next_cursor = encode_cursor(last.get(search["field"]), last["id"])
+    return {"players": [player_row(user) for user in users], "next_cursor": next_cursor}
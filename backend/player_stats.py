@@ -0,0 +1,183 @@
+"""Per-player betting statistics kept on the user document.
+
+Every settlement adds its counters to users.stats with $inc/$max in the same
+update that moves the balance, so a profile is one document read:
+
+    {"bets": 120, "wins": 57, "wagered": 1200.0, "payout": 1150.5, "biggest_win": 96.0,
+     "since": datetime, "games": {"dice": {"bets": 100, "wins": 50, "wagered": 1000.0, "payout": 990.0}, ...}}
+
+Bets settled before the counters existed are added once with:
+
+    python player_stats.py backfill --batch-size 500
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from bet_codec import GAME_TYPES, RESULT_CODES, bet_field_expr, uuid_key
+
+STATS_FIELD = "stats"
+# Excluded from auth reads; only the profile endpoint needs it
+STATS_PROJECTION = {STATS_FIELD: 0}
+
+def stats_update(game_type: str, amount: float, payout: float, result: str,
+                 settled_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Update operators adding one settled bet to a user's stats"""
+    win = 1 if result == "win" else 0
+    return {
+        "$inc": {
+            "stats.bets": 1,
+            "stats.wins": win,
+            "stats.wagered": amount,
+            "stats.payout": payout,
+            f"stats.games.{game_type}.bets": 1,
+            f"stats.games.{game_type}.wins": win,
+            f"stats.games.{game_type}.wagered": amount,
+            f"stats.games.{game_type}.payout": payout
+        },
+        "$max": {"stats.biggest_win": payout},
+        # First live settlement; the backfill counts older bets only
+        "$min": {"stats.since": settled_at or datetime.utcnow()}
+    }
+
+def merge_updates(*updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine update documents: $inc values add up, $max/$min keep the extreme, $set overrides"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for update in updates:
+        for operator, fields in update.items():
+            target = merged.setdefault(operator, {})
+            for field, value in fields.items():
+                if field not in target or operator == "$set":
+                    target[field] = value
+                elif operator == "$inc":
+                    target[field] += value
+                elif operator == "$max":
+                    target[field] = max(target[field], value)
+                elif operator == "$min":
+                    target[field] = min(target[field], value)
+    return merged
+
+def public_stats(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Profile view of users.stats with net profit"""
+    stats = stats or {}
+    games = {}
+    for game_type in GAME_TYPES.values():
+        game = stats.get("games", {}).get(game_type, {})
+        games[game_type] = {
+            "bets": game.get("bets", 0),
+            "wins": game.get("wins", 0),
+            "wagered": round(game.get("wagered", 0.0), 2),
+            "net_profit": round(game.get("payout", 0.0) - game.get("wagered", 0.0), 2)
+        }
+    return {
+        "bets": stats.get("bets", 0),
+        "wins": stats.get("wins", 0),
+        "wagered": round(stats.get("wagered", 0.0), 2),
+        "net_profit": round(stats.get("payout", 0.0) - stats.get("wagered", 0.0), 2),
+        "biggest_win": round(stats.get("biggest_win", 0.0), 2),
+        "games": games
+    }
+
+# Backfill
+def _backfill_pipeline(users: Iterable[Dict[str, Any]]) -> list:
+    clauses = []
+    for user in users:
+        since = (user.get(STATS_FIELD) or {}).get("since")
+        compact, legacy = {"u": uuid_key(user["id"])}, {"user_id": user["id"]}
+        if since:
+            compact["t"] = {"$lt": since}
+            legacy["created_at"] = {"$lt": since}
+        clauses.extend([compact, legacy])
+    payout = bet_field_expr("payout")
+    return [
+        {"$match": {"$or": clauses}},
+        {"$group": {
+            "_id": {"user": bet_field_expr("user_id"), "game": bet_field_expr("game_type")},
+            "bets": {"$sum": 1},
+            "wins": {"$sum": {"$cond": [{"$in": [bet_field_expr("result"), [RESULT_CODES["win"], "win"]]}, 1, 0]}},
+            "wagered": {"$sum": bet_field_expr("amount")},
+            "payout": {"$sum": payout},
+            "biggest_win": {"$max": payout}
+        }}
+    ]
+
+def backfill(db, batch_size: int = 500, limit: Optional[int] = None) -> Dict[str, int]:
+    """Add bets settled before each user's live counters started (sync pymongo; idempotent).
+
+    Each user's update is guarded by stats_backfilled, so an interrupted run
+    can simply be started again, and by stats.since: a user whose first live
+    settlement lands mid-batch is skipped and picked up by the next run.
+    """
+    from pymongo import UpdateOne
+
+    stats = {"users": 0, "bets": 0, "skipped": 0}
+    last_id = None
+    scanned = 0
+    while limit is None or scanned < limit:
+        size = batch_size if limit is None else min(batch_size, limit - scanned)
+        query = {"stats_backfilled": {"$ne": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        users = list(db.users.find(query, {"_id": 1, "id": 1, "stats.since": 1}).sort("_id", 1).limit(size))
+        if not users:
+            break
+        last_id = users[-1]["_id"]
+        scanned += len(users)
+
+        ids = {uuid_key(user["id"]): user["id"] for user in users}
+        ids.update({user["id"]: user["id"] for user in users})
+        updates: Dict[str, list] = {user["id"]: [] for user in users}
+        for row in db.bets.aggregate(_backfill_pipeline(users)):
+            user_id = ids.get(row["_id"]["user"])
+            game_type = GAME_TYPES.get(row["_id"]["game"])
+            if user_id is None or game_type is None:
+                continue
+            updates[user_id].append({
+                "$inc": {
+                    "stats.bets": row["bets"],
+                    "stats.wins": row["wins"],
+                    "stats.wagered": row["wagered"],
+                    "stats.payout": row["payout"],
+                    f"stats.games.{game_type}.bets": row["bets"],
+                    f"stats.games.{game_type}.wins": row["wins"],
+                    f"stats.games.{game_type}.wagered": row["wagered"],
+                    f"stats.games.{game_type}.payout": row["payout"]
+                },
+                "$max": {"stats.biggest_win": row["biggest_win"]}
+            })
+            stats["bets"] += row["bets"]
+
+        since = {user["id"]: (user.get(STATS_FIELD) or {}).get("since") for user in users}
+        result = db.users.bulk_write([
+            UpdateOne({"id": user_id, "stats_backfilled": {"$ne": True},
+                       "stats.since": since[user_id] or {"$exists": False}},
+                      merge_updates(*user_updates, {"$set": {"stats_backfilled": True}}))
+            for user_id, user_updates in updates.items()
+        ], ordered=False)
+        stats["users"] += result.modified_count
+        stats["skipped"] += len(users) - result.modified_count
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Player statistics tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Build stats from existing bets")
+    backfill_parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    backfill_parser.add_argument("--db-name", default=os.environ.get("DB_NAME", "gamehub_pro"))
+    backfill_parser.add_argument("--batch-size", type=int, default=500, help="Users per batch")
+    backfill_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    started = time.monotonic()
+    db = MongoClient(args.mongo_url)[args.db_name]
+    result = backfill(db, args.batch_size, args.limit)
+    print(f"Backfilled {result['users']} users from {result['bets']} bets in {time.monotonic() - started:.1f}s")
+    if result["skipped"]:
+        print(f"Skipped {result['skipped']} users who settled a bet during the run; run backfill again")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import time
+from typing import Dict, Optional, Tuple
+
+# Defaults when a game's settings do not configure the limiter
+DEFAULT_RATE_PER_SECOND = 10.0
+DEFAULT_BURST = 20
+DEFAULT_MAX_CONCURRENT = 2
+
+# Retry-After sent when a user is over their in-flight cap
+CONCURRENCY_RETRY_AFTER = 1.0
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at", "rate", "burst")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.tokens = burst
+        self.updated_at = now
+        self.rate = rate
+        self.burst = burst
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def idle_until(self) -> float:
+        """Time after which the bucket is full again and can be forgotten"""
+        return self.updated_at + (self.burst - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-user token buckets (one per route) plus a per-user in-flight cap.
+
+    State only exists for users with recent traffic: a bucket that has
+    refilled completely behaves exactly like a missing one, so idle buckets
+    are dropped by a sweep that runs at most every sweep_interval seconds.
+    Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0, clock=time.monotonic):
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._last_sweep = clock()
+
+    def acquire(self, user_key: str, route: str, rate: float, burst: float,
+                max_concurrent: int) -> Tuple[Optional[float], Optional[str]]:
+        """Take a slot for a request; returns (retry_after, reason) when it must be rejected"""
+        now = self.clock()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+        if max_concurrent > 0 and self._in_flight.get(user_key, 0) >= max_concurrent:
+            return CONCURRENCY_RETRY_AFTER, "concurrency"
+
+        if rate > 0:
+            bucket = self._buckets.get((user_key, route))
+            if bucket is None:
+                bucket = self._buckets[(user_key, route)] = TokenBucket(rate, burst, now)
+            else:
+                # Pick up admin config changes without resetting the balance
+                bucket.rate, bucket.burst = rate, burst
+                bucket.refill(now)
+            if bucket.tokens < 1:
+                return (1 - bucket.tokens) / rate, "rate"
+            bucket.tokens -= 1
+
+        self._in_flight[user_key] = self._in_flight.get(user_key, 0) + 1
+        return None, None
+
+    def release(self, user_key: str) -> None:
+        remaining = self._in_flight.get(user_key, 0) - 1
+        if remaining > 0:
+            self._in_flight[user_key] = remaining
+        else:
+            self._in_flight.pop(user_key, None)
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        expired = [key for key, bucket in self._buckets.items() if bucket.idle_until() <= now]
+        for key in expired:
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+def limits_from_settings(settings: Optional[Dict]) -> Tuple[float, float, int]:
+    """Read (rate, burst, max_concurrent) from a game's GameConfig settings"""
+    settings = settings or {}
+    rate = float(settings.get("rate_limit_per_second", DEFAULT_RATE_PER_SECOND))
+    burst = float(settings.get("rate_limit_burst", max(DEFAULT_BURST, rate)))
+    max_concurrent = int(settings.get("max_concurrent_requests", DEFAULT_MAX_CONCURRENT))
+    return rate, max(burst, 1.0), max_concurrent
@@ -0,0 +1,114 @@
+"""Internal records for the request hot path.
+
+Users, bets and transactions are built on every game or payment request and
+only ever come from trusted code or our own documents, so they are slotted
+dataclasses rather than Pydantic models: no validation pass, no per-instance
+__dict__, and ids/timestamps are generated only when a new record is created.
+Pydantic stays at the API edge for request bodies.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+@dataclass(slots=True)
+class User:
+    id: str
+    username: str
+    email: str
+    hashed_password: str
+    balance: float = 0.0
+    is_admin: bool = False
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def new(cls, username: str, email: str, hashed_password: str, balance: float = 0.0,
+            is_admin: bool = False) -> "User":
+        return cls(str(uuid.uuid4()), username, email, hashed_password, balance, is_admin, datetime.utcnow())
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "User":
+        """Stored user document (extra fields such as _id and stats are ignored)"""
+        return cls(doc["id"], doc["username"], doc["email"], doc["hashed_password"], float(doc.get("balance", 0.0)),
+                   doc.get("is_admin", False), doc.get("created_at"))
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "email": self.email,
+            "hashed_password": self.hashed_password,
+            "balance": self.balance,
+            "is_admin": self.is_admin,
+            "created_at": self.created_at
+        }
+
+@dataclass(slots=True)
+class Bet:
+    id: str
+    user_id: str
+    game_type: str
+    amount: float
+    multiplier: float
+    result: str  # win/loss
+    payout: float
+    game_data: Dict[str, Any]
+    created_at: datetime
+    # Seed pair + nonce; legacy bets carry seed_hash/seed_reveal instead
+    seed_pair_id: Optional[str] = None
+    nonce: Optional[int] = None
+    seed_hash: Optional[str] = None
+    seed_reveal: Optional[str] = None
+
+    @classmethod
+    def new(cls, user_id: str, game_type: str, amount: float, multiplier: float, result: str, payout: float,
+            game_data: Dict[str, Any], **seed_fields) -> "Bet":
+        return cls(str(uuid.uuid4()), user_id, game_type, amount, multiplier, result, payout, game_data,
+                   datetime.utcnow(), **seed_fields)
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Bet dict without unset seed fields (the input of bet_codec.encode_bet)"""
+        doc = {
+            "id": self.id,
+            "user_id": self.user_id,
+            "game_type": self.game_type,
+            "amount": self.amount,
+            "multiplier": self.multiplier,
+            "result": self.result,
+            "payout": self.payout,
+            "game_data": self.game_data,
+            "created_at": self.created_at
+        }
+        for key in ("seed_pair_id", "nonce", "seed_hash", "seed_reveal"):
+            value = getattr(self, key)
+            if value is not None:
+                doc[key] = value
+        return doc
+
+@dataclass(slots=True)
+class Transaction:
+    id: str
+    user_id: str
+    type: str  # deposit, withdrawal, bet_win, bet_loss
+    amount: float
+    status: str  # pending, completed, failed
+    description: str
+    metadata: Dict[str, Any]
+    created_at: datetime
+
+    @classmethod
+    def new(cls, id: str, user_id: str, type: str, amount: float, status: str, description: str,
+            metadata: Optional[Dict[str, Any]] = None) -> "Transaction":
+        return cls(id, user_id, type, amount, status, description, metadata or {}, datetime.utcnow())
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "type": self.type,
+            "amount": self.amount,
+            "status": self.status,
+            "description": self.description,
+            "metadata": self.metadata,
+            "created_at": self.created_at
+        }
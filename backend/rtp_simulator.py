@@ -0,0 +1,259 @@
+"""Monte Carlo RTP simulator for game configurations.
+
+Simulates millions of rounds per scenario with NumPy, spread over a process
+pool, and reports return-to-player, variance and the distribution of house
+liability over blocks of max-size bets. Payout multipliers come straight from
+the production functions in provably_fair.py; the per-round outcome draws
+are vectorized twins of the production seed functions and are checked
+against them on a sample of real seeds before every run.
+
+    python rtp_simulator.py crash --rounds 10000000 --config '{"house_edge": 0.02}'
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from provably_fair import (
+    calculate_mines_multiplier, dice_multiplier, generate_crash_multiplier, generate_provably_fair_seed,
+    roll_dice
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SEED_SPACE = 2 ** 32
+# Rounds per worker task; bounds per-process memory to a few hundred MB
+CHUNK_ROUNDS = 1_000_000
+# Bets per liability block (house P&L is reported per block of max-size bets)
+DEFAULT_BLOCK_SIZE = 1000
+LIABILITY_PERCENTILES = [50, 95, 99, 99.9]
+# Seeds checked against the production functions before a run
+CONSISTENCY_SAMPLE = 2000
+
+DEFAULT_CONFIG = {
+    "min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 10000.0,
+    "grid_size": 25, "min_mines": 1, "max_mines": 24
+}
+
+# Vectorized outcome draws (h is the seed's first 32 bits, as in provably_fair).
+# NumPy is imported where it is used: API workers import this module but only
+# admin dry runs need it.
+def dice_rolls(h: "np.ndarray") -> "np.ndarray":
+    return (h % 10000) / 100
+
+def crash_points(h: "np.ndarray", house_edge: float, max_multiplier: float) -> "np.ndarray":
+    import numpy as np
+
+    result = 100 * (1 - house_edge) / (1 - h / SEED_SPACE)
+    points = np.round(np.maximum(1.01, np.minimum(result / 100, max_multiplier)), 2)
+    points[h % 33 == 0] = 1.00
+    return points
+
+def check_against_production(config: Dict[str, Any], samples: int = CONSISTENCY_SAMPLE) -> None:
+    """Fail loudly if the vectorized draws drift from the production seed functions"""
+    import numpy as np
+
+    seeds = [generate_provably_fair_seed() for _ in range(samples)]
+    h = np.array([int(seed[:8], 16) for seed in seeds], dtype=np.uint64)
+
+    rolls = dice_rolls(h)
+    expected_rolls = np.array([roll_dice(seed) for seed in seeds])
+    points = crash_points(h, config["house_edge"], config["max_multiplier"])
+    expected_points = np.array([
+        generate_crash_multiplier(seed, config["house_edge"], config["max_multiplier"]) for seed in seeds
+    ])
+    # np.round and round() may disagree on exact .5 ties; allow one rounding step
+    if not np.allclose(rolls, expected_rolls) or np.abs(points - expected_points).max() > 0.01 + 1e-9:
+        raise RuntimeError("Vectorized outcomes no longer match provably_fair; update rtp_simulator")
+
+# Scenarios: one fixed player strategy each
+def default_scenarios(game_type: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if game_type == "dice":
+        return [{"target": 50.0, "over": True}, {"target": 75.0, "over": True},
+                {"target": 95.0, "over": True}, {"target": 5.0, "over": False}]
+    if game_type == "mines":
+        grid_size = config["grid_size"]
+        scenarios = []
+        for mines in sorted({config["min_mines"], min(max(3, config["min_mines"]), config["max_mines"]), config["max_mines"]}):
+            safe = grid_size - mines
+            for reveals in sorted({1, min(3, safe), max(1, safe - 1)}):
+                scenarios.append({"mines_count": mines, "reveals": reveals})
+        return scenarios
+    if game_type == "crash":
+        targets = [1.5, 2.0, 10.0, 100.0, 1000.0]
+        return [{"auto_cash_out": target} for target in targets if target <= config["max_multiplier"]]
+    raise ValueError(f"Unknown game type: {game_type}")
+
+def scenario_multiplier(game_type: str, scenario: Dict[str, Any], config: Dict[str, Any]) -> float:
+    """Payout multiplier of a winning round, from the production payout functions"""
+    if game_type == "dice":
+        return dice_multiplier(scenario["target"], scenario["over"], config["house_edge"], config["max_multiplier"])
+    if game_type == "mines":
+        return calculate_mines_multiplier(scenario["reveals"], scenario["mines_count"], config["grid_size"],
+                                          config["house_edge"])
+    return scenario["auto_cash_out"]
+
+def simulate_chunk(game_type: str, scenario: Dict[str, Any], config: Dict[str, Any], rounds: int,
+                   entropy: Tuple[int, ...], block_size: int) -> Dict[str, Any]:
+    """Simulate one chunk of rounds (runs in a worker process) and return sufficient statistics"""
+    import numpy as np
+
+    rng = np.random.default_rng(np.random.SeedSequence(entropy))
+    multiplier = scenario_multiplier(game_type, scenario, config)
+
+    if game_type == "mines":
+        # A uniformly shuffled grid (generate_mines_grid) puts mines on the player's
+        # picks with hypergeometric probability
+        safe = config["grid_size"] - scenario["mines_count"]
+        hits = rng.hypergeometric(scenario["mines_count"], safe, min(scenario["reveals"], safe), size=rounds)
+        wins = hits == 0
+    else:
+        h = rng.integers(0, SEED_SPACE, size=rounds, dtype=np.uint64)
+        if game_type == "dice":
+            rolls = dice_rolls(h)
+            wins = rolls > scenario["target"] if scenario["over"] else rolls < scenario["target"]
+        else:
+            wins = scenario["auto_cash_out"] <= crash_points(h, config["house_edge"], config["max_multiplier"])
+
+    win_count = int(np.count_nonzero(wins))
+    # Player net per unit stake, summed per block (house liability = positive values)
+    blocks = wins[: rounds - rounds % block_size].reshape(-1, block_size).sum(axis=1)
+    block_net = blocks * multiplier - block_size
+    return {
+        "rounds": rounds,
+        "wins": win_count,
+        "multiplier": multiplier,
+        "block_net": block_net
+    }
+
+def plan_chunks(rounds: int, block_size: int, seed: Optional[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+    """Split rounds into block-aligned chunks, each with an independent random stream"""
+    import numpy as np
+
+    chunk_rounds = max(block_size, CHUNK_ROUNDS - CHUNK_ROUNDS % block_size)
+    children = np.random.SeedSequence(seed).spawn(math.ceil(rounds / chunk_rounds))
+    chunks = []
+    remaining = rounds
+    for child in children:
+        size = min(chunk_rounds, remaining)
+        chunks.append((size, tuple(int(word) for word in child.generate_state(4))))
+        remaining -= size
+    return chunks
+
+def summarize(game_type: str, scenario: Dict[str, Any], config: Dict[str, Any],
+              partials: List[Dict[str, Any]], block_size: int) -> Dict[str, Any]:
+    import numpy as np
+
+    rounds = sum(partial["rounds"] for partial in partials)
+    wins = sum(partial["wins"] for partial in partials)
+    multiplier = partials[0]["multiplier"]
+    hit_rate = wins / rounds
+    # Payout per unit stake is `multiplier` with probability hit_rate, else 0
+    rtp = hit_rate * multiplier
+    variance = hit_rate * multiplier ** 2 - rtp ** 2
+    block_net = np.concatenate([partial["block_net"] for partial in partials]) * config["max_bet"]
+
+    liability = {"block_size": block_size, "blocks": int(block_net.size)}
+    if block_net.size:
+        for percentile, value in zip(LIABILITY_PERCENTILES, np.percentile(block_net, LIABILITY_PERCENTILES)):
+            liability[f"p{percentile:g}"] = round(float(value), 2)
+        liability["worst"] = round(float(block_net.max()), 2)
+        liability["house_loss_probability"] = round(float(np.mean(block_net > 0)), 6)
+
+    return {
+        "scenario": scenario,
+        "rounds": rounds,
+        "hit_rate": round(hit_rate, 6),
+        "multiplier": round(multiplier, 6),
+        "rtp": round(rtp, 6),
+        "house_edge": round(1 - rtp, 6),
+        "rtp_std_error": round(math.sqrt(variance / rounds), 6),
+        "variance": round(variance, 6),
+        "max_payout": round(config["max_bet"] * multiplier, 2),
+        "liability": liability
+    }
+
+def resolve_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {**DEFAULT_CONFIG, **(config or {})}
+
+class RtpSimulator:
+    """Runs simulations for the admin dry-run in a shared process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, rounds: int = 1_000_000,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.max_workers = max_workers
+        self.rounds = rounds
+        self.block_size = block_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def simulate(self, game_type: str, config: Optional[Dict[str, Any]],
+                       rounds: Optional[int] = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        config = resolve_config(config)
+        rounds = rounds or self.rounds
+        await loop.run_in_executor(None, check_against_production, config)
+
+        results = []
+        for scenario in default_scenarios(game_type, config):
+            partials = await asyncio.gather(*(
+                loop.run_in_executor(executor, simulate_chunk, game_type, scenario, config, size, entropy,
+                                     self.block_size)
+                for size, entropy in plan_chunks(rounds, self.block_size, None)
+            ))
+            results.append(summarize(game_type, scenario, config, partials, self.block_size))
+        return {"game_type": game_type, "config": config, "scenarios": results}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def simulate(game_type: str, config: Optional[Dict[str, Any]] = None, rounds: int = 10_000_000,
+             scenarios: Optional[List[Dict[str, Any]]] = None, max_workers: Optional[int] = None,
+             block_size: int = DEFAULT_BLOCK_SIZE, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Simulate every scenario of a game configuration synchronously across all cores"""
+    config = resolve_config(config)
+    check_against_production(config)
+    scenarios = scenarios or default_scenarios(game_type, config)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, scenario in enumerate(scenarios):
+            chunks = plan_chunks(rounds, block_size, None if seed is None else seed + index)
+            futures = [
+                executor.submit(simulate_chunk, game_type, scenario, config, size, entropy, block_size)
+                for size, entropy in chunks
+            ]
+            partials = [future.result() for future in futures]
+            results.append(summarize(game_type, scenario, config, partials, block_size))
+    return {"game_type": game_type, "config": config, "scenarios": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate RTP and liability for a game configuration")
+    parser.add_argument("game_type", choices=["dice", "mines", "crash"])
+    parser.add_argument("--config", default="{}", help="JSON game settings (defaults fill the gaps)")
+    parser.add_argument("--scenarios", default=None, help="JSON list of scenarios (default: built-in sweep)")
+    parser.add_argument("--rounds", type=int, default=10_000_000, help="Rounds per scenario")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    report = simulate(args.game_type, json.loads(args.config), args.rounds,
+                      json.loads(args.scenarios) if args.scenarios else None,
+                      args.workers, args.block_size, args.seed)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
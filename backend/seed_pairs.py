@@ -0,0 +1,186 @@
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from provably_fair import derive_round_seed, generate_provably_fair_seed, hash_seed
+
+SEED_PAIRS_COLLECTION = "seed_pairs"
+MAX_CLIENT_SEED_LENGTH = 64
+# A hold or rotation lock older than this belongs to a request that died
+LOCK_TIMEOUT_SECONDS = 30
+
+class SeedPairConflict(Exception):
+    """The pair is being rotated, or a round that depends on it is still opening"""
+
+class RoundSeed(NamedTuple):
+    seed_pair_id: str
+    server_seed_hash: str
+    client_seed: str
+    nonce: int
+    seed: str  # Per-bet seed passed to the game functions
+
+def new_seed_pair(user_id: str, client_seed: Optional[str] = None) -> Dict[str, Any]:
+    server_seed = generate_provably_fair_seed()
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "server_seed": server_seed,
+        "server_seed_hash": hash_seed(server_seed),
+        "client_seed": client_seed or secrets.token_hex(8),
+        "nonce": 0,
+        "status": "active",
+        "created_at": datetime.utcnow()
+    }
+
+def public_seed_pair(pair: Dict[str, Any]) -> Dict[str, Any]:
+    """Seed pair fields safe to show; the server seed only once revealed"""
+    view = {
+        "seed_pair_id": pair["id"],
+        "server_seed_hash": pair["server_seed_hash"],
+        "client_seed": pair["client_seed"],
+        "nonce": pair["nonce"],
+        "status": pair["status"]
+    }
+    if pair["status"] == "revealed":
+        view["server_seed"] = pair["server_seed"]
+        view["revealed_at"] = pair.get("revealed_at")
+    return view
+
+def _unlocked(field: str, now: datetime) -> Dict[str, Any]:
+    """Filter: the lock timestamp in field is unset or stale"""
+    return {"$or": [{field: None}, {field: {"$lt": now - timedelta(seconds=LOCK_TIMEOUT_SECONDS)}}]}
+
+def _unheld(now: datetime) -> Dict[str, Any]:
+    """Filter: no round holds the pair (or the last hold is stale)"""
+    return {"$or": [{"holds": {"$not": {"$gt": 0}}},
+                    {"held_at": {"$lt": now - timedelta(seconds=LOCK_TIMEOUT_SECONDS)}}]}
+
+class SeedPairStore:
+    """Per-user committed server seed + client seed + nonce.
+
+    Each bet reserves the next nonce of the user's active pair with one atomic
+    $inc and derives its outcome seed with HMAC, so bets only store the pair id
+    and nonce. The server seed is revealed when the player rotates the pair.
+
+    Rotation is serialized against rounds that outlive their request, like a
+    mines game: such a round reserves its nonce with hold=True, which counts a
+    hold on the pair until release() once its session is stored. rotate()
+    first locks the pair (no nonce can be reserved while it is locked, and it
+    can't lock a held pair), then checks for games in play, then reveals. So a
+    revealed seed never belongs to a game the player can still act on. Instant
+    games need no hold: their outcome is fixed when the nonce is reserved.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[SEED_PAIRS_COLLECTION]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("id", unique=True)
+        # At most one active pair per user
+        await self.collection.create_index(
+            "user_id", unique=True, name="active_pair_per_user",
+            partialFilterExpression={"status": "active"}
+        )
+
+    async def get_active(self, user_id: str) -> Dict[str, Any]:
+        pair = await self.collection.find_one({"user_id": user_id, "status": "active"})
+        return pair or await self._create(user_id)
+
+    async def _create(self, user_id: str, client_seed: Optional[str] = None) -> Dict[str, Any]:
+        pair = new_seed_pair(user_id, client_seed)
+        try:
+            await self.collection.insert_one(dict(pair))
+        except DuplicateKeyError:
+            # Another request created the pair first
+            return await self.collection.find_one({"user_id": user_id, "status": "active"})
+        return pair
+
+    async def next_round(self, user_id: str, hold: bool = False) -> RoundSeed:
+        """Reserve the next nonce of the user's active pair and derive the bet seed.
+
+        With hold, the pair can't be rotated until release() is called for the round.
+        """
+        now = datetime.utcnow()
+        # Clearing a stale rotation lock stops that rotation from revealing later
+        update: Dict[str, Any] = {"$inc": {"nonce": 1}, "$unset": {"rotating_at": ""}}
+        if hold:
+            update["$inc"]["holds"] = 1
+            update["$set"] = {"held_at": now}
+        pair = await self.collection.find_one_and_update(
+            {"user_id": user_id, "status": "active", **_unlocked("rotating_at", now)},
+            update,
+            return_document=ReturnDocument.BEFORE
+        )
+        if pair is None:
+            if await self.collection.find_one({"user_id": user_id, "status": "active"}, {"_id": 1}):
+                raise SeedPairConflict("Seed pair rotation in progress, try again")
+            await self.get_active(user_id)
+            return await self.next_round(user_id, hold)
+        return RoundSeed(
+            pair["id"], pair["server_seed_hash"], pair["client_seed"], pair["nonce"],
+            derive_round_seed(pair["server_seed"], pair["client_seed"], pair["nonce"])
+        )
+
+    async def release(self, round_seed: RoundSeed) -> None:
+        """Drop the hold a next_round(hold=True) took once the round's game is stored (or abandoned)"""
+        await self.collection.update_one({"id": round_seed.seed_pair_id, "holds": {"$gt": 0}},
+                                         {"$inc": {"holds": -1}})
+
+    async def rotate(self, user_id: str, client_seed: Optional[str] = None,
+                     in_play: Optional[Callable[[], Awaitable[bool]]] = None) -> Dict[str, Any]:
+        """Reveal the active server seed and commit to a new one.
+
+        Raises SeedPairConflict while a held round is opening, another rotation
+        holds the lock, in_play() reports a game in progress, or a concurrent
+        request created the new pair first (so client_seed would be lost).
+        """
+        now = datetime.utcnow()
+        locked = await self.collection.find_one_and_update(
+            {"user_id": user_id, "status": "active",
+             "$and": [_unlocked("rotating_at", now), _unheld(now)]},
+            {"$set": {"rotating_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if locked is None and await self.collection.find_one({"user_id": user_id, "status": "active"}, {"_id": 1}):
+            raise SeedPairConflict("A game is starting or the seed pair is already rotating, try again")
+
+        revealed = None
+        if locked is not None:
+            try:
+                if in_play is not None and await in_play():
+                    raise SeedPairConflict("Finish your active game before rotating seeds")
+            except BaseException:
+                await self.collection.update_one({"id": locked["id"], "rotating_at": now},
+                                                 {"$unset": {"rotating_at": ""}})
+                raise
+            revealed = await self.collection.find_one_and_update(
+                {"id": locked["id"], "rotating_at": now},
+                {"$set": {"status": "revealed", "revealed_at": datetime.utcnow()}, "$unset": {"rotating_at": ""}},
+                return_document=ReturnDocument.AFTER
+            )
+            if revealed is None:
+                raise SeedPairConflict("Seed pair rotation timed out, try again")
+
+        active = new_seed_pair(user_id, client_seed)
+        try:
+            await self.collection.insert_one(dict(active))
+        except DuplicateKeyError:
+            # A bet created the next pair between the reveal and here
+            raise SeedPairConflict("A new seed pair was created concurrently; rotate again to set the client seed")
+        return {
+            "revealed": public_seed_pair(revealed) if revealed else None,
+            "active": public_seed_pair(active)
+        }
+
+    async def get_revealed(self, seed_pair_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Revealed pairs by id (unrevealed pairs are left out)"""
+        cursor = self.collection.find(
+            {"id": {"$in": list(set(seed_pair_ids))}, "status": "revealed"},
+            {"_id": 0, "id": 1, "server_seed": 1, "server_seed_hash": 1, "client_seed": 1}
+        )
+        return {pair["id"]: pair async for pair in cursor}
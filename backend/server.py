@@ -1,9 +1,10 @@
 from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Depends, Form, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ExecutionTimeout
 import os
 import logging
 from pathlib import Path
@@ -12,50 +13,57 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timedelta
 import jwt
-import hashlib
-import secrets
 import json
 import shutil
 from passlib.context import CryptContext
 import aiofiles
-import random
 import math
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import partial
 from payment_service import get_mp_service
+from static_service import get_upload_static_files
+from metrics import (
+    MetricsMiddleware, MongoCommandMetrics, MongoPoolMetrics, RATE_LIMITED, WEBHOOKS_IN_PROGRESS,
+    mongo_pool_stats, monitor_event_loop_lag, render_metrics
+)
+from tracing import MongoTracingListener, TracingMiddleware, get_span_exporter, traced
+from slow_query import SlowQueryMonitor
+from health import MERCADOPAGO_API_URL, ReadinessProbe, http_reachable, mongo_ping
+from settings import Settings
+from provably_fair import calculate_mines_multiplier
+from seed_pairs import MAX_CLIENT_SEED_LENGTH, SeedPairConflict, SeedPairStore, public_seed_pair
+from bet_codec import (
+    GAME_TYPES, bet_field_expr, bet_id_query, bet_seed_pair_id, bet_user_query, decode_bet
+)
+from verification import BET_PROJECTION, verify_bet
+from bet_archive import BetArchive, check_query_window
+from app_state import AppState
+from session_sweeper import MinesSessionSweeper
+from settlement import Settlement, SettlementCore, SettlementError, supports_transactions
+from games import GAMES, BetRejected, Outcome
+from records import Bet, Transaction, User
+from leaderboard import ALL_GAMES, LeaderboardService
+from player_stats import STATS_FIELD, STATS_PROJECTION, public_stats
+import withdrawal_review
+import player_search
+from rate_limit import limits_from_settings
+from data_access import ANALYTICS, HISTORY, HOT_PATH, DataAccess
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 # Security
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
 
-# Create uploads directory
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-app = FastAPI()
 api_router = APIRouter(prefix="/api")
-
-# Serve uploaded files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+root_router = APIRouter()
 
 # Models
-class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    username: str
-    email: str
-    hashed_password: str
-    balance: float = 0.0
-    is_admin: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
 class UserCreate(BaseModel):
     username: str
     email: str
@@ -78,19 +86,6 @@ class GameConfig(BaseModel):
     settings: Dict[str, Any]
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-class Bet(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    user_id: str
-    game_type: str
-    amount: float
-    multiplier: float
-    result: str  # win/loss
-    payout: float
-    game_data: Dict[str, Any]
-    seed_hash: str
-    seed_reveal: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
 class PaymentConfig(BaseModel):
     mercadopago_access_token: Optional[str] = None
     mercadopago_public_key: Optional[str] = None
@@ -99,16 +94,6 @@ class PaymentConfig(BaseModel):
     min_deposit: float = 10.0
     max_deposit: float = 10000.0
 
-class Transaction(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    user_id: str
-    type: str  # deposit, withdrawal, bet_win, bet_loss
-    amount: float
-    status: str  # pending, completed, failed
-    description: str
-    metadata: Dict[str, Any] = {}
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
 # Game Models
 class DicePlay(BaseModel):
     target: float
@@ -132,6 +117,19 @@ class WithdrawRequest(BaseModel):
     amount: float
     payment_method: str = "pix"  # Default to PIX for Brazil
 
+class WithdrawalReview(BaseModel):
+    transaction_ids: List[str]
+    reason: Optional[str] = None
+
+class RotateSeedRequest(BaseModel):
+    client_seed: Optional[str] = None
+
+class VerifyBetsRequest(BaseModel):
+    bet_ids: Optional[List[str]] = None
+    user_id: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
 class PaymentWebhook(BaseModel):
     action: str
     api_version: str
@@ -153,13 +151,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@traced("bcrypt", "bcrypt.verify")
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+@traced("bcrypt", "bcrypt.hash")
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def get_token_subject(credentials: HTTPAuthorizationCredentials) -> str:
+    """Validate the bearer token and return its subject (username) without touching the database"""
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -167,86 +168,74 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = await db.users.find_one({"username": username})
+    return username
+
+async def token_subject(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Token subject as a dependency, so the rate limiter and auth share one decode per request"""
+    return get_token_subject(credentials)
+
+def get_state(request: Request) -> AppState:
+    """The AppState of the app serving this request"""
+    return request.app.state.services
+
+async def get_current_user(username: str = Depends(token_subject), state: AppState = Depends(get_state)):
+    user = await state.data_access.find_one("users", HOT_PATH, {"username": username}, STATS_PROJECTION)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return User(**user)
+    return User.from_doc(user)
+
+def game_rate_limit(game_type: str, route: str):
+    """Dependency enforcing the per-user token bucket and in-flight cap for a game route.
+
+    Runs before get_current_user (route-level dependencies resolve first), so
+    rejected requests never reach MongoDB. Limits come from the game's GameConfig
+    settings as currently cached (loaded at startup; the game endpoint refreshes
+    a stale cache), never from a database read.
+    """
+    async def dependency(user_key: str = Depends(token_subject), state: AppState = Depends(get_state)):
+        rate, burst, max_concurrent = limits_from_settings(state.game_settings.get(game_type))
+        retry_after, reason = state.rate_limiter.acquire(user_key, route, rate, burst, max_concurrent)
+        if retry_after is not None:
+            RATE_LIMITED.inc((route, reason))
+            raise HTTPException(
+                status_code=429,
+                detail="Too many concurrent requests" if reason == "concurrency" else "Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+        try:
+            yield
+        finally:
+            state.rate_limiter.release(user_key)
+    return dependency
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
-def generate_provably_fair_seed():
-    """Generate a cryptographically secure seed for provably fair games"""
-    return secrets.token_hex(32)
+def session_seed_fields(game_session: Dict[str, Any]) -> Dict[str, Any]:
+    """Seed fields of a mines session (seed pair + nonce, or a legacy per-game seed)"""
+    return {key: game_session[key] for key in ("seed_pair_id", "nonce", "seed_hash", "seed_reveal") if key in game_session}
 
-def hash_seed(seed: str):
-    """Create SHA256 hash of seed for transparency"""
-    return hashlib.sha256(seed.encode()).hexdigest()
-
-def calculate_mines_multiplier(revealed_tiles: int, total_mines: int, grid_size: int = 25):
-    """Calculate multiplier for mines game based on revealed safe tiles"""
-    if revealed_tiles == 0:
-        return 1.0
-    
-    safe_tiles = grid_size - total_mines
-    if revealed_tiles >= safe_tiles:
-        return 0.0  # Game over
-    
-    # Calculate probability-based multiplier
-    remaining_safe = safe_tiles - revealed_tiles
-    remaining_total = grid_size - revealed_tiles
-    
-    base_multiplier = 1.0
-    for i in range(revealed_tiles):
-        safe_chance = (safe_tiles - i) / (grid_size - i)
-        base_multiplier *= (0.99 / safe_chance)  # 1% house edge
-    
-    return round(base_multiplier, 2)
-
-def generate_mines_grid(mines_count: int, seed: str, grid_size: int = 25):
-    """Generate mines positions using provably fair seed"""
-    random.seed(int(seed[:8], 16))
-    positions = list(range(grid_size))
-    random.shuffle(positions)
-    return positions[:mines_count]
-
-def generate_crash_multiplier(seed: str):
-    """Generate crash multiplier using provably fair algorithm"""
-    # Convert seed to number for crash calculation
-    seed_int = int(seed[:8], 16)
-    
-    # Use a crash algorithm similar to bustabit
-    # This creates a house edge of approximately 1%
-    e = 2 ** 32
-    h = seed_int
-    
-    if h % 33 == 0:  # 3% chance of instant crash
-        return 1.00
-    
-    # Calculate crash point
-    result = (99 / (1 - (h / e)))
-    
-    # Cap maximum multiplier
-    crash_point = max(1.01, min(result / 100, 10000.0))
-    return round(crash_point, 2)
+def on_bet_settled(state: AppState, bet_data: Dict[str, Any], username: Optional[str] = None):
+    """Feed a settled bet to the in-memory leaderboards and live feed"""
+    state.leaderboard.record(bet_data, username)
+    state.bet_feed.publish(bet_data, username)
 
 @api_router.post("/auth/register")
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, state: AppState = Depends(get_state)):
     # Check if user exists
-    existing_user = await db.users.find_one({"$or": [{"username": user_data.username}, {"email": user_data.email}]})
+    existing_user = await state.db.users.find_one({"$or": [{"username": user_data.username}, {"email": user_data.email}]})
     if existing_user:
         raise HTTPException(status_code=400, detail="Username or email already registered")
     
     # Create first user as admin
-    user_count = await db.users.count_documents({})
+    user_count = await state.db.users.count_documents({})
     is_admin = user_count == 0
     
     hashed_password = get_password_hash(user_data.password)
     starting_balance = 100.0 if is_admin else 50.0
-    user = User(
+    user = User.new(
         username=user_data.username,
         email=user_data.email,
         hashed_password=hashed_password,
@@ -254,37 +243,59 @@ async def register(user_data: UserCreate):
         balance=starting_balance
     )
     
-    await db.users.insert_one(user.dict())
+    await state.db.users.insert_one(user.to_doc())
     
     # Initialize game configurations if this is the first user (admin)
     if is_admin:
-        await initialize_game_configs()
+        await initialize_game_configs(state)
     
     access_token = create_access_token(data={"sub": user.username}, expires_delta=timedelta(days=7))
     
     return {"access_token": access_token, "token_type": "bearer", "user": {"username": user.username, "is_admin": user.is_admin}}
 
-async def initialize_game_configs():
+# Default game configurations (rate_limit_* and max_concurrent_requests feed the per-user limiter)
+DEFAULT_GAME_CONFIGS = [
+    {"game_type": "dice", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 99.0,
+                                       "rate_limit_per_second": 10.0, "rate_limit_burst": 20, "max_concurrent_requests": 2}},
+    {"game_type": "mines", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "grid_size": 25, "max_mines": 24, "min_mines": 1,
+                                        "rate_limit_per_second": 10.0, "rate_limit_burst": 20, "max_concurrent_requests": 2}},
+    {"game_type": "crash", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 10000.0,
+                                        "rate_limit_per_second": 10.0, "rate_limit_burst": 20, "max_concurrent_requests": 2}}
+]
+
+# Game configuration cache (per app, reloaded after GAME_CONFIG_TTL seconds)
+async def load_game_configs(state: AppState):
+    """Load all game settings into the app's cache"""
+    configs = await state.db.game_config.find().to_list(100)
+    state.game_settings = {config["game_type"]: config["settings"] for config in configs}
+    state.game_settings_loaded_at = time.monotonic()
+
+def invalidate_game_configs(state: AppState):
+    state.game_settings_loaded_at = 0.0
+
+async def get_game_settings(state: AppState, game_type: str) -> Optional[Dict[str, Any]]:
+    """Get cached settings for a game, refreshing the cache when it is stale"""
+    if (time.monotonic() - state.game_settings_loaded_at > state.settings.game_config_ttl
+            or game_type not in state.game_settings):
+        await load_game_configs(state)
+    return state.game_settings.get(game_type)
+
+async def initialize_game_configs(state: AppState):
     """Initialize default game configurations"""
     # Check if configs already exist
-    existing_configs = await db.game_config.count_documents({})
+    existing_configs = await state.db.game_config.count_documents({})
     if existing_configs > 0:
         return
     
     # Set default configurations
-    defaults = [
-        {"game_type": "dice", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 99.0}},
-        {"game_type": "mines", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "grid_size": 25, "max_mines": 24, "min_mines": 1}},
-        {"game_type": "crash", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 10000.0}}
-    ]
-    
-    for default in defaults:
+    for default in DEFAULT_GAME_CONFIGS:
         config = GameConfig(**default)
-        await db.game_config.insert_one(config.dict())
+        await state.db.game_config.insert_one(config.dict())
+    invalidate_game_configs(state)
 
 @api_router.post("/auth/login")
-async def login(user_data: UserLogin):
-    user = await db.users.find_one({"username": user_data.username})
+async def login(user_data: UserLogin, state: AppState = Depends(get_state)):
+    user = await state.db.users.find_one({"username": user_data.username})
     if not user or not verify_password(user_data.password, user["hashed_password"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
@@ -295,11 +306,17 @@ async def login(user_data: UserLogin):
 async def get_me(current_user: User = Depends(get_current_user)):
     return {"username": current_user.username, "email": current_user.email, "balance": current_user.balance, "is_admin": current_user.is_admin}
 
+@api_router.get("/profile")
+async def get_profile(current_user: User = Depends(get_current_user), state: AppState = Depends(get_state)):
+    """Lifetime betting stats: wagered, net profit, biggest win and per-game counts"""
+    user = await state.data_access.find_one("users", HOT_PATH, {"id": current_user.id}, {"_id": 0, STATS_FIELD: 1})
+    return {"username": current_user.username, "stats": public_stats(user.get(STATS_FIELD))}
+
 # Site Configuration endpoints
 @api_router.get("/config")
-async def get_site_config():
+async def get_site_config(state: AppState = Depends(get_state)):
     """Get public site configuration"""
-    configs = await db.site_config.find({"category": {"$in": ["public", "branding", "content"]}}).to_list(100)
+    configs = await state.db.site_config.find({"category": {"$in": ["public", "branding", "content"]}}).to_list(100)
     config_dict = {}
     for config in configs:
         config_dict[config["key"]] = config["value"]
@@ -326,30 +343,37 @@ async def get_site_config():
         if key not in config_dict:
             config_dict[key] = value
     
+    # Attach responsive image variants for uploaded branding assets
+    for key in [k for k in config_dict if k.endswith("_url")]:
+        srcset = await state.image_service.get_srcset(config_dict[key])
+        if srcset:
+            config_dict[key[:-len("_url")] + "_srcset"] = srcset
+    
     return config_dict
 
 @api_router.get("/admin/config")
-async def get_admin_config(admin_user: User = Depends(get_admin_user)):
+async def get_admin_config(admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
     """Get all site configuration for admin"""
-    configs = await db.site_config.find().to_list(100)
+    configs = await state.db.site_config.find().to_list(100)
     config_dict = {}
     for config in configs:
         config_dict[config["key"]] = config["value"]
     
     # Get payment config
-    payment_config = await db.payment_config.find_one({})
+    payment_config = await state.db.payment_config.find_one({})
     if payment_config:
         config_dict.update(payment_config)
     
     return config_dict
 
 @api_router.post("/admin/config")
-async def update_site_config(config_updates: Dict[str, Any], admin_user: User = Depends(get_admin_user)):
+async def update_site_config(config_updates: Dict[str, Any], admin_user: User = Depends(get_admin_user),
+                             state: AppState = Depends(get_state)):
     """Update site configuration"""
     for key, value in config_updates.items():
         if key.startswith("mercadopago_"):
             # Update payment config
-            await db.payment_config.update_one(
+            await state.db.payment_config.update_one(
                 {},
                 {"$set": {key: value, "updated_at": datetime.utcnow()}},
                 upsert=True
@@ -363,7 +387,7 @@ async def update_site_config(config_updates: Dict[str, Any], admin_user: User =
                 category = "content"
             
             config = SiteConfig(key=key, value=value, category=category)
-            await db.site_config.update_one(
+            await state.db.site_config.update_one(
                 {"key": key},
                 {"$set": config.dict()},
                 upsert=True
@@ -372,7 +396,8 @@ async def update_site_config(config_updates: Dict[str, Any], admin_user: User =
     return {"message": "Configuration updated successfully"}
 
 @api_router.post("/admin/upload")
-async def upload_file(file: UploadFile = File(...), admin_user: User = Depends(get_admin_user)):
+async def upload_file(file: UploadFile = File(...), admin_user: User = Depends(get_admin_user),
+                      state: AppState = Depends(get_state)):
     """Upload file for site customization"""
     # Validate file type
     allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
@@ -382,168 +407,148 @@ async def upload_file(file: UploadFile = File(...), admin_user: User = Depends(g
     # Generate unique filename
     file_extension = file.filename.split(".")[-1]
     filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = UPLOAD_DIR / filename
+    file_path = state.upload_dir / filename
     
     # Save file
     async with aiofiles.open(file_path, 'wb') as f:
         content = await file.read()
         await f.write(content)
     
+    # Generate resized WebP/AVIF variants in the background
+    state.image_service.schedule(filename)
+    
     file_url = f"/uploads/{filename}"
     return {"url": file_url, "filename": filename}
 
 # Game Configuration
 @api_router.get("/admin/games/config")
-async def get_game_configs(admin_user: User = Depends(get_admin_user)):
+async def get_game_configs(admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
     """Get game configurations"""
-    configs = await db.game_config.find().to_list(100)
+    configs = await state.db.game_config.find().to_list(100)
     if not configs:
         # Set default configurations
-        defaults = [
-            {"game_type": "dice", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 99.0}},
-            {"game_type": "mines", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "grid_size": 25, "max_mines": 24, "min_mines": 1}},
-            {"game_type": "crash", "settings": {"min_bet": 1.0, "max_bet": 1000.0, "house_edge": 0.01, "max_multiplier": 10000.0}}
-        ]
-        for default in defaults:
+        for default in DEFAULT_GAME_CONFIGS:
             config = GameConfig(**default)
-            await db.game_config.insert_one(config.dict())
-        configs = defaults
+            await state.db.game_config.insert_one(config.dict())
+        invalidate_game_configs(state)
+        configs = DEFAULT_GAME_CONFIGS
     
     return {config["game_type"]: config["settings"] for config in configs}
 
 @api_router.post("/admin/games/config")
-async def update_game_config(game_type: str, settings: Dict[str, Any], admin_user: User = Depends(get_admin_user)):
-    """Update game configuration"""
+async def update_game_config(game_type: str, settings: Dict[str, Any], dry_run: bool = False,
+                             admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
+    """Update game configuration; with dry_run, simulate current vs proposed RTP without saving"""
+    if dry_run:
+        if game_type not in ("dice", "mines", "crash"):
+            raise HTTPException(status_code=400, detail="Unknown game type")
+        current = await get_game_settings(state, game_type)
+        return {
+            "dry_run": True,
+            "game_type": game_type,
+            "current": await state.rtp_simulator.simulate(game_type, current) if current else None,
+            "proposed": await state.rtp_simulator.simulate(game_type, settings)
+        }
+
     config = GameConfig(game_type=game_type, settings=settings)
-    await db.game_config.update_one(
+    await state.db.game_config.update_one(
         {"game_type": game_type},
         {"$set": config.dict()},
         upsert=True
     )
+    invalidate_game_configs(state)
     return {"message": f"{game_type} configuration updated successfully"}
 
 # Game endpoints
-@api_router.post("/games/dice/play")
-async def play_dice(dice_data: DicePlay, current_user: User = Depends(get_current_user)):
-    """Play dice game"""
-    if dice_data.amount <= 0:
+async def open_round(state: AppState, game_type: str, play: BaseModel, current_user: User, hold: bool = False):
+    """Checks shared by every game before a round seed is drawn (held until release() with hold)"""
+    if not math.isfinite(play.amount) or play.amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid bet amount")
     
-    if current_user.balance < dice_data.amount:
+    if current_user.balance < play.amount:
         raise HTTPException(status_code=400, detail="Insufficient balance")
     
     # Get game config
-    game_config = await db.game_config.find_one({"game_type": "dice"})
-    if not game_config:
+    settings = await get_game_settings(state, game_type)
+    if not settings:
         raise HTTPException(status_code=500, detail="Game configuration not found")
     
-    settings = game_config["settings"]
-    if dice_data.amount < settings["min_bet"] or dice_data.amount > settings["max_bet"]:
-        raise HTTPException(status_code=400, detail=f"Bet amount must be between {settings['min_bet']} and {settings['max_bet']}")
-    
-    # Generate provably fair result
-    seed = generate_provably_fair_seed()
-    seed_hash = hash_seed(seed)
-    
-    # Generate random number (0-99.99)
-    random_int = int(seed[:8], 16)  # Use first 8 chars as hex
-    roll = (random_int % 10000) / 100  # 0-99.99
-    
-    # Calculate win/loss
-    win = (dice_data.over and roll > dice_data.target) or (not dice_data.over and roll < dice_data.target)
-    
-    # Calculate multiplier and payout
-    if win:
-        win_chance = (99.99 - dice_data.target) / 100 if dice_data.over else dice_data.target / 100
-        multiplier = (1 - settings["house_edge"]) / win_chance
-        payout = dice_data.amount * multiplier
-    else:
-        multiplier = 0
-        payout = 0
-    
-    # Update user balance
-    new_balance = current_user.balance - dice_data.amount + payout
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"balance": new_balance}}
-    )
-    
-    # Record bet
-    bet = Bet(
-        user_id=current_user.id,
-        game_type="dice",
-        amount=dice_data.amount,
-        multiplier=multiplier,
-        result="win" if win else "loss",
-        payout=payout,
-        game_data={"target": dice_data.target, "over": dice_data.over, "roll": roll},
-        seed_hash=seed_hash,
-        seed_reveal=seed
-    )
-    await db.bets.insert_one(bet.dict())
+    engine = GAMES[game_type]
+    try:
+        engine.validate(play, settings)
+    except BetRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    # Generate provably fair round seed
+    try:
+        round_seed = await state.seed_pairs.next_round(current_user.id, hold=hold)
+    except SeedPairConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return engine, settings, round_seed
+
+def game_bet(user_id: str, game_type: str, amount: float, outcome: Outcome, **seed_fields) -> Dict[str, Any]:
+    return Bet.new(
+        user_id=user_id,
+        game_type=game_type,
+        amount=amount,
+        multiplier=outcome.multiplier,
+        result=outcome.result,
+        payout=outcome.payout,
+        game_data=outcome.game_data,
+        **seed_fields
+    ).to_doc()
+
+async def settle(state: AppState, settlement: Settlement) -> Optional[float]:
+    try:
+        return await state.settlement_core.settle(settlement)
+    except SettlementError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+async def play_instant_game(state: AppState, game_type: str, play: BaseModel, current_user: User) -> Dict[str, Any]:
+    """Single-step games: one outcome, one settlement"""
+    engine, settings, round_seed = await open_round(state, game_type, play, current_user)
+    outcome = engine.play(play, settings, round_seed.seed)
+    bet = game_bet(current_user.id, game_type, play.amount, outcome,
+                   seed_pair_id=round_seed.seed_pair_id, nonce=round_seed.nonce)
+    new_balance = await settle(state, Settlement(
+        user_id=current_user.id, stake=play.amount, payout=outcome.payout, bet=bet, username=current_user.username
+    ))
     return {
-        "result": "win" if win else "loss",
-        "roll": roll,
-        "target": dice_data.target,
-        "over": dice_data.over,
-        "multiplier": multiplier,
-        "payout": payout,
+        "result": outcome.result,
+        **outcome.response,
+        "multiplier": outcome.multiplier,
+        "payout": outcome.payout,
         "new_balance": new_balance,
-        "seed_hash": seed_hash
+        "seed_hash": round_seed.server_seed_hash,
+        "nonce": round_seed.nonce
     }
 
-@api_router.post("/games/mines/start")
-async def start_mines_game(mines_data: MinesPlay, current_user: User = Depends(get_current_user)):
+async def get_active_session(state: AppState, game_id: str, current_user: User) -> Dict[str, Any]:
+    game_session = await state.db.game_sessions.find_one({"id": game_id, "user_id": current_user.id, "status": "active"})
+    if not game_session:
+        raise HTTPException(status_code=404, detail="Game session not found or inactive")
+    return game_session
+
+@api_router.post("/games/dice/play", dependencies=[Depends(game_rate_limit("dice", "dice.play"))])
+async def play_dice(dice_data: DicePlay, current_user: User = Depends(get_current_user),
+                    state: AppState = Depends(get_state)):
+    """Play dice game"""
+    return await play_instant_game(state, "dice", dice_data, current_user)
+
+@api_router.post("/games/mines/start", dependencies=[Depends(game_rate_limit("mines", "mines.start"))])
+async def start_mines_game(mines_data: MinesPlay, current_user: User = Depends(get_current_user),
+                           state: AppState = Depends(get_state)):
     """Start a new mines game"""
-    if mines_data.amount <= 0:
-        raise HTTPException(status_code=400, detail="Invalid bet amount")
-    
-    if current_user.balance < mines_data.amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-    
-    # Get game config
-    game_config = await db.game_config.find_one({"game_type": "mines"})
-    if not game_config:
-        raise HTTPException(status_code=500, detail="Game configuration not found")
-    
-    settings = game_config["settings"]
-    if mines_data.amount < settings["min_bet"] or mines_data.amount > settings["max_bet"]:
-        raise HTTPException(status_code=400, detail=f"Bet amount must be between {settings['min_bet']} and {settings['max_bet']}")
-    
-    if mines_data.mines_count < settings["min_mines"] or mines_data.mines_count > settings["max_mines"]:
-        raise HTTPException(status_code=400, detail=f"Mines count must be between {settings['min_mines']} and {settings['max_mines']}")
-    
-    # Generate provably fair mines positions
-    seed = generate_provably_fair_seed()
-    seed_hash = hash_seed(seed)
-    
-    mines_positions = generate_mines_grid(mines_data.mines_count, seed, settings["grid_size"])
-    
-    # Deduct bet amount from balance
-    new_balance = current_user.balance - mines_data.amount
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"balance": new_balance}}
-    )
-    
-    # Create game session
-    game_session = {
-        "id": str(uuid.uuid4()),
-        "user_id": current_user.id,
-        "game_type": "mines",
-        "amount": mines_data.amount,
-        "mines_count": mines_data.mines_count,
-        "mines_positions": mines_positions,
-        "revealed_tiles": [],
-        "status": "active",
-        "current_multiplier": 1.0,
-        "seed_hash": seed_hash,
-        "seed_reveal": seed,
-        "created_at": datetime.utcnow()
-    }
-    
-    await db.game_sessions.insert_one(game_session)
+    # The seed pair can't be rotated (revealing the mines) until the session is stored
+    engine, settings, round_seed = await open_round(state, "mines", mines_data, current_user, hold=True)
+    try:
+        # Debit the stake and open the session together
+        game_session = engine.new_session(mines_data, settings, current_user.id, round_seed.seed)
+        game_session.update({"seed_pair_id": round_seed.seed_pair_id, "nonce": round_seed.nonce})
+        new_balance = await settle(state, Settlement(user_id=current_user.id, stake=mines_data.amount,
+                                                     session_insert=game_session))
+    finally:
+        await state.seed_pairs.release(round_seed)
     
     return {
         "game_id": game_session["id"],
@@ -551,218 +556,227 @@ async def start_mines_game(mines_data: MinesPlay, current_user: User = Depends(g
         "mines_count": mines_data.mines_count,
         "current_multiplier": 1.0,
         "new_balance": new_balance,
-        "seed_hash": seed_hash
+        "seed_hash": round_seed.server_seed_hash,
+        "nonce": round_seed.nonce
     }
 
-@api_router.post("/games/mines/reveal")
-async def reveal_mines_tile(game_id: str, tile_position: int, current_user: User = Depends(get_current_user)):
+@api_router.post("/games/mines/reveal", dependencies=[Depends(game_rate_limit("mines", "mines.reveal"))])
+async def reveal_mines_tile(game_id: str, tile_position: int, current_user: User = Depends(get_current_user),
+                            state: AppState = Depends(get_state)):
     """Reveal a tile in mines game"""
-    # Get game session
-    game_session = await db.game_sessions.find_one({"id": game_id, "user_id": current_user.id, "status": "active"})
-    if not game_session:
-        raise HTTPException(status_code=404, detail="Game session not found or inactive")
+    game_session = await get_active_session(state, game_id, current_user)
+    
+    grid_size = game_session.get("grid_size", 25)
+    if not 0 <= tile_position < grid_size:
+        raise HTTPException(status_code=400, detail=f"Tile position must be between 0 and {grid_size - 1}")
     
     # Check if tile already revealed
     if tile_position in game_session["revealed_tiles"]:
         raise HTTPException(status_code=400, detail="Tile already revealed")
     
-    # Check if tile is a mine
-    hit_mine = tile_position in game_session["mines_positions"]
-    
-    if hit_mine:
-        # Game over - player hit mine
-        await db.game_sessions.update_one(
-            {"id": game_id},
-            {"$set": {"status": "lost"}}
-        )
-        
-        # Record losing bet
-        bet = Bet(
-            user_id=current_user.id,
-            game_type="mines",
-            amount=game_session["amount"],
-            multiplier=0,
-            result="loss",
-            payout=0,
-            game_data={
-                "mines_count": game_session["mines_count"],
-                "revealed_tiles": game_session["revealed_tiles"] + [tile_position],
-                "hit_mine": True,
-                "mine_position": tile_position
-            },
-            seed_hash=game_session["seed_hash"],
-            seed_reveal=game_session["seed_reveal"]
-        )
-        await db.bets.insert_one(bet.dict())
-        
-        return {
-            "result": "mine",
-            "game_over": True,
-            "tile_position": tile_position,
-            "mines_positions": game_session["mines_positions"],
-            "payout": 0
-        }
-    
+    outcome = GAMES["mines"].reveal(game_session, tile_position)
+    # Every write is guarded on the session still being active, so a
+    # concurrent reveal/cashout or the sweeper can't settle it twice
+    active = {"id": game_id, "status": "active"}
+    if outcome.result == "safe":
+        await settle(state, Settlement(user_id=current_user.id, session_filter=active,
+                                session_update={"$set": outcome.game_data}))
     else:
-        # Safe tile - update game session
-        revealed_tiles = game_session["revealed_tiles"] + [tile_position]
-        current_multiplier = calculate_mines_multiplier(len(revealed_tiles), game_session["mines_count"])
-        
-        await db.game_sessions.update_one(
-            {"id": game_id},
-            {"$set": {
-                "revealed_tiles": revealed_tiles,
-                "current_multiplier": current_multiplier
-            }}
-        )
-        
-        return {
-            "result": "safe",
-            "game_over": False,
-            "tile_position": tile_position,
-            "current_multiplier": current_multiplier,
-            "revealed_count": len(revealed_tiles)
-        }
+        # Game over - player hit mine
+        bet = game_bet(current_user.id, "mines", game_session["amount"], outcome, **session_seed_fields(game_session))
+        await settle(state, Settlement(
+            user_id=current_user.id, bet=bet, username=current_user.username, session_filter=active,
+            session_update={"$set": {"status": "lost", "finished_at": datetime.utcnow()}}
+        ))
+    return outcome.response
 
-@api_router.post("/games/mines/cashout")
-async def cashout_mines_game(game_id: str, current_user: User = Depends(get_current_user)):
+@api_router.post("/games/mines/cashout", dependencies=[Depends(game_rate_limit("mines", "mines.cashout"))])
+async def cashout_mines_game(game_id: str, current_user: User = Depends(get_current_user),
+                             state: AppState = Depends(get_state)):
     """Cash out from mines game"""
-    # Get game session
-    game_session = await db.game_sessions.find_one({"id": game_id, "user_id": current_user.id, "status": "active"})
-    if not game_session:
-        raise HTTPException(status_code=404, detail="Game session not found or inactive")
-    
-    if not game_session["revealed_tiles"]:
-        raise HTTPException(status_code=400, detail="Must reveal at least one tile before cashing out")
-    
-    # Calculate payout
-    multiplier = game_session["current_multiplier"]
-    payout = game_session["amount"] * multiplier
-    
-    # Update user balance
-    current_user_data = await db.users.find_one({"id": current_user.id})
-    new_balance = current_user_data["balance"] + payout
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"balance": new_balance}}
-    )
-    
-    # Update game session
-    await db.game_sessions.update_one(
-        {"id": game_id},
-        {"$set": {"status": "won"}}
-    )
-    
-    # Record winning bet
-    bet = Bet(
-        user_id=current_user.id,
-        game_type="mines",
-        amount=game_session["amount"],
-        multiplier=multiplier,
-        result="win",
-        payout=payout,
-        game_data={
-            "mines_count": game_session["mines_count"],
-            "revealed_tiles": game_session["revealed_tiles"],
-            "cashed_out": True
-        },
-        seed_hash=game_session["seed_hash"],
-        seed_reveal=game_session["seed_reveal"]
-    )
-    await db.bets.insert_one(bet.dict())
+    game_session = await get_active_session(state, game_id, current_user)
+    try:
+        outcome = GAMES["mines"].cashout(game_session)
+    except BetRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Closing the session is the guard: a second cashout gets a 409, not a second payout
+    bet = game_bet(current_user.id, "mines", game_session["amount"], outcome, **session_seed_fields(game_session))
+    new_balance = await settle(state, Settlement(
+        user_id=current_user.id, payout=outcome.payout, bet=bet, username=current_user.username,
+        session_filter={"id": game_id, "status": "active"},
+        session_update={"$set": {"status": "won", "finished_at": datetime.utcnow()}}
+    ))
     
     return {
         "result": "cashout",
-        "multiplier": multiplier,
-        "payout": payout,
+        "multiplier": outcome.multiplier,
+        "payout": outcome.payout,
         "new_balance": new_balance
     }
 
-@api_router.post("/games/crash/play")
-async def play_crash_game(crash_data: CrashPlay, current_user: User = Depends(get_current_user)):
+@api_router.post("/games/crash/play", dependencies=[Depends(game_rate_limit("crash", "crash.play"))])
+async def play_crash_game(crash_data: CrashPlay, current_user: User = Depends(get_current_user),
+                          state: AppState = Depends(get_state)):
     """Play crash game"""
-    if crash_data.amount <= 0:
-        raise HTTPException(status_code=400, detail="Invalid bet amount")
-    
-    if current_user.balance < crash_data.amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-    
-    # Get game config
-    game_config = await db.game_config.find_one({"game_type": "crash"})
-    if not game_config:
-        raise HTTPException(status_code=500, detail="Game configuration not found")
-    
-    settings = game_config["settings"]
-    if crash_data.amount < settings["min_bet"] or crash_data.amount > settings["max_bet"]:
-        raise HTTPException(status_code=400, detail=f"Bet amount must be between {settings['min_bet']} and {settings['max_bet']}")
-    
-    # Generate provably fair crash point
-    seed = generate_provably_fair_seed()
-    seed_hash = hash_seed(seed)
-    crash_point = generate_crash_multiplier(seed)
-    
-    # Determine if player wins (if they set auto cash out)
-    if crash_data.auto_cash_out:
-        if crash_data.auto_cash_out <= crash_point:
-            # Player wins
-            multiplier = crash_data.auto_cash_out
-            payout = crash_data.amount * multiplier
-            result = "win"
-        else:
-            # Player loses (crash happened before their cash out)
-            multiplier = 0
-            payout = 0
-            result = "loss"
-    else:
-        # Manual play - return crash point for client to handle
-        multiplier = 0
-        payout = 0
-        result = "manual"
-    
-    # Update user balance
-    new_balance = current_user.balance - crash_data.amount + payout
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"balance": new_balance}}
-    )
-    
-    # Record bet
-    bet = Bet(
-        user_id=current_user.id,
-        game_type="crash",
-        amount=crash_data.amount,
-        multiplier=multiplier,
-        result=result,
-        payout=payout,
-        game_data={
-            "crash_point": crash_point,
-            "auto_cash_out": crash_data.auto_cash_out,
-            "manual_play": crash_data.auto_cash_out is None
-        },
-        seed_hash=seed_hash,
-        seed_reveal=seed
+    return await play_instant_game(state, "crash", crash_data, current_user)
+
+# Provably fair seed pairs
+@api_router.get("/seeds")
+async def get_seed_pair(current_user: User = Depends(get_current_user), state: AppState = Depends(get_state)):
+    """Active seed pair: committed server seed hash, client seed and next nonce"""
+    return public_seed_pair(await state.seed_pairs.get_active(current_user.id))
+
+@api_router.post("/seeds/rotate")
+async def rotate_seed_pair(request: RotateSeedRequest, current_user: User = Depends(get_current_user),
+                           state: AppState = Depends(get_state)):
+    """Reveal the active server seed and start a new pair, optionally with a new client seed"""
+    if request.client_seed is not None and not 0 < len(request.client_seed) <= MAX_CLIENT_SEED_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Client seed must be 1-{MAX_CLIENT_SEED_LENGTH} characters")
+    # Revealing the server seed would expose the mines of a game in progress
+    async def in_play() -> bool:
+        return bool(await state.db.game_sessions.find_one({"user_id": current_user.id, "status": "active"},
+                                                          {"_id": 1}))
+    try:
+        return await state.seed_pairs.rotate(current_user.id, request.client_seed, in_play=in_play)
+    except SeedPairConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+# Leaderboards
+def read_leaderboard(leaderboard: LeaderboardService, board: str, game_type: str, limit: int) -> Dict[str, Any]:
+    if game_type != ALL_GAMES and game_type not in GAME_TYPES.values():
+        raise HTTPException(status_code=400, detail="Unknown game type")
+    if limit < 1 or limit > leaderboard.k:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {leaderboard.k}")
+    return leaderboard.get(board, game_type, limit)
+
+@api_router.get("/leaderboard/biggest-wins")
+async def get_biggest_wins(game_type: str = ALL_GAMES, limit: int = 10, state: AppState = Depends(get_state)):
+    """Biggest single payouts today (UTC), overall or per game"""
+    return read_leaderboard(state.leaderboard, "biggest_wins", game_type, limit)
+
+@api_router.get("/leaderboard/top-wagered")
+async def get_top_wagered(game_type: str = ALL_GAMES, limit: int = 10, state: AppState = Depends(get_state)):
+    """Players who wagered the most this week (ISO week, UTC), overall or per game"""
+    return read_leaderboard(state.leaderboard, "top_wagered", game_type, limit)
+
+# Live bet feed
+@api_router.get("/feed/bets")
+async def get_recent_bets(limit: int = 20, state: AppState = Depends(get_state)):
+    """Most recently settled bets, newest first"""
+    if limit < 1 or limit > state.bet_feed.size:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {state.bet_feed.size}")
+    return {"bets": state.bet_feed.snapshot(limit)}
+
+@api_router.get("/feed/bets/stream")
+async def stream_bets(state: AppState = Depends(get_state)):
+    """Server-sent events stream of settled bets"""
+    return StreamingResponse(
+        state.bet_feed.stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    await db.bets.insert_one(bet.dict())
-    
-    return {
-        "result": result,
-        "crash_point": crash_point,
-        "multiplier": multiplier,
-        "payout": payout,
-        "new_balance": new_balance,
-        "seed_hash": seed_hash,
-        "auto_cash_out": crash_data.auto_cash_out
-    }
+
+# Provably fair verification
+async def attach_seed_pairs(seed_pairs: SeedPairStore, bets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach revealed seed pairs (stored or decoded bets) so seed-pair bets can be recomputed"""
+    pair_ids = {bet_seed_pair_id(bet) for bet in bets} - {None}
+    if pair_ids:
+        pairs = await seed_pairs.get_revealed(pair_ids)
+        for bet in bets:
+            seed_pair_id = bet_seed_pair_id(bet)
+            if seed_pair_id:
+                bet["seed_pair"] = pairs.get(seed_pair_id)
+    return bets
+
+def archive_window(start: Optional[datetime], end: Optional[datetime]) -> None:
+    """Archive reads scan every partition in range, so API callers must bound it"""
+    try:
+        check_query_window(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/verify/bets/{bet_id}")
+async def verify_single_bet(bet_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            current_user: User = Depends(get_current_user), state: AppState = Depends(get_state)):
+    """Recompute a single bet from its revealed seed; archived bets are found within [start, end)"""
+    user_id = None if current_user.is_admin else current_user.id
+    query = bet_id_query([bet_id])
+    if user_id:
+        query = {"$and": [query, bet_user_query(user_id)]}
+    bet = await state.data_access.find_one("bets", HISTORY, query, BET_PROJECTION)
+    if bet:
+        bet = decode_bet(bet)
+    else:
+        if start is None and end is None:
+            raise HTTPException(status_code=404, detail="Bet not found (pass start and end to search the archive)")
+        archive_window(start, end)
+        loop = asyncio.get_running_loop()
+        archived = await loop.run_in_executor(
+            None, lambda: state.bet_archive.query(start, end, user_id=user_id, bet_ids=[bet_id], limit=1)
+        )
+        if not archived["bets"]:
+            raise HTTPException(status_code=404, detail="Bet not found")
+        bet = archived["bets"][0]
+    return verify_bet((await attach_seed_pairs(state.seed_pairs, [bet]))[0])
+
+async def archived_bets(bet_archive: BetArchive, start: datetime, end: datetime, user_id: Optional[str] = None,
+                        bet_ids: Optional[List[str]] = None):
+    """Stream archived bets one partition file at a time, reading files off the event loop"""
+    loop = asyncio.get_running_loop()
+    paths = await loop.run_in_executor(None, bet_archive.files, start, end)
+    for path in paths:
+        for bet in await loop.run_in_executor(None, bet_archive.read_file, path, start, end, user_id, bet_ids):
+            yield bet
+
+async def hot_and_archived(cursor, archived=None):
+    async for bet in cursor:
+        yield bet
+    if archived is not None:
+        async for bet in archived:
+            yield bet
+
+@api_router.post("/verify/bets")
+async def verify_bets(request: VerifyBetsRequest, current_user: User = Depends(get_current_user),
+                      state: AppState = Depends(get_state)):
+    """Bulk-verify bets by id list and/or user and date range; players can only verify their own bets"""
+    conditions = []
+    user_id = request.user_id if current_user.is_admin else current_user.id
+    if request.bet_ids:
+        conditions.append(bet_id_query(request.bet_ids))
+    if user_id:
+        conditions.append(bet_user_query(user_id))
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Provide bet_ids or user_id")
+    if request.start or request.end:
+        created = {}
+        if request.start:
+            created["$gte"] = request.start
+        if request.end:
+            created["$lt"] = request.end
+        conditions.append({"$or": [{"t": created}, {"created_at": created}]})
+
+    # The archive is only searched within a bounded date range
+    if request.start and request.end:
+        archive_window(request.start, request.end)
+        archived = archived_bets(state.bet_archive, request.start, request.end, user_id, request.bet_ids)
+    else:
+        archived = None
+    cursor = state.data_access.find(
+        "bets", ANALYTICS, {"$and": conditions}, BET_PROJECTION
+    ).batch_size(state.verification_service.chunk_size)
+    return await state.verification_service.verify_cursor(hot_and_archived(cursor, archived),
+                                                    prepare=partial(attach_seed_pairs, state.seed_pairs))
 
 # Payment endpoints
 @api_router.post("/payments/deposit/create")
-async def create_deposit(deposit_data: DepositRequest, current_user: User = Depends(get_current_user)):
+async def create_deposit(deposit_data: DepositRequest, current_user: User = Depends(get_current_user),
+                         state: AppState = Depends(get_state)):
     """Create a deposit payment preference"""
     if deposit_data.amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid deposit amount")
     
     # Get payment config
-    payment_config = await db.payment_config.find_one({})
+    payment_config = await state.db.payment_config.find_one({})
     if not payment_config or not payment_config.get("mercadopago_access_token"):
         raise HTTPException(status_code=500, detail="Payment system not configured")
     
@@ -793,7 +807,7 @@ async def create_deposit(deposit_data: DepositRequest, current_user: User = Depe
         raise HTTPException(status_code=500, detail="Error creating payment preference")
     
     # Store transaction in database
-    transaction = Transaction(
+    transaction = Transaction.new(
         id=transaction_id,
         user_id=current_user.id,
         type="deposit",
@@ -806,7 +820,7 @@ async def create_deposit(deposit_data: DepositRequest, current_user: User = Depe
         }
     )
     
-    await db.transactions.insert_one(transaction.dict())
+    await state.db.transactions.insert_one(transaction.to_doc())
     
     return {
         "transaction_id": transaction_id,
@@ -816,8 +830,9 @@ async def create_deposit(deposit_data: DepositRequest, current_user: User = Depe
     }
 
 @api_router.post("/payments/webhook")
-async def payment_webhook(request: Request):
+async def payment_webhook(request: Request, state: AppState = Depends(get_state)):
     """Handle MercadoPago webhook notifications"""
+    WEBHOOKS_IN_PROGRESS.inc()
     try:
         body = await request.body()
         data = await request.json()
@@ -827,7 +842,7 @@ async def payment_webhook(request: Request):
             payment_id = data["data"]["id"]
             
             # Get payment config for access token
-            payment_config = await db.payment_config.find_one({})
+            payment_config = await state.db.payment_config.find_one({})
             if not payment_config:
                 raise HTTPException(status_code=500, detail="Payment configuration not found")
             
@@ -840,13 +855,13 @@ async def payment_webhook(request: Request):
             
             if result["success"]:
                 # Find transaction by external reference
-                transaction = await db.transactions.find_one({
+                transaction = await state.db.transactions.find_one({
                     "id": result["external_reference"]
                 })
                 
                 if transaction:
                     # Update transaction status
-                    await db.transactions.update_one(
+                    await state.db.transactions.update_one(
                         {"id": result["external_reference"]},
                         {"$set": {
                             "status": result["status"],
@@ -857,10 +872,10 @@ async def payment_webhook(request: Request):
                     
                     # If payment approved, add to user balance
                     if result["status"] == "completed":
-                        user = await db.users.find_one({"id": transaction["user_id"]})
+                        user = await state.db.users.find_one({"id": transaction["user_id"]})
                         if user:
                             new_balance = user["balance"] + transaction["amount"]
-                            await db.users.update_one(
+                            await state.db.users.update_one(
                                 {"id": transaction["user_id"]},
                                 {"$set": {"balance": new_balance}}
                             )
@@ -870,11 +885,14 @@ async def payment_webhook(request: Request):
     except Exception as e:
         logging.error(f"Webhook error: {str(e)}")
         return {"status": "ERROR", "message": str(e)}
+    finally:
+        WEBHOOKS_IN_PROGRESS.dec()
 
 @api_router.get("/payments/status/{transaction_id}")
-async def get_payment_status(transaction_id: str, current_user: User = Depends(get_current_user)):
+async def get_payment_status(transaction_id: str, current_user: User = Depends(get_current_user),
+                             state: AppState = Depends(get_state)):
     """Get payment status"""
-    transaction = await db.transactions.find_one({
+    transaction = await state.db.transactions.find_one({
         "id": transaction_id,
         "user_id": current_user.id
     })
@@ -892,9 +910,10 @@ async def get_payment_status(transaction_id: str, current_user: User = Depends(g
     }
 
 @api_router.get("/payments/history")
-async def get_payment_history(current_user: User = Depends(get_current_user), limit: int = 20):
+async def get_payment_history(current_user: User = Depends(get_current_user), limit: int = 20,
+                              state: AppState = Depends(get_state)):
     """Get user payment history"""
-    transactions = await db.transactions.find({
+    transactions = await state.data_access.find("transactions", HISTORY, {
         "user_id": current_user.id
     }).sort("created_at", -1).limit(limit).to_list(limit)
     
@@ -904,7 +923,8 @@ async def get_payment_history(current_user: User = Depends(get_current_user), li
     }
 
 @api_router.post("/payments/withdraw/request")
-async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User = Depends(get_current_user)):
+async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User = Depends(get_current_user),
+                             state: AppState = Depends(get_state)):
     """Request a withdrawal"""
     if withdraw_data.amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid withdrawal amount")
@@ -913,7 +933,7 @@ async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User
         raise HTTPException(status_code=400, detail="Insufficient balance")
     
     # Get payment config
-    payment_config = await db.payment_config.find_one({})
+    payment_config = await state.db.payment_config.find_one({})
     if not payment_config:
         raise HTTPException(status_code=500, detail="Payment system not configured")
     
@@ -928,13 +948,13 @@ async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User
     
     # Deduct from user balance immediately (pending approval)
     new_balance = current_user.balance - withdraw_data.amount
-    await db.users.update_one(
+    await state.db.users.update_one(
         {"id": current_user.id},
         {"$set": {"balance": new_balance}}
     )
     
     # Store withdrawal request
-    transaction = Transaction(
+    transaction = Transaction.new(
         id=transaction_id,
         user_id=current_user.id,
         type="withdrawal",
@@ -947,7 +967,7 @@ async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User
         }
     )
     
-    await db.transactions.insert_one(transaction.dict())
+    await state.db.transactions.insert_one(transaction.to_doc())
     
     return {
         "transaction_id": transaction_id,
@@ -958,112 +978,81 @@ async def request_withdrawal(withdraw_data: WithdrawRequest, current_user: User
     }
 
 @api_router.get("/admin/payments/withdrawals")
-async def get_pending_withdrawals(admin_user: User = Depends(get_admin_user)):
+async def get_pending_withdrawals(admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
     """Get pending withdrawal requests for admin"""
-    withdrawals = await db.transactions.find({
+    withdrawals = await state.data_access.find("transactions", HISTORY, {
         "type": "withdrawal",
         "status": "pending"
-    }).sort("created_at", -1).to_list(100)
+    }, {"_id": 0}).sort("created_at", -1).to_list(100)
     
     return {"withdrawals": withdrawals}
 
+async def review_withdrawals(state: AppState, transaction_ids: List[str], approve: bool, admin_user: User,
+                             reason: Optional[str] = None) -> Dict[str, Any]:
+    if not transaction_ids or len(transaction_ids) > withdrawal_review.MAX_REVIEW_BATCH:
+        raise HTTPException(status_code=400,
+                            detail=f"Send between 1 and {withdrawal_review.MAX_REVIEW_BATCH} transaction ids")
+    return await withdrawal_review.review_withdrawals(state.client, state.db, transaction_ids, approve, admin_user.id,
+                                                      reason, transactions=state.settlement_core.transactions)
+
+@api_router.post("/admin/payments/withdrawals/approve")
+async def approve_withdrawals(request: WithdrawalReview, admin_user: User = Depends(get_admin_user),
+                              state: AppState = Depends(get_state)):
+    """Approve several withdrawal requests; each id reports approved, not_pending or not_found"""
+    return await review_withdrawals(state, request.transaction_ids, True, admin_user)
+
+@api_router.post("/admin/payments/withdrawals/reject")
+async def reject_withdrawals(request: WithdrawalReview, admin_user: User = Depends(get_admin_user),
+                             state: AppState = Depends(get_state)):
+    """Reject several withdrawal requests and refund each player once; each id reports rejected, not_pending or not_found"""
+    if not request.reason:
+        raise HTTPException(status_code=400, detail="A rejection reason is required")
+    return await review_withdrawals(state, request.transaction_ids, False, admin_user, request.reason)
+
 @api_router.post("/admin/payments/withdrawals/{transaction_id}/approve")
-async def approve_withdrawal(transaction_id: str, admin_user: User = Depends(get_admin_user)):
+async def approve_withdrawal(transaction_id: str, admin_user: User = Depends(get_admin_user),
+                             state: AppState = Depends(get_state)):
     """Approve a withdrawal request"""
-    transaction = await db.transactions.find_one({
-        "id": transaction_id,
-        "type": "withdrawal",
-        "status": "pending"
-    })
-    
-    if not transaction:
+    if not (await review_withdrawals(state, [transaction_id], True, admin_user))["processed"]:
         raise HTTPException(status_code=404, detail="Withdrawal request not found")
-    
-    # Update transaction status
-    await db.transactions.update_one(
-        {"id": transaction_id},
-        {"$set": {
-            "status": "completed",
-            "metadata.approved_by": admin_user.id,
-            "metadata.approved_at": datetime.utcnow()
-        }}
-    )
-    
     return {"message": "Withdrawal approved successfully"}
 
 @api_router.post("/admin/payments/withdrawals/{transaction_id}/reject")
-async def reject_withdrawal(transaction_id: str, reason: str, admin_user: User = Depends(get_admin_user)):
+async def reject_withdrawal(transaction_id: str, reason: str, admin_user: User = Depends(get_admin_user),
+                            state: AppState = Depends(get_state)):
     """Reject a withdrawal request and refund balance"""
-    transaction = await db.transactions.find_one({
-        "id": transaction_id,
-        "type": "withdrawal",
-        "status": "pending"
-    })
-    
-    if not transaction:
+    if not (await review_withdrawals(state, [transaction_id], False, admin_user, reason))["processed"]:
         raise HTTPException(status_code=404, detail="Withdrawal request not found")
-    
-    # Refund user balance
-    user = await db.users.find_one({"id": transaction["user_id"]})
-    if user:
-        new_balance = user["balance"] + transaction["amount"]
-        await db.users.update_one(
-            {"id": transaction["user_id"]},
-            {"$set": {"balance": new_balance}}
-        )
-    
-    # Update transaction status
-    await db.transactions.update_one(
-        {"id": transaction_id},
-        {"$set": {
-            "status": "rejected",
-            "metadata.rejected_by": admin_user.id,
-            "metadata.rejected_at": datetime.utcnow(),
-            "metadata.rejection_reason": reason
-        }}
-    )
-    
     return {"message": "Withdrawal rejected and balance refunded"}
 
 @api_router.get("/admin/stats")
-async def get_admin_stats(admin_user: User = Depends(get_admin_user)):
+async def get_admin_stats(admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
     """Get admin dashboard statistics"""
-    total_users = await db.users.count_documents({})
-    total_bets = await db.bets.count_documents({})
+    total_users = await state.data_access.count("users", ANALYTICS)
+    total_bets = await state.data_access.count("bets", ANALYTICS)
     
-    # Calculate total wagered and profit
+    # Per-game totals in one pass (compact and legacy bet documents)
     pipeline = [
         {"$group": {
-            "_id": None,
-            "total_wagered": {"$sum": "$amount"},
-            "total_payout": {"$sum": "$payout"}
+            "_id": bet_field_expr("game_type"),
+            "total_bets": {"$sum": 1},
+            "total_wagered": {"$sum": bet_field_expr("amount")},
+            "total_payout": {"$sum": bet_field_expr("payout")}
         }}
     ]
-    result = list(await db.bets.aggregate(pipeline).to_list(1))
-    total_wagered = result[0]["total_wagered"] if result else 0
-    total_payout = result[0]["total_payout"] if result else 0
+    results = await state.data_access.aggregate("bets", ANALYTICS, pipeline).to_list(None)
+    
+    game_stats = {game_type: {"total_bets": 0, "total_wagered": 0, "total_payout": 0} for game_type in ["dice", "mines", "crash"]}
+    for row in results:
+        game_type = GAME_TYPES.get(row.pop("_id"))
+        if game_type:
+            game_stats[game_type] = row
+    total_wagered = sum(row["total_wagered"] for row in results)
+    total_payout = sum(row["total_payout"] for row in results)
     house_profit = total_wagered - total_payout
     
-    # Game stats
-    game_stats = {}
-    for game_type in ["dice", "mines", "crash"]:
-        game_pipeline = [
-            {"$match": {"game_type": game_type}},
-            {"$group": {
-                "_id": None,
-                "total_bets": {"$sum": 1},
-                "total_wagered": {"$sum": "$amount"},
-                "total_payout": {"$sum": "$payout"}
-            }}
-        ]
-        game_result = list(await db.bets.aggregate(game_pipeline).to_list(1))
-        if game_result:
-            game_stats[game_type] = game_result[0]
-        else:
-            game_stats[game_type] = {"total_bets": 0, "total_wagered": 0, "total_payout": 0}
-    
-    # Recent bets
-    recent_bets = await db.bets.find().sort("created_at", -1).limit(10).to_list(10)
+    # Recent bets (from the in-memory feed)
+    recent_bets = state.bet_feed.snapshot(10)
     
     return {
         "total_users": total_users,
@@ -1075,20 +1064,84 @@ async def get_admin_stats(admin_user: User = Depends(get_admin_user)):
         "recent_bets": recent_bets
     }
 
+@api_router.get("/admin/players")
+async def search_players(username: Optional[str] = None, email: Optional[str] = None,
+                         min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                         created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                         sort: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50,
+                         admin_user: User = Depends(get_admin_user), state: AppState = Depends(get_state)):
+    """Search players by username/email prefix, balance and signup date; page with next_cursor"""
+    try:
+        return await player_search.search_players(
+            state.data_access, limit=limit, username=username, email=email, min_balance=min_balance,
+            max_balance=max_balance, created_from=created_from, created_to=created_to, sort=sort, cursor=cursor
+        )
+    except player_search.InvalidSearch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/admin/archive/bets")
+async def query_archived_bets(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                              game_type: Optional[str] = None, user_id: Optional[str] = None,
+                              limit: int = 100, admin_user: User = Depends(get_admin_user),
+                              state: AppState = Depends(get_state)):
+    """Query bets moved to the archive tier; day and game partitions outside the filters are skipped"""
+    if limit < 1 or limit > 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    archive_window(start, end)
+    game_types = [game_type] if game_type else None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, lambda: state.bet_archive.query(start, end, game_types, user_id, limit=limit)
+    )
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(limit: int = 50, admin_user: User = Depends(get_admin_user),
+                           state: AppState = Depends(get_state)):
+    """Get slowest MongoDB query shapes with counts, latency and explain summaries"""
+    return {
+        "threshold_ms": state.slow_query_monitor.threshold_ms,
+        "queries": await state.slow_query_monitor.report(limit)
+    }
+
 @api_router.get("/")
 async def root():
     return {"message": "GameHub Pro API"}
 
-# Include router
-app.include_router(api_router)
+@root_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@api_router.get("/health")
+async def health(request: Request):
+    """Report ready only after the lifespan warm start has finished"""
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Starting")
+    return {"status": "ready"}
+
+def cache_warmth(state: AppState) -> Dict[str, Any]:
+    """How much of the app's caches the warm start filled"""
+    loaded_at = state.game_settings_loaded_at
+    return {
+        "game_configs": len(state.game_settings),
+        "game_configs_age_seconds": round(time.monotonic() - loaded_at, 1) if loaded_at else None,
+        "mines_multipliers": calculate_mines_multiplier.cache_info().currsize,
+        "bet_feed": len(state.bet_feed),
+        "leaderboard_workers": state.leaderboard.worker_count
+    }
+
+@root_router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker is serving requests (no dependency checks)"""
+    return {"status": "alive"}
+
+@root_router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request, state: AppState = Depends(get_state)):
+    """Readiness: warm start finished and MongoDB answering; 503 takes the worker out of rotation"""
+    if not getattr(request.app.state, "ready", False) or state.readiness is None:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    report = await state.readiness.check()
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
 
 # Configure logging
 logging.basicConfig(
@@ -1097,6 +1150,131 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+def create_mongo_client(settings: Settings, slow_query_monitor: SlowQueryMonitor) -> AsyncIOMotorClient:
+    """Open the per-worker Motor client with explicit pool and compression settings"""
+    return AsyncIOMotorClient(
+        settings.mongo_url,
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        compressors=",".join(settings.mongo_compressors),
+        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+        event_listeners=[MongoCommandMetrics(), MongoPoolMetrics(), MongoTracingListener(), slow_query_monitor]
+    )
+
+async def warm_mongo_pool(db, settings: Settings):
+    """Open minPoolSize connections up front so the first requests don't pay for the handshakes"""
+    await db.command("ping")
+    await asyncio.gather(*(db.command("ping") for _ in range(settings.mongo_min_pool_size)))
+
+def preload_multiplier_tables(grid_size: int = 25, house_edge: float = 0.01):
+    """Fill the mines multiplier cache for every mines/revealed combination"""
+    for mines in range(1, grid_size):
+        for revealed in range(grid_size - mines + 1):
+            calculate_mines_multiplier(revealed, mines, grid_size, house_edge)
+
+async def query_timeout_handler(request: Request, exc: ExecutionTimeout):
+    """A query class exceeded its maxTimeMS budget"""
+    logger.warning(f"Query time budget exceeded on {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=503, content={"detail": "Query exceeded its time budget, try again later"})
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build an isolated application; Mongo and caches are set up per worker in the lifespan"""
+    settings = settings or Settings.from_env()
+    state = AppState(settings)
+    span_exporter = get_span_exporter()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.ready = False
+        state.upload_dir.mkdir(exist_ok=True)
+
+        state.client = create_mongo_client(settings, state.slow_query_monitor)
+        db = state.db = state.client[settings.db_name]
+        state.data_access = DataAccess(db, settings.query_classes())
+        state.seed_pairs = SeedPairStore(db)
+        state.session_sweeper = MinesSessionSweeper(
+            timeout_seconds=settings.mines_session_timeout_seconds,
+            policy=settings.mines_sweep_policy,
+            interval=settings.mines_sweep_interval,
+            finished_ttl_seconds=settings.finished_session_ttl_seconds
+        )
+        await warm_mongo_pool(db, settings)
+        transactions = settings.settlement_transactions == "on" or (
+            settings.settlement_transactions == "auto" and await supports_transactions(db)
+        )
+        state.settlement_core = SettlementCore(
+            state.client, db,
+            transactions=transactions,
+            batch_window_ms=settings.settlement_batch_window_ms,
+            max_batch=settings.settlement_max_batch,
+            on_settled=partial(on_bet_settled, state)
+        )
+        logger.info(f"Settlement transactions {'enabled' if transactions else 'disabled'}")
+        readiness = state.readiness = ReadinessProbe()
+        readiness.add_check("mongo", mongo_ping(db), cache_seconds=settings.readiness_cache_seconds)
+        # Deposits degrade without MercadoPago but games keep working: report only
+        readiness.add_check("mercadopago", http_reachable(MERCADOPAGO_API_URL), gating=False,
+                            cache_seconds=settings.payment_probe_cache_seconds)
+        readiness.add_stats("mongo_pool", mongo_pool_stats)
+        readiness.add_stats("caches", partial(cache_warmth, state))
+        readiness.add_stats("settlement_queue", lambda: state.settlement_core.queue_depth)
+        await state.seed_pairs.ensure_indexes()
+        await db.bets.create_index([("u", 1), ("t", -1)])
+        await db.bets.create_index([("t", 1), ("_id", 1)])
+        await state.session_sweeper.ensure_indexes(db)
+        await player_search.ensure_indexes(db)
+        await withdrawal_review.ensure_indexes(db)
+        await withdrawal_review.replay_pending_refunds(db)
+        await state.bet_feed.seed(db)
+        await load_game_configs(state)
+        mines_settings = state.game_settings.get("mines", {})
+        preload_multiplier_tables(mines_settings.get("grid_size", 25), mines_settings.get("house_edge", 0.01))
+
+        loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+        state.slow_query_monitor.start(db)
+        state.session_sweeper.start(db, state.settlement_core)
+        state.leaderboard.start(db)
+        app.state.ready = True
+        logger.info("Worker ready")
+        try:
+            yield
+        finally:
+            app.state.ready = False
+            loop_lag_task.cancel()
+            state.slow_query_monitor.stop()
+            state.session_sweeper.stop()
+            await state.leaderboard.stop()
+            state.client.close()
+            state.image_service.shutdown()
+            state.verification_service.shutdown()
+            state.rtp_simulator.shutdown()
+            if span_exporter:
+                span_exporter.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.services = state
+    app.add_exception_handler(ExecutionTimeout, query_timeout_handler)
+
+    # Serve uploaded files
+    app.mount("/uploads", get_upload_static_files(settings.upload_dir), name="uploads")
+
+    # Include routers
+    app.include_router(api_router)
+    app.include_router(root_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(
+        TracingMiddleware,
+        exporter=span_exporter,
+        sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+    )
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+app = create_app()
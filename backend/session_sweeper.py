@@ -0,0 +1,165 @@
+"""Sweeper for abandoned mines sessions.
+
+Stale active sessions are claimed in batches and settled like a live cashout
+or loss. Each claimed session goes through SettlementCore, not one bulk
+insert_many of bets: a session's bet, wallet credit, stats and session close
+then commit together, guarded on the claim. A partial batch failure can't
+leave a bet stored without its payout (or the reverse). The settlements of a
+batch run concurrently, and with a group-commit window they share
+transactions, so a sweep still costs a few round trips per batch.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from settlement import SessionConflict, Settlement
+
+logger = logging.getLogger(__name__)
+
+SWEEP_POLICIES = ("forfeit", "cashout")
+# Claimed by a sweeper but not yet settled
+EXPIRING = "expiring"
+# A claim older than this belongs to a sweeper that died
+CLAIM_TIMEOUT_SECONDS = 600
+
+def expired_session_bet(session: Dict[str, Any], policy: str, settled_at: datetime) -> Dict[str, Any]:
+    """Bet for an abandoned mines session; the bet id is the session id so re-settling is idempotent"""
+    cashout = policy == "cashout"
+    multiplier = session.get("current_multiplier", 1.0) if cashout else 0
+    game_data = {
+        "mines_count": session["mines_count"],
+        "grid_size": session.get("grid_size", 25),
+        "house_edge": session.get("house_edge", 0.01),
+        "revealed_tiles": session["revealed_tiles"],
+        "expired": True
+    }
+    if cashout:
+        game_data["cashed_out"] = True
+    bet = {
+        "id": session["id"],
+        "user_id": session["user_id"],
+        "game_type": "mines",
+        "amount": session["amount"],
+        "multiplier": multiplier,
+        "result": "win" if cashout else "loss",
+        "payout": session["amount"] * multiplier,
+        "game_data": game_data,
+        "created_at": settled_at
+    }
+    bet.update({key: session[key] for key in ("seed_pair_id", "nonce", "seed_hash", "seed_reveal") if key in session})
+    return bet
+
+class MinesSessionSweeper:
+    """Settle mines sessions whose players walked away.
+
+    Active sessions older than the timeout are found through a partial index on
+    created_at and claimed with one update_many (so concurrent workers and a late
+    reveal/cashout never settle the same session twice). Each claimed session is
+    then settled through SettlementCore like a live cashout or loss: guarded on
+    its claim, with the bet, payout and stats in one transaction when available.
+    Finished sessions get finished_at and are removed by a TTL index.
+    """
+
+    def __init__(self, timeout_seconds: float = 3600.0, policy: str = "forfeit", interval: float = 60.0,
+                 batch_size: int = 500, finished_ttl_seconds: int = 86400, max_backoff_seconds: float = 900.0):
+        if policy not in SWEEP_POLICIES:
+            raise ValueError(f"Unknown mines sweep policy {policy!r} (expected one of {SWEEP_POLICIES})")
+        self.timeout_seconds = timeout_seconds
+        self.policy = policy
+        self.interval = interval
+        self.batch_size = batch_size
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.db = None
+        self.settlement_core = None
+
+    async def ensure_indexes(self, db) -> None:
+        await db.game_sessions.create_index("id", unique=True)
+        await db.game_sessions.create_index([("user_id", 1), ("status", 1)])
+        await db.game_sessions.create_index(
+            "created_at", name="active_sessions_by_age", partialFilterExpression={"status": "active"}
+        )
+        await db.game_sessions.create_index("sweep_id", sparse=True)
+        await db.game_sessions.create_index("finished_at", expireAfterSeconds=self.finished_ttl_seconds)
+
+    def start(self, db, settlement_core) -> None:
+        self.db = db
+        self.settlement_core = settlement_core
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                stats = await self.sweep()
+                if stats["settled"]:
+                    logger.info(f"Settled {stats['settled']} abandoned mines sessions ({self.policy}), "
+                                f"credited {stats['credited']:.2f}")
+                failures = 0
+            except Exception:
+                # Never let one bad sweep end the task; retry later with backoff
+                failures += 1
+                logger.exception(f"Error sweeping mines sessions (attempt {failures})")
+            delay = self.interval if not failures else min(self.interval * 2 ** failures, self.max_backoff_seconds)
+            await asyncio.sleep(delay)
+
+    async def sweep(self) -> Dict[str, Any]:
+        """Claim and settle every active session older than the timeout"""
+        now = datetime.utcnow()
+        totals = {"settled": 0, "credited": 0.0, "failed": 0}
+        # Sessions left claimed by a sweeper that died mid-settle are claimed again
+        queries = [
+            {"sweep_id": {"$exists": True}, "swept_at": {"$lt": now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)}},
+            {"status": "active", "created_at": {"$lt": now - timedelta(seconds=self.timeout_seconds)}}
+        ]
+        for query in queries:
+            while True:
+                stale = await self.db.game_sessions.find(query, {"_id": 0, "id": 1}).limit(self.batch_size).to_list(self.batch_size)
+                if not stale:
+                    break
+                sweep_id = str(uuid.uuid4())
+                await self.db.game_sessions.update_many(
+                    {**query, "id": {"$in": [session["id"] for session in stale]}},
+                    {"$set": {"status": EXPIRING, "sweep_id": sweep_id, "swept_at": datetime.utcnow()}}
+                )
+                stats = await self._settle(sweep_id)
+                for key in totals:
+                    totals[key] += stats[key]
+        return totals
+
+    async def _settle(self, sweep_id: str) -> Dict[str, Any]:
+        sessions = await self.db.game_sessions.find({"sweep_id": sweep_id}, {"_id": 0}).to_list(None)
+        now = datetime.utcnow()
+        final_status = "won" if self.policy == "cashout" else "expired"
+        settlements = []
+        for session in sessions:
+            bet = expired_session_bet(session, self.policy, now)
+            settlements.append(Settlement(
+                user_id=session["user_id"], payout=bet["payout"], bet=bet,
+                # Guarded on this sweep's claim, so a session is settled at most once
+                session_filter={"id": session["id"], "sweep_id": sweep_id},
+                session_update={"$set": {"status": final_status, "finished_at": now},
+                                "$unset": {"sweep_id": "", "swept_at": ""}}
+            ))
+        results = await asyncio.gather(*(self.settlement_core.settle(settlement) for settlement in settlements),
+                                       return_exceptions=True)
+
+        stats = {"settled": 0, "credited": 0.0, "failed": 0}
+        for settlement, result in zip(settlements, results):
+            if isinstance(result, SessionConflict):
+                continue  # Claim taken over by another sweeper
+            if isinstance(result, BaseException):
+                # Stays claimed and is retried once the claim times out
+                stats["failed"] += 1
+                logger.error(f"Failed to settle abandoned mines session {settlement.bet['id']}: {result!r}")
+                continue
+            stats["settled"] += 1
+            stats["credited"] += settlement.payout
+        return stats
@@ -0,0 +1,99 @@
+import os
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from data_access import ANALYTICS, HISTORY, HOT_PATH, QueryClass
+
+class Settings(BaseModel):
+    """Per-worker application settings, read from the environment by default"""
+    mongo_url: str
+    db_name: str
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10
+    # First entry supported by both sides wins; snappy needs python-snappy installed
+    mongo_compressors: List[str] = ["zstd", "zlib"]
+    mongo_server_selection_timeout_ms: int = 5000
+    upload_dir: str = "uploads"
+    game_config_ttl: float = 30.0
+    # Read routing per query class (see data_access.py)
+    hot_path_max_time_ms: int = 5000
+    history_read_preference: str = "secondaryPreferred"
+    history_read_concern: Optional[str] = None
+    history_max_time_ms: int = 5000
+    analytics_read_preference: str = "secondaryPreferred"
+    analytics_read_concern: Optional[str] = None
+    analytics_max_time_ms: int = 30000
+    # Must be -1 (no limit) or at least 90 seconds
+    max_staleness_seconds: int = -1
+    # Parquet tier for bets older than the horizon (see bet_archive.py)
+    archive_dir: str = "archive"
+    archive_horizon_days: int = 90
+    # Abandoned mines sessions (see session_sweeper.py); policy is forfeit or cashout
+    mines_session_timeout_seconds: float = 3600.0
+    mines_sweep_policy: str = "forfeit"
+    mines_sweep_interval: float = 60.0
+    finished_session_ttl_seconds: int = 86400
+    # Settlement transactions: auto (when the deployment supports them), on or off;
+    # a batch window > 0 group-commits concurrent settlements (see settlement.py)
+    settlement_transactions: str = "auto"
+    settlement_batch_window_ms: float = 0.0
+    settlement_max_batch: int = 64
+    # /readyz caches each probe result: Mongo ping and MercadoPago reachability
+    readiness_cache_seconds: float = 2.0
+    payment_probe_cache_seconds: float = 30.0
+    # In-memory leaderboard entries per board and live feed length
+    leaderboard_size: int = 10
+    bet_feed_size: int = 100
+    # Process pools per app; None uses every core
+    image_workers: Optional[int] = None
+    verify_workers: Optional[int] = None
+    sim_workers: Optional[int] = None
+    sim_dry_run_rounds: int = 1_000_000
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            mongo_url=os.environ["MONGO_URL"],
+            db_name=os.environ["DB_NAME"],
+            mongo_max_pool_size=int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+            mongo_min_pool_size=int(os.environ.get("MONGO_MIN_POOL_SIZE", "10")),
+            mongo_compressors=[c.strip() for c in os.environ.get("MONGO_COMPRESSORS", "zstd,zlib").split(",") if c.strip()],
+            mongo_server_selection_timeout_ms=int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            upload_dir=os.environ.get("UPLOAD_DIR", "uploads"),
+            game_config_ttl=float(os.environ.get("GAME_CONFIG_TTL", "30")),
+            hot_path_max_time_ms=int(os.environ.get("HOT_PATH_MAX_TIME_MS", "5000")),
+            history_read_preference=os.environ.get("HISTORY_READ_PREFERENCE", "secondaryPreferred"),
+            history_read_concern=os.environ.get("HISTORY_READ_CONCERN") or None,
+            history_max_time_ms=int(os.environ.get("HISTORY_MAX_TIME_MS", "5000")),
+            analytics_read_preference=os.environ.get("ANALYTICS_READ_PREFERENCE", "secondaryPreferred"),
+            analytics_read_concern=os.environ.get("ANALYTICS_READ_CONCERN") or None,
+            analytics_max_time_ms=int(os.environ.get("ANALYTICS_MAX_TIME_MS", "30000")),
+            max_staleness_seconds=int(os.environ.get("MAX_STALENESS_SECONDS", "-1")),
+            archive_dir=os.environ.get("ARCHIVE_DIR", "archive"),
+            archive_horizon_days=int(os.environ.get("ARCHIVE_HORIZON_DAYS", "90")),
+            mines_session_timeout_seconds=float(os.environ.get("MINES_SESSION_TIMEOUT_SECONDS", "3600")),
+            mines_sweep_policy=os.environ.get("MINES_SWEEP_POLICY", "forfeit"),
+            mines_sweep_interval=float(os.environ.get("MINES_SWEEP_INTERVAL", "60")),
+            finished_session_ttl_seconds=int(os.environ.get("FINISHED_SESSION_TTL_SECONDS", "86400")),
+            settlement_transactions=os.environ.get("SETTLEMENT_TRANSACTIONS", "auto"),
+            settlement_batch_window_ms=float(os.environ.get("SETTLEMENT_BATCH_WINDOW_MS", "0")),
+            settlement_max_batch=int(os.environ.get("SETTLEMENT_MAX_BATCH", "64")),
+            readiness_cache_seconds=float(os.environ.get("READINESS_CACHE_SECONDS", "2")),
+            payment_probe_cache_seconds=float(os.environ.get("PAYMENT_PROBE_CACHE_SECONDS", "30")),
+            leaderboard_size=int(os.environ.get("LEADERBOARD_SIZE", "10")),
+            bet_feed_size=int(os.environ.get("BET_FEED_SIZE", "100")),
+            image_workers=int(os.environ.get("IMAGE_WORKERS", "0")) or None,
+            verify_workers=int(os.environ.get("VERIFY_WORKERS", "0")) or None,
+            sim_workers=int(os.environ.get("SIM_WORKERS", "0")) or None,
+            sim_dry_run_rounds=int(os.environ.get("SIM_DRY_RUN_ROUNDS", "1000000"))
+        )
+
+    def query_classes(self) -> Dict[str, QueryClass]:
+        return {
+            HOT_PATH: QueryClass("primary", None, self.hot_path_max_time_ms),
+            HISTORY: QueryClass(self.history_read_preference, self.history_read_concern,
+                                self.history_max_time_ms, self.max_staleness_seconds),
+            ANALYTICS: QueryClass(self.analytics_read_preference, self.analytics_read_concern,
+                                  self.analytics_max_time_ms, self.max_staleness_seconds)
+        }
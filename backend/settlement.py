@@ -0,0 +1,219 @@
+"""Shared settlement core for every game.
+
+A game describes what a round changes as a Settlement: the stake to debit,
+the payout to credit, the bet to store and the game session writes, if any.
+SettlementCore applies it with one guarded wallet update that also bumps the
+player's stats, inside a multi-document transaction when the deployment
+supports them (replica set or sharded cluster). With a group-commit window,
+settlements from concurrent requests share one transaction.
+"""
+import asyncio
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from bet_codec import InvalidBet, encode_bet, round_money
+from metrics import record_bet_settlement
+from player_stats import merge_updates, stats_update
+
+logger = logging.getLogger(__name__)
+
+class SettlementError(Exception):
+    status_code = 400
+
+class InsufficientBalance(SettlementError):
+    def __init__(self):
+        super().__init__("Insufficient balance")
+
+class SessionConflict(SettlementError):
+    status_code = 409
+
+    def __init__(self):
+        super().__init__("Game session already settled")
+
+@dataclass
+class Settlement:
+    """Everything one game action writes.
+
+    Each settlement has at most one guarded write and it runs first: the
+    balance check when there is a stake, otherwise the game session filter.
+    A failed guard therefore leaves nothing half-written, even inside a
+    shared group-commit transaction.
+    """
+    user_id: str
+    stake: float = 0.0
+    payout: float = 0.0
+    bet: Optional[Dict[str, Any]] = None
+    username: Optional[str] = None
+    session_insert: Optional[Dict[str, Any]] = None
+    # Update that must match an active session (e.g. {"id": ..., "status": "active"})
+    session_filter: Optional[Dict[str, Any]] = None
+    session_update: Optional[Dict[str, Any]] = None
+    # Storage document of the bet, encoded before anything is written
+    stored_bet: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.stake and self.session_filter:
+            raise ValueError("A settlement can guard the balance or a session, not both")
+        # The wallet $inc, the stats $inc and the stored bet all use whole minor units
+        self.stake = round_money(self.stake)
+        self.payout = round_money(self.payout)
+        if self.bet:
+            self.bet["amount"] = round_money(self.bet["amount"])
+            self.bet["payout"] = round_money(self.bet["payout"])
+
+def _resolve(future: asyncio.Future, ok: bool, value: Any) -> None:
+    # The request may have been cancelled (client disconnect) while waiting
+    if future.done():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+async def supports_transactions(db) -> bool:
+    """Multi-document transactions need a replica set or mongos"""
+    try:
+        hello = await db.command("hello")
+    except PyMongoError:
+        return False
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+class SettlementCore:
+    def __init__(self, client, db, transactions: bool = False, batch_window_ms: float = 0.0,
+                 max_batch: int = 64, on_settled: Optional[Callable[[Dict[str, Any], Optional[str]], None]] = None):
+        self.client = client
+        self.db = db
+        self.transactions = transactions
+        # Group commit only applies with transactions
+        self.batch_window = batch_window_ms / 1000 if transactions else 0.0
+        self.max_batch = max_batch
+        self.on_settled = on_settled
+        self._pending: List[Tuple[Settlement, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> Dict[str, int]:
+        """Settlements being written and, with group commit, waiting for the next batch"""
+        return {"in_flight": self._in_flight, "batched": len(self._pending)}
+
+    async def settle(self, settlement: Settlement) -> Optional[float]:
+        """Apply a settlement and return the new balance (None when the wallet is untouched)"""
+        if not (math.isfinite(settlement.stake) and math.isfinite(settlement.payout)):
+            raise SettlementError("Invalid amount")
+        if settlement.bet and settlement.stored_bet is None:
+            try:
+                settlement.stored_bet = encode_bet(settlement.bet)
+            except InvalidBet as e:
+                # Refused before any write: nothing to roll back
+                raise SettlementError(str(e))
+        self._in_flight += 1
+        try:
+            if self.batch_window:
+                return await self._enqueue(settlement)
+            if self.transactions:
+                async with await self.client.start_session() as session:
+                    new_balance = await session.with_transaction(lambda s: self._apply(settlement, s))
+            else:
+                new_balance = await self._apply(settlement)
+        finally:
+            self._in_flight -= 1
+        self._after_commit(settlement)
+        return new_balance
+
+    async def _apply(self, settlement: Settlement, session=None) -> Optional[float]:
+        if settlement.session_filter is not None:
+            updated = await self.db.game_sessions.update_one(
+                settlement.session_filter, settlement.session_update, session=session
+            )
+            if not updated.matched_count:
+                raise SessionConflict()
+
+        new_balance = None
+        bet = settlement.bet
+        if settlement.stake or settlement.payout or bet:
+            update = {"$inc": {"balance": settlement.payout - settlement.stake}}
+            if bet:
+                # since is the bet's own timestamp: the backfill counts bets strictly before it
+                update = merge_updates(update, stats_update(bet["game_type"], bet["amount"], bet["payout"],
+                                                            bet["result"], settled_at=bet.get("created_at")))
+            query = {"id": settlement.user_id}
+            if settlement.stake:
+                query["balance"] = {"$gte": settlement.stake}
+            user = await self.db.users.find_one_and_update(
+                query, update, projection={"_id": 0, "balance": 1},
+                return_document=ReturnDocument.AFTER, session=session
+            )
+            if user is None:
+                raise InsufficientBalance()
+            new_balance = user["balance"]
+
+        if settlement.session_insert is not None:
+            await self.db.game_sessions.insert_one(dict(settlement.session_insert), session=session)
+        if bet:
+            await self.db.bets.insert_one(dict(settlement.stored_bet), session=session)
+        return new_balance
+
+    def _after_commit(self, settlement: Settlement) -> None:
+        bet = settlement.bet
+        if bet:
+            record_bet_settlement(bet["game_type"], bet["result"], bet["amount"], bet["payout"])
+            if self.on_settled is not None:
+                self.on_settled(bet, settlement.username)
+
+    # Group commit
+    async def _enqueue(self, settlement: Settlement) -> Optional[float]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((settlement, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.create_task(self._commit(batch))
+
+    async def _commit(self, batch: List[Tuple[Settlement, asyncio.Future]]) -> None:
+        """Apply a batch in one transaction; guard failures only fail their own settlement"""
+        outcomes: List[Tuple[bool, Any]] = []
+
+        async def apply_all(session):
+            outcomes.clear()  # with_transaction may retry the whole callback
+            for settlement, _ in batch:
+                try:
+                    outcomes.append((True, await self._apply(settlement, session)))
+                except SettlementError as e:
+                    outcomes.append((False, e))
+
+        try:
+            async with await self.client.start_session() as session:
+                await session.with_transaction(apply_all)
+        except Exception as e:
+            # Don't let one bad settlement fail the others: retry each on its own
+            logger.warning(f"Group commit of {len(batch)} settlements failed, retrying individually: {str(e)}")
+            for settlement, future in batch:
+                try:
+                    async with await self.client.start_session() as session:
+                        result = await session.with_transaction(lambda s: self._apply(settlement, s))
+                except Exception as error:
+                    _resolve(future, False, error)
+                else:
+                    self._after_commit(settlement)
+                    _resolve(future, True, result)
+            return
+
+        for (settlement, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                self._after_commit(settlement)
+            _resolve(future, ok, value)
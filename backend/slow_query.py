@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+# Commands whose shape we can describe and explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Driver-added fields that are not part of the query itself
+SESSION_FIELDS = {"$db", "lsid", "$clusterTime", "txnNumber", "autocommit", "startTransaction",
+                  "$readPreference", "readConcern", "writeConcern", "signature"}
+
+def normalize_shape(value: Any) -> Any:
+    """Replace literal values with '?' while keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Arrays of sub-documents ($or, $and, pipelines) keep their structure
+        if value and all(isinstance(item, dict) for item in value):
+            return [normalize_shape(item) for item in value]
+        return "?"
+    return "?"
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the normalized query shape of a command"""
+    shape = {"op": command_name}
+    if command_name in ("find", "count", "distinct"):
+        shape["filter"] = normalize_shape(command.get("filter", command.get("query", {})))
+        if "sort" in command:
+            shape["sort"] = dict(command["sort"])
+    elif command_name == "aggregate":
+        shape["pipeline"] = normalize_shape(command.get("pipeline", []))
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        shape["filter"] = normalize_shape(statements[0].get("q", {})) if statements else {}
+    elif command_name == "findAndModify":
+        shape["filter"] = normalize_shape(command.get("query", {}))
+        if "sort" in command:
+            shape["sort"] = dict(command["sort"])
+    return shape
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the parts of explain('executionStats') that matter for a slow query"""
+    stats = explain.get("executionStats", {})
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = []
+    stage = winning_plan.get("queryPlan", winning_plan)
+    while stage:
+        stages.append(stage.get("stage"))
+        if stage.get("indexName"):
+            stages[-1] = f"{stage['stage']}({stage['indexName']})"
+        stage = stage.get("inputStage")
+    return {
+        "plan": " <- ".join(item for item in stages if item),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis")
+    }
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """Flag Mongo commands slower than a threshold and record their query shapes.
+
+    Listener callbacks run on Motor's executor threads and only hand slow
+    commands to a queue; a background task aggregates them per shape, runs a
+    rate-limited explain per shape and appends the results to a capped
+    collection.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, explain_interval: float = 600.0,
+                 flush_interval: float = 10.0):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.flush_interval = flush_interval
+        self._commands: Dict[int, tuple] = {}
+        self._slow: queue.SimpleQueue = queue.SimpleQueue()
+        self._last_explained: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.db = None
+
+    # Listener callbacks (executor threads)
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if collection == SLOW_QUERY_COLLECTION:
+            return
+        self._commands[event.request_id] = (event.database_name, collection, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event)
+
+    def _finish(self, event) -> None:
+        entry = self._commands.pop(event.request_id, None)
+        if entry is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= self.threshold_ms:
+            self._slow.put((entry, event.command_name, duration_ms))
+
+    # Background flushing (event loop)
+    def start(self, db) -> None:
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            await self.db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=16 * 1024 * 1024, max=50000)
+        except CollectionInvalid:
+            pass  # Already exists
+        except Exception as e:
+            logger.error(f"Error creating slow query log collection: {str(e)}")
+
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error writing slow query log: {str(e)}")
+
+    async def flush(self) -> None:
+        shapes: Dict[str, Dict[str, Any]] = {}
+        while True:
+            try:
+                (database, collection, command), command_name, duration_ms = self._slow.get_nowait()
+            except queue.Empty:
+                break
+
+            shape = command_shape(command_name, command)
+            shape_hash = hashlib.sha1(f"{database}.{collection}:{json.dumps(shape, sort_keys=True)}".encode()).hexdigest()
+            record = shapes.get(shape_hash)
+            if record is None:
+                record = shapes[shape_hash] = {
+                    "shape_hash": shape_hash,
+                    "namespace": f"{database}.{collection}",
+                    "shape": json.dumps(shape, sort_keys=True),
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "command": command
+                }
+            record["count"] += 1
+            record["total_ms"] += duration_ms
+            record["max_ms"] = max(record["max_ms"], duration_ms)
+
+        if not shapes:
+            return
+
+        now = datetime.utcnow()
+        for record in shapes.values():
+            command = record.pop("command")
+            record["recorded_at"] = now
+            explain = await self._maybe_explain(record["shape_hash"], command)
+            if explain:
+                record["explain"] = explain
+        await self.db[SLOW_QUERY_COLLECTION].insert_many(list(shapes.values()))
+
+    async def _maybe_explain(self, shape_hash: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        last = self._last_explained.get(shape_hash)
+        if last is not None and time.monotonic() - last < self.explain_interval:
+            return None
+        self._last_explained[shape_hash] = time.monotonic()
+
+        explain_target = {key: value for key, value in command.items() if key not in SESSION_FIELDS}
+        # explain only accepts a single write statement
+        for statements in ("updates", "deletes"):
+            if statements in explain_target:
+                explain_target[statements] = list(explain_target[statements])[:1]
+        try:
+            result = await self.db.command({"explain": explain_target, "verbosity": "executionStats"})
+        except PyMongoError as e:
+            logger.warning(f"Explain failed for slow query shape {shape_hash}: {str(e)}")
+            return None
+        return summarize_explain(result)
+
+    async def report(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Aggregate logged slow query shapes, slowest first"""
+        pipeline = [
+            {"$sort": {"recorded_at": 1}},
+            {"$group": {
+                "_id": "$shape_hash",
+                "namespace": {"$first": "$namespace"},
+                "shape": {"$first": "$shape"},
+                "count": {"$sum": "$count"},
+                "total_ms": {"$sum": "$total_ms"},
+                "max_ms": {"$max": "$max_ms"},
+                "last_seen": {"$last": "$recorded_at"},
+                "explain": {"$mergeObjects": "$explain"}  # Latest explain wins
+            }},
+            {"$sort": {"max_ms": -1}},
+            {"$limit": limit}
+        ]
+        rows = await self.db[SLOW_QUERY_COLLECTION].aggregate(pipeline).to_list(limit)
+        for row in rows:
+            row["shape_hash"] = row.pop("_id")
+            row["shape"] = json.loads(row["shape"])
+            row["avg_ms"] = round(row["total_ms"] / row["count"], 3)
+        return rows
+
+# Utility functions
+def get_slow_query_monitor() -> SlowQueryMonitor:
+    """Build the slow query monitor from SLOW_QUERY_MS / SLOW_QUERY_EXPLAIN_INTERVAL"""
+    return SlowQueryMonitor(
+        threshold_ms=float(os.environ.get("SLOW_QUERY_MS", "100")),
+        explain_interval=float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", "600"))
+    )
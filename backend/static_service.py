@@ -0,0 +1,108 @@
+import gzip
+import logging
+import mimetypes
+import os
+import stat
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+logger = logging.getLogger(__name__)
+
+# Upload filenames are UUIDs, so their content never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Precompressed siblings written by precompress_file (uploads themselves are
+# images, already compressed; the text-like files are the variant manifests)
+PRECOMPRESSED_ENCODINGS = [("gzip", ".gz")]
+
+COMPRESSIBLE_SUFFIXES = {".svg", ".json", ".txt", ".css", ".js"}
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles with immutable caching, precompressed siblings and optional X-Accel-Redirect"""
+
+    def __init__(self, *, accel_redirect_prefix: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.accel_redirect_prefix = accel_redirect_prefix
+
+    def _accepted_encodings(self, scope: Scope) -> Set[str]:
+        """Encodings the client accepts with a non-zero q-value ("*" covers unlisted ones)"""
+        qvalues: Dict[str, float] = {}
+        for part in Headers(scope=scope).get("accept-encoding", "").split(","):
+            coding, *params = [item.strip() for item in part.split(";")]
+            if not coding:
+                continue
+            q = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            qvalues[coding.lower()] = q
+        wildcard = qvalues.get("*", 0.0)
+        return {encoding for encoding, _ in PRECOMPRESSED_ENCODINGS if qvalues.get(encoding, wildcard) > 0}
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        if self.accel_redirect_prefix:
+            # nginx serves the bytes (and any .gz sibling via gzip_static) itself
+            return Response(headers={
+                "X-Accel-Redirect": self.accel_redirect_prefix + path,
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL
+            })
+
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        accepted = self._accepted_encodings(scope)
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            encoded_path, encoded_stat = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if encoded_stat and stat.S_ISREG(encoded_stat.st_mode):
+                response = FileResponse(encoded_path, stat_result=encoded_stat, media_type=media_type)
+                response.headers["Content-Encoding"] = encoding
+                return self._finalize(response, scope)
+
+        return self._finalize(FileResponse(full_path, stat_result=stat_result, media_type=media_type), scope)
+
+    def _finalize(self, response: FileResponse, scope: Scope) -> Response:
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+def precompress_file(file_path: Path) -> Optional[Path]:
+    """Write a .gz sibling for text-like uploads so they can be served precompressed"""
+    if file_path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+        return None
+
+    gz_path = file_path.with_name(file_path.name + ".gz")
+    data = file_path.read_bytes()
+    compressed = gzip.compress(data, compresslevel=9)
+    if len(compressed) >= len(data):
+        return None
+    gz_path.write_bytes(compressed)
+    return gz_path
+
+# Utility functions
+def get_upload_static_files(directory: str) -> UploadStaticFiles:
+    """Build the /uploads app, using X-Accel-Redirect when UPLOADS_ACCEL_REDIRECT is set"""
+    accel_redirect_prefix = os.environ.get("UPLOADS_ACCEL_REDIRECT") or None
+    if accel_redirect_prefix:
+        logger.info(f"Serving uploads via X-Accel-Redirect to {accel_redirect_prefix}")
+    # The directory is created by the app lifespan, after this is mounted
+    return UploadStaticFiles(directory=directory, accel_redirect_prefix=accel_redirect_prefix, check_dir=False)
@@ -0,0 +1,268 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Categories reported in the Server-Timing header
+SERVER_TIMING_CATEGORIES = ["db", "mercadopago", "bcrypt"]
+# Categories that are calls to another service (OTLP span kind CLIENT)
+CLIENT_CATEGORIES = {"db", "mercadopago"}
+
+class Span:
+    __slots__ = ("name", "category", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, category: str, parent_id: Optional[str], attributes: Dict[str, Any] = None):
+        self.name = name
+        self.category = category
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error = False
+
+    def finish(self, duration_ns: Optional[int] = None) -> None:
+        self.end_ns = self.start_ns + duration_ns if duration_ns is not None else time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+class Trace:
+    """All spans recorded while serving one request"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.root = Span(name, "request", parent_id)
+        self.spans: List[Span] = []
+        self.totals_ms: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def close(self, span: Span) -> None:
+        self.totals_ms[span.category] = self.totals_ms.get(span.category, 0.0) + span.duration_ms
+        self.counts[span.category] = self.counts.get(span.category, 0) + 1
+
+    def server_timing(self) -> str:
+        entries = []
+        for category in SERVER_TIMING_CATEGORIES:
+            if category in self.totals_ms:
+                entries.append(f'{category};dur={self.totals_ms[category]:.2f};desc="{self.counts[category]} calls"')
+        entries.append(f"total;dur={self.root.duration_ms:.2f}")
+        return ", ".join(entries)
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, category: str, **attributes):
+    """Record a child span of the current request, if any"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    child = Span(name, category, trace.root.span_id, attributes)
+    trace.add(child)
+    try:
+        yield child
+    except BaseException:
+        child.error = True
+        raise
+    finally:
+        child.finish()
+        trace.close(child)
+
+def traced(category: str, name: Optional[str] = None):
+    """Decorator recording each call of a sync or async function as a span"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class MongoTracingListener(monitoring.CommandListener):
+    """Attach every Mongo command to the current request trace.
+
+    Motor runs pymongo on executor threads with a copy of the caller's
+    context, so the request trace is visible from these callbacks.
+    """
+
+    def __init__(self):
+        self._spans: Dict[int, tuple] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        collection = event.command.get(event.command_name)
+        child = Span(f"mongo.{event.command_name}", "db", trace.root.span_id, {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+            "db.mongodb.collection": collection if isinstance(collection, str) else ""
+        })
+        trace.add(child)
+        self._spans[event.request_id] = (trace, child)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        entry = self._spans.pop(event.request_id, None)
+        if entry:
+            trace, child = entry
+            child.finish(event.duration_micros * 1000)
+            trace.close(child)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        entry = self._spans.pop(event.request_id, None)
+        if entry:
+            trace, child = entry
+            child.error = True
+            child.finish(event.duration_micros * 1000)
+            trace.close(child)
+
+class FileSpanExporter:
+    """Append finished traces as OTLP/JSON lines, readable by the OpenTelemetry
+    Collector's otlpjsonfile receiver. Writes happen on a background thread."""
+
+    def __init__(self, path: str, service_name: str = "gamehub-backend"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace) -> None:
+        self._queue.put(trace)
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        with open(self.path, "a", buffering=1) as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    f.write(json.dumps(self._encode(trace)) + "\n")
+                except Exception as e:
+                    logger.error(f"Error exporting trace: {str(e)}")
+
+    def _span_kind(self, trace: Trace, item: Span) -> int:
+        if item is trace.root:
+            return 2  # SERVER
+        return 3 if item.category in CLIENT_CATEGORIES else 1  # CLIENT / INTERNAL
+
+    def _encode_span(self, trace: Trace, item: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": trace.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": self._span_kind(trace, item),
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns or item.start_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in dict(item.attributes, category=item.category).items()
+            ],
+            "status": {"code": 2 if item.error else 0}
+        }
+        if item.parent_id:
+            encoded["parentSpanId"] = item.parent_id
+        return encoded
+
+    def _encode(self, trace: Trace) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "gamehub.tracing"},
+                    "spans": [self._encode_span(trace, item) for item in [trace.root] + trace.spans]
+                }]
+            }]
+        }
+
+def _parse_traceparent(value: str):
+    """Return (trace_id, parent_span_id) from a W3C traceparent header"""
+    parts = value.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+class TracingMiddleware:
+    """ASGI middleware opening a request trace and adding a Server-Timing header"""
+
+    def __init__(self, app, exporter: Optional[FileSpanExporter] = None, sample_rate: float = 1.0):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                trace_id, parent_id = _parse_traceparent(value.decode("latin-1"))
+                break
+
+        trace = Trace(f"{scope['method']} {scope['path']}", trace_id, parent_id)
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.root.finish()
+            route = scope.get("route")
+            if route is not None:
+                trace.root.name = f"{scope['method']} {route.path}"
+            if self.exporter is not None and random.random() < self.sample_rate:
+                self.exporter.export(trace)
+
+# Utility functions
+def get_span_exporter() -> Optional[FileSpanExporter]:
+    """Build the file exporter when TRACE_EXPORT_FILE is configured"""
+    path = os.environ.get("TRACE_EXPORT_FILE")
+    if not path:
+        return None
+    return FileSpanExporter(path, os.environ.get("TRACE_SERVICE_NAME", "gamehub-backend"))
@@ -0,0 +1,325 @@
+"""Provably fair verification engine.
+
+Recomputes dice rolls, mines layouts and crash points from revealed seeds and
+checks them against stored bets. Bets on a seed pair need the revealed pair
+attached as bet["seed_pair"]; until the pair is rotated they count as pending.
+The same engine backs the single-bet verify endpoint, bulk verification in a
+process pool and the offline CLI (export files and/or the bet archive):
+
+    python verification.py bets.jsonl --seed-pairs seed_pairs.jsonl --workers 8
+    python verification.py --archive archive --start 2024-01-01 --seed-pairs seed_pairs.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from bet_codec import bet_seed_pair_id, decode_bet, round_money
+from provably_fair import (
+    calculate_mines_multiplier, derive_round_seed, dice_multiplier, generate_crash_multiplier,
+    generate_mines_grid, hash_seed, roll_dice
+)
+
+# Bet fields not needed for verification (compact and legacy keys)
+BET_PROJECTION = {"t": 0, "created_at": 0}
+DEFAULT_CHUNK_SIZE = 2000
+# Cap on mismatches returned in a report; counts are always complete
+MAX_REPORTED_MISMATCHES = 1000
+
+def _close(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-9)
+
+class _Check:
+    def __init__(self):
+        self.mismatches: List[Dict[str, Any]] = []
+
+    def expect(self, field: str, stored, expected, equal: bool) -> None:
+        if not equal:
+            self.mismatches.append({"field": field, "stored": stored, "expected": expected})
+
+def _verify_dice(bet: Dict[str, Any], seed: str, check: _Check) -> Dict[str, Any]:
+    data = bet.get("game_data", {})
+    roll = roll_dice(seed)
+    check.expect("game_data.roll", data.get("roll"), roll, _close(data.get("roll"), roll))
+
+    target, over = data.get("target"), data.get("over", True)
+    win = (over and roll > target) or (not over and roll < target)
+    expected_result = "win" if win else "loss"
+    check.expect("result", bet.get("result"), expected_result, bet.get("result") == expected_result)
+
+    if win and "house_edge" in data:
+        # Bets from before the cap don't record max_multiplier
+        multiplier = dice_multiplier(target, over, data["house_edge"], data.get("max_multiplier"))
+        check.expect("multiplier", bet.get("multiplier"), multiplier, _close(bet.get("multiplier"), multiplier))
+    elif not win:
+        check.expect("multiplier", bet.get("multiplier"), 0, _close(bet.get("multiplier"), 0))
+    return {"roll": roll, "result": expected_result}
+
+def _verify_mines(bet: Dict[str, Any], seed: str, check: _Check) -> Dict[str, Any]:
+    data = bet.get("game_data", {})
+    grid_size = data.get("grid_size", 25)
+    mines = generate_mines_grid(data.get("mines_count", 0), seed, grid_size)
+    mine_set = set(mines)
+    revealed = list(data.get("revealed_tiles", []))
+
+    if data.get("hit_mine"):
+        # Every tile before the last must be safe; the last one must be a mine
+        safe, last = revealed[:-1], data.get("mine_position", revealed[-1] if revealed else None)
+        check.expect("game_data.mine_position", last, sorted(mine_set), last in mine_set)
+        check.expect("result", bet.get("result"), "loss", bet.get("result") == "loss")
+    elif data.get("expired") and not data.get("cashed_out"):
+        # Abandoned session forfeited by the sweeper
+        safe = revealed
+        check.expect("multiplier", bet.get("multiplier"), 0, _close(bet.get("multiplier"), 0))
+        check.expect("result", bet.get("result"), "loss", bet.get("result") == "loss")
+    else:
+        safe = revealed
+        multiplier = calculate_mines_multiplier(len(revealed), data.get("mines_count", 0), grid_size,
+                                                data.get("house_edge", 0.01))
+        check.expect("multiplier", bet.get("multiplier"), multiplier, _close(bet.get("multiplier"), multiplier))
+
+    hit = [tile for tile in safe if tile in mine_set]
+    check.expect("game_data.revealed_tiles", hit, [], not hit)
+    return {"mines_positions": mines}
+
+def _verify_crash(bet: Dict[str, Any], seed: str, check: _Check) -> Dict[str, Any]:
+    data = bet.get("game_data", {})
+    crash_point = generate_crash_multiplier(seed, data.get("house_edge", 0.01), data.get("max_multiplier", 10000.0))
+    check.expect("game_data.crash_point", data.get("crash_point"), crash_point,
+                 _close(data.get("crash_point"), crash_point))
+
+    auto_cash_out = data.get("auto_cash_out")
+    if auto_cash_out:
+        win = auto_cash_out <= crash_point
+        expected_result = "win" if win else "loss"
+        expected_multiplier = auto_cash_out if win else 0
+    else:
+        expected_result, expected_multiplier = "manual", 0
+    check.expect("result", bet.get("result"), expected_result, bet.get("result") == expected_result)
+    check.expect("multiplier", bet.get("multiplier"), expected_multiplier,
+                 _close(bet.get("multiplier"), expected_multiplier))
+    return {"crash_point": crash_point, "result": expected_result}
+
+GAME_VERIFIERS = {
+    "dice": _verify_dice,
+    "mines": _verify_mines,
+    "crash": _verify_crash
+}
+
+def verify_bet(bet: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute one bet from its revealed seed and list every field that disagrees"""
+    check = _Check()
+    report = {"bet_id": bet.get("id"), "game_type": bet.get("game_type")}
+    verifier = GAME_VERIFIERS.get(bet.get("game_type"))
+
+    if bet.get("seed_pair_id"):
+        pair = bet.get("seed_pair")
+        if not pair:
+            # Server seed still active (or unknown): nothing to check yet
+            report.update(verified=False, pending=True, mismatches=[])
+            return report
+        server_hash = hash_seed(pair["server_seed"])
+        check.expect("seed_pair.server_seed_hash", pair.get("server_seed_hash"), server_hash,
+                     pair.get("server_seed_hash") == server_hash)
+        seed = derive_round_seed(pair["server_seed"], pair["client_seed"], bet.get("nonce"))
+    else:
+        # Legacy bets carry their own seed
+        seed = bet.get("seed_reveal")
+        if seed:
+            check.expect("seed_hash", bet.get("seed_hash"), hash_seed(seed), bet.get("seed_hash") == hash_seed(seed))
+
+    if not seed:
+        check.expect("seed_reveal", None, "revealed seed", False)
+    elif verifier is None:
+        check.expect("game_type", bet.get("game_type"), sorted(GAME_VERIFIERS), False)
+    else:
+        report["recomputed"] = verifier(bet, seed, check)
+        payout = bet.get("amount", 0) * (bet.get("multiplier") or 0)
+        stored_payout = bet.get("payout") or 0
+        # Payouts are credited in minor units; legacy bets carry the exact product
+        check.expect("payout", bet.get("payout"), round_money(payout),
+                     _close(stored_payout, round_money(payout)) or _close(stored_payout, payout))
+
+    report["verified"] = not check.mismatches
+    report["mismatches"] = check.mismatches
+    return report
+
+def verify_chunk(bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Verify a batch of stored bets (runs in a worker process) and return a partial report"""
+    report = new_report()
+    for doc in bets:
+        pair = doc.pop("seed_pair", None)
+        bet = decode_bet(doc)
+        if pair is not None:
+            bet["seed_pair"] = pair
+        result = verify_bet(bet)
+        _add_result(report, result)
+    return report
+
+def new_report() -> Dict[str, Any]:
+    return {"checked": 0, "verified": 0, "failed": 0, "pending": 0, "by_game": {}, "mismatches": [], "truncated": False}
+
+def _add_result(report: Dict[str, Any], result: Dict[str, Any]) -> None:
+    report["checked"] += 1
+    game = report["by_game"].setdefault(result["game_type"] or "unknown", {"checked": 0, "failed": 0})
+    game["checked"] += 1
+    if result["verified"]:
+        report["verified"] += 1
+        return
+    if result.get("pending"):
+        report["pending"] += 1
+        return
+    report["failed"] += 1
+    game["failed"] += 1
+    if len(report["mismatches"]) < MAX_REPORTED_MISMATCHES:
+        report["mismatches"].append({key: result[key] for key in ("bet_id", "game_type", "mismatches")})
+    else:
+        report["truncated"] = True
+
+def merge_report(report: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    for key in ("checked", "verified", "failed", "pending"):
+        report[key] += partial[key]
+    for game_type, counts in partial["by_game"].items():
+        game = report["by_game"].setdefault(game_type, {"checked": 0, "failed": 0})
+        game["checked"] += counts["checked"]
+        game["failed"] += counts["failed"]
+    room = MAX_REPORTED_MISMATCHES - len(report["mismatches"])
+    report["mismatches"].extend(partial["mismatches"][:room])
+    report["truncated"] = report["truncated"] or partial["truncated"] or len(partial["mismatches"]) > room
+    return report
+
+def _chunks(bets: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for bet in bets:
+        chunk.append(bet)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class VerificationService:
+    """Bulk verification of streamed bets in a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def verify_cursor(self, cursor, prepare=None) -> Dict[str, Any]:
+        """Verify every bet from an async cursor, keeping at most two chunks per worker in flight.
+
+        prepare is an optional coroutine function run on each chunk before it is
+        submitted, e.g. to attach revealed seed pairs.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        report = new_report()
+        pending = set()
+        chunk = []
+
+        async def submit(bets):
+            if prepare is not None:
+                bets = await prepare(bets)
+            if len(pending) >= self.max_workers * 2:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    merge_report(report, future.result())
+            pending.add(loop.run_in_executor(executor, verify_chunk, bets))
+
+        async for bet in cursor:
+            chunk.append(bet)
+            if len(chunk) >= self.chunk_size:
+                await submit(chunk)
+                chunk = []
+        if chunk:
+            await submit(chunk)
+        for partial in await asyncio.gather(*pending):
+            merge_report(report, partial)
+        return report
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def verify_bets(bets: Iterable[Dict[str, Any]], max_workers: Optional[int] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Verify bets synchronously, fanning chunks out to worker processes"""
+    report = new_report()
+    if max_workers == 1:
+        for chunk in _chunks(bets, chunk_size):
+            merge_report(report, verify_chunk(chunk))
+        return report
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for partial in executor.map(verify_chunk, _chunks(bets, chunk_size)):
+            merge_report(report, partial)
+    return report
+
+def attach_seed_pairs(bets: Iterable[Dict[str, Any]], pairs: Dict[str, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for bet in bets:
+        seed_pair_id = bet_seed_pair_id(bet)
+        if seed_pair_id:
+            bet["seed_pair"] = pairs.get(seed_pair_id)
+        yield bet
+
+def read_export(path: str) -> Iterator[Dict[str, Any]]:
+    """Read bets from a JSON array or JSON-lines export (mongoexport extended JSON is accepted)"""
+    from bson import json_util
+
+    with (sys.stdin if path == "-" else open(path)) as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            yield from json_util.loads(first + f.read())
+            return
+        line = first + f.readline()
+        while line:
+            if line.strip():
+                yield json_util.loads(line)
+            line = f.readline()
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify provably fair bets from an export file")
+    parser.add_argument("export", nargs="?", help="JSON array or JSON-lines file of bets ('-' for stdin)")
+    parser.add_argument("--archive", default=None, help="Also verify bets from this archive directory")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="Archived bets from this date")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="Archived bets before this date")
+    parser.add_argument("--seed-pairs", default=None, help="Export of the seed_pairs collection")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+    if not args.export and not args.archive:
+        parser.error("provide an export file and/or --archive")
+
+    bets = read_export(args.export) if args.export else iter(())
+    if args.archive:
+        from bet_archive import BetArchive
+
+        bets = itertools.chain(bets, BetArchive(args.archive).iter_bets(args.start, args.end))
+    if args.seed_pairs:
+        bets = attach_seed_pairs(bets, {
+            pair["id"]: pair for pair in read_export(args.seed_pairs) if pair.get("status") == "revealed"
+        })
+    report = verify_bets(bets, max_workers=args.workers, chunk_size=args.chunk_size)
+    json.dump(report, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    sys.exit(1 if report["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Admin review of withdrawal requests, one or many at a time.
+
+A review claims every still-pending withdrawal in the batch with one
+update_many that stamps a review id (a request already reviewed by another
+admin no longer matches), reads back what it claimed, and for rejections
+refunds each player once with a grouped $inc in one bulk_write. With
+transactions the steps commit together. Without them, rejected rows carry
+refund_pending until their refund is applied; replay_pending_refunds() (run
+at startup) finishes refunds interrupted by a crash. Each refund $inc is
+guarded on the user's recent review ids, so a replay never credits twice.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+MAX_REVIEW_BATCH = 500
+# Review ids kept on a user to make refunds idempotent
+APPLIED_REFUNDS_KEPT = 50
+
+async def ensure_indexes(db) -> None:
+    indexes = await db.transactions.index_information()
+    if "id_1" in indexes and not indexes["id_1"].get("unique"):
+        # Replace the earlier non-unique index on id (another worker may already have)
+        try:
+            await db.transactions.drop_index("id_1")
+        except OperationFailure:
+            pass
+    await db.transactions.create_index("id", unique=True)
+    await db.transactions.create_index("refund_pending", sparse=True)
+
+async def _refund(db, claimed: List[Dict[str, Any]], session=None) -> None:
+    """One guarded $inc per (review, player) for rejected withdrawals, then clear refund_pending"""
+    refunds: Dict[Tuple[str, str], float] = {}
+    for transaction in claimed:
+        key = (transaction["metadata"]["review_id"], transaction["user_id"])
+        refunds[key] = refunds.get(key, 0.0) + transaction["amount"]
+    await db.users.bulk_write([
+        UpdateOne(
+            {"id": user_id, "refunds_applied": {"$ne": review_id}},
+            {"$inc": {"balance": amount},
+             "$push": {"refunds_applied": {"$each": [review_id], "$slice": -APPLIED_REFUNDS_KEPT}}}
+        )
+        for (review_id, user_id), amount in refunds.items()
+    ], ordered=False, session=session)
+    await db.transactions.update_many(
+        {"id": {"$in": [transaction["id"] for transaction in claimed]}},
+        {"$unset": {"refund_pending": ""}}, session=session
+    )
+
+async def _review(db, transaction_ids: List[str], approve: bool, admin_id: str, reason: Optional[str],
+                  session=None) -> List[Dict[str, Any]]:
+    review_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    if approve:
+        update = {"status": "completed", "metadata.approved_by": admin_id, "metadata.approved_at": now}
+    else:
+        update = {"status": "rejected", "metadata.rejected_by": admin_id, "metadata.rejected_at": now,
+                  "metadata.rejection_reason": reason, "refund_pending": True}
+    update["metadata.review_id"] = review_id
+
+    await db.transactions.update_many(
+        {"id": {"$in": transaction_ids}, "type": "withdrawal", "status": "pending"},
+        {"$set": update}, session=session
+    )
+    claimed = await db.transactions.find(
+        {"id": {"$in": transaction_ids}, "metadata.review_id": review_id},
+        {"_id": 0, "id": 1, "user_id": 1, "amount": 1, "metadata.review_id": 1}, session=session
+    ).to_list(None)
+
+    if not approve and claimed:
+        await _refund(db, claimed, session)
+    return claimed
+
+async def review_withdrawals(client, db, transaction_ids: List[str], approve: bool, admin_id: str,
+                             reason: Optional[str] = None, transactions: bool = False) -> Dict[str, Any]:
+    """Approve or reject pending withdrawals; returns the outcome of every requested id"""
+    transaction_ids = list(dict.fromkeys(transaction_ids))
+    if transactions:
+        async with await client.start_session() as session:
+            claimed = await session.with_transaction(
+                lambda s: _review(db, transaction_ids, approve, admin_id, reason, s)
+            )
+    else:
+        claimed = await _review(db, transaction_ids, approve, admin_id, reason)
+
+    by_id = {transaction["id"]: transaction for transaction in claimed}
+    # Ids that exist but were not claimed: already reviewed, or not a withdrawal
+    unclaimed = [transaction_id for transaction_id in transaction_ids if transaction_id not in by_id]
+    existing = {}
+    if unclaimed:
+        existing = {
+            transaction["id"]: transaction
+            for transaction in await db.transactions.find(
+                {"id": {"$in": unclaimed}}, {"_id": 0, "id": 1, "type": 1, "status": 1}
+            ).to_list(None)
+        }
+    status = "approved" if approve else "rejected"
+    results = []
+    for transaction_id in transaction_ids:
+        transaction = by_id.get(transaction_id)
+        if transaction_id in existing:
+            results.append({"id": transaction_id, "status": "not_pending", "type": existing[transaction_id]["type"],
+                            "current_status": existing[transaction_id]["status"]})
+        elif transaction is None:
+            results.append({"id": transaction_id, "status": "not_found"})
+        else:
+            results.append({"id": transaction_id, "status": status, "user_id": transaction["user_id"],
+                            "amount": transaction["amount"]})
+    return {
+        "results": results,
+        "processed": len(claimed),
+        "refunded": 0.0 if approve else round(sum(transaction["amount"] for transaction in claimed), 2)
+    }
+
+async def replay_pending_refunds(db) -> int:
+    """Apply refunds of rejected withdrawals left refund_pending by an interrupted review"""
+    pending = await db.transactions.find(
+        {"refund_pending": True, "status": "rejected"},
+        {"_id": 0, "id": 1, "user_id": 1, "amount": 1, "metadata.review_id": 1}
+    ).to_list(None)
+    if pending:
+        await _refund(db, pending)
+        logger.warning(f"Replayed {len(pending)} interrupted withdrawal refunds")
+    return len(pending)
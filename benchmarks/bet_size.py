@@ -0,0 +1,73 @@
+"""Storage size and codec cost of legacy vs compact bet documents.
+
+Builds a representative bet per game, encodes it both ways and reports the
+average BSON size and the encode/decode time per document.
+
+    python -m benchmarks.bet_size
+    python -m benchmarks.bet_size --count 5000
+"""
+import argparse
+import sys
+import timeit
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "backend"))
+
+from bson import encode  # noqa: E402
+
+from bet_codec import decode_bet, encode_bet  # noqa: E402
+
+def sample_bet(game_type: str, i: int) -> Dict[str, Any]:
+    game_data = {
+        "dice": {"target": 50.0, "over": True, "roll": (i * 37) % 10000 / 100, "house_edge": 0.01},
+        "mines": {"mines_count": 3, "grid_size": 25, "house_edge": 0.01, "revealed_tiles": [i % 25, (i + 7) % 25],
+                  "hit_mine": False, "cashed_out": True},
+        "crash": {"crash_point": 1 + i % 500 / 100, "auto_cash_out": 2.0, "manual_play": False,
+                  "house_edge": 0.01, "max_multiplier": 10000.0}
+    }[game_type]
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "game_type": game_type,
+        "amount": 10.0 + i % 100,
+        "multiplier": 1.98,
+        "result": "win",
+        "payout": round((10.0 + i % 100) * 1.98, 2),
+        "game_data": game_data,
+        "seed_pair_id": str(uuid.uuid4()),
+        "nonce": i,
+        "created_at": datetime(2024, 1, 1)
+    }
+
+def measure(bets: List[Dict[str, Any]]) -> Dict[str, float]:
+    encoded = [encode_bet(bet) for bet in bets]
+    # Legacy documents carried the bet dict as-is plus an ObjectId _id (12 bytes + key)
+    legacy_bytes = sum(len(encode(bet)) + 17 for bet in bets)
+    compact_bytes = sum(len(encode(doc)) for doc in encoded)
+    encode_s = min(timeit.repeat(lambda: [encode_bet(bet) for bet in bets], number=1, repeat=3))
+    decode_s = min(timeit.repeat(lambda: [decode_bet(doc) for doc in encoded], number=1, repeat=3))
+    return {
+        "legacy": legacy_bytes / len(bets),
+        "compact": compact_bytes / len(bets),
+        "encode_us": encode_s / len(bets) * 1e6,
+        "decode_us": decode_s / len(bets) * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="bets per game")
+    args = parser.parse_args()
+
+    print(f"{'game':<8}{'legacy B':>10}{'compact B':>11}{'saved':>8}{'encode us':>11}{'decode us':>11}")
+    for game_type in ("dice", "mines", "crash"):
+        result = measure([sample_bet(game_type, i) for i in range(args.count)])
+        saved = 1 - result["compact"] / result["legacy"]
+        print(f"{game_type:<8}{result['legacy']:>10.0f}{result['compact']:>11.0f}{saved:>8.0%}"
+              f"{result['encode_us']:>11.1f}{result['decode_us']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Single-core throughput and memory per request of the dice endpoint.
+
+Drives the real app (middleware, auth, rate limiter, settlement) directly over
+ASGI in one event loop, after running its lifespan warm start, against the
+in-memory mongomock-motor stand-in, and plays dice bets back to back from one
+player. No HTTP client or socket is involved, so the numbers are server-side
+work only. They include mongomock's own cost: compare runs on the same
+machine rather than against production.
+
+    python -m benchmarks.dice_endpoint
+    python -m benchmarks.dice_endpoint --requests 5000 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gamehub_bench")
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+os.chdir(tempfile.mkdtemp(prefix="gamehub-bench-"))  # server creates uploads/ in the cwd
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import server  # noqa: E402
+from settings import Settings  # noqa: E402
+
+PLAY = json.dumps({"target": 50.0, "amount": 1.0, "over": True}).encode()
+
+async def request(app, method: str, path: str, body: bytes = b"",
+                  token: Optional[str] = None) -> Tuple[int, bytes]:
+    """One ASGI HTTP request; returns status and body"""
+    headers = [(b"host", b"bench"), (b"content-type", b"application/json"),
+               (b"content-length", str(len(body)).encode())]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("bench", 80)
+    }
+    sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # No disconnect while the request is handled
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+async def prepare(app) -> str:
+    """Register the player and lift the per-user rate limit"""
+    status, body = await request(app, "POST", "/api/auth/register", json.dumps(
+        {"username": "bench", "email": "bench@example.com", "password": "bench"}).encode())
+    if status != 200:
+        raise RuntimeError(f"register failed: {status} {body!r}")
+    state = app.state.services
+    await state.db.users.update_one({"username": "bench"}, {"$set": {"balance": 1e12}})
+    await state.db.game_config.update_one(
+        {"game_type": "dice"},
+        {"$set": {"settings.rate_limit_per_second": 1e9, "settings.rate_limit_burst": 1e9,
+                  "settings.max_concurrent_requests": 1000}}
+    )
+    server.invalidate_game_configs(state)
+    return json.loads(body)["access_token"]
+
+async def play(app, token: str, count: int) -> None:
+    for _ in range(count):
+        status, body = await request(app, "POST", "/api/games/dice/play", PLAY, token)
+        if status != 200:
+            raise RuntimeError(f"dice play failed: {status} {body!r}")
+
+async def run(args) -> Dict[str, list]:
+    server.create_mongo_client = lambda settings, slow_query_monitor: AsyncMongoMockClient()
+    settings = Settings.from_env()
+    settings.mongo_min_pool_size = 0
+    settings.settlement_transactions = "off"
+    app = server.create_app(settings)
+
+    async with app.router.lifespan_context(app):
+        token = await prepare(app)
+        await play(app, token, 200)  # warm caches and code paths
+
+        rates = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            await play(app, token, args.requests)
+            rates.append(args.requests / (time.perf_counter() - started))
+
+        peaks = []
+        tracemalloc.start()
+        for _ in range(args.memory_requests):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await play(app, token, 1)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+    return {"rates": rates, "peaks": peaks}
+
+def main():
+    parser = argparse.ArgumentParser(description="Dice endpoint requests/s and memory per request")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per round")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds to take the median of")
+    parser.add_argument("--memory-requests", type=int, default=200, help="Requests traced for memory")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    rates, peaks = result["rates"], result["peaks"]
+    print(f"dice requests/s (single core): {statistics.median(rates):,.0f} "
+          f"(rounds: {', '.join(f'{rate:,.0f}' for rate in rates)})")
+    print(f"peak traced memory per request: {statistics.median(peaks) / 1024:,.1f} KiB (median)")
+
+if __name__ == "__main__":
+    main()
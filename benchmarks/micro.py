@@ -0,0 +1,165 @@
+"""Micro-benchmarks for the game math, fairness and auth primitives.
+
+Each benchmark is timed with timeit and normalized against a fixed pure-Python
+calibration loop, so baselines recorded on one machine stay comparable on
+another. A benchmark fails when its normalized cost exceeds the stored
+baseline by more than the threshold.
+
+    python -m benchmarks.micro                 # compare against baselines.json
+    python -m benchmarks.micro --update        # record new baselines
+    python -m benchmarks.micro -k mines        # run a subset
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+BASELINE_FILE = BENCH_DIR / "baselines.json"
+DEFAULT_THRESHOLD = 0.25
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gamehub_bench")
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+os.chdir(tempfile.mkdtemp(prefix="gamehub-bench-"))  # server creates uploads/ in the cwd
+
+import jwt  # noqa: E402
+import provably_fair  # noqa: E402
+import server  # noqa: E402
+from leaderboard import LeaderboardService  # noqa: E402
+
+SEED = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+USER_DOC = {
+    "_id": "652f0c0a9b1e8a3d4c5b6a79",
+    "id": "2c1f5d0e-8a7b-4c3d-9e2f-1a0b9c8d7e6f",
+    "username": "benchmark",
+    "email": "benchmark@example.com",
+    "hashed_password": "$2b$12$KIXQJ1z4p9mX0Q6o3bE8PeN0Jm8hY7v9uYtq1b2c3d4e5f6g7h8i9",
+    "balance": 1234.56,
+    "is_admin": False,
+    "created_at": datetime(2024, 1, 1)
+}
+TOKEN = server.create_access_token({"sub": "benchmark"}, expires_delta=timedelta(days=3650))
+
+def calibration():
+    total = 0
+    for i in range(1000):
+        total += i * i
+    return total
+
+def bench_bet_dict():
+    return server.Bet.new(
+        user_id=USER_DOC["id"],
+        game_type="dice",
+        amount=10.0,
+        multiplier=1.98,
+        result="win",
+        payout=19.8,
+        game_data={"target": 50.0, "over": True, "roll": 73.12},
+        seed_pair_id=USER_DOC["id"],
+        nonce=1234
+    ).to_doc()
+
+# A worker's boards after a busy day: 20k bets from 2k players
+LEADERBOARD = LeaderboardService(k=10)
+for i in range(20000):
+    LEADERBOARD.record({"id": str(i), "user_id": f"user-{i % 2000}", "game_type": ("dice", "mines", "crash")[i % 3],
+                        "amount": 1.0 + i % 50, "multiplier": 2.0, "result": "win" if i % 2 else "loss",
+                        "payout": (1.0 + i % 50) * 2, "created_at": datetime.utcnow()}, f"player-{i % 2000}")
+LEADERBOARD_BET = {"id": "bench", "user_id": "user-1", "game_type": "dice", "amount": 10.0, "multiplier": 1.98,
+                   "result": "win", "payout": 19.8, "created_at": datetime.utcnow()}
+
+BENCHMARKS: Dict[str, Callable] = {
+    "calculate_mines_multiplier": lambda: provably_fair.calculate_mines_multiplier(10, 3),
+    "generate_mines_grid": lambda: provably_fair.generate_mines_grid(5, SEED),
+    "generate_crash_multiplier": lambda: provably_fair.generate_crash_multiplier(SEED),
+    "generate_provably_fair_seed": provably_fair.generate_provably_fair_seed,
+    "hash_seed": lambda: provably_fair.hash_seed(SEED),
+    # Per-bet seed work before seed pairs: a fresh seed plus its commitment hash
+    "legacy_bet_seed": lambda: provably_fair.hash_seed(provably_fair.generate_provably_fair_seed()),
+    "derive_round_seed": lambda: provably_fair.derive_round_seed(SEED, "client-seed", 1234),
+    "create_access_token": lambda: server.create_access_token({"sub": "benchmark"}, expires_delta=timedelta(days=7)),
+    "jwt_decode": lambda: jwt.decode(TOKEN, server.SECRET_KEY, algorithms=[server.ALGORITHM]),
+    "user_from_doc": lambda: server.User.from_doc(USER_DOC),
+    "bet_dict": bench_bet_dict,
+    "leaderboard_record": lambda: LEADERBOARD.record(LEADERBOARD_BET, "player-1"),
+    "leaderboard_get": lambda: LEADERBOARD.get("top_wagered", "dice"),
+}
+
+def time_per_call(func: Callable, repeat: int) -> float:
+    """Best-of-N seconds per call"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def run(names: List[str], repeat: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in names:
+        # Calibrate right next to every measurement so frequency scaling and
+        # noisy neighbours affect both alike, then take the median ratio
+        samples = []
+        for _ in range(rounds):
+            unit = time_per_call(calibration, repeat)
+            seconds = time_per_call(BENCHMARKS[name], repeat)
+            samples.append((seconds, seconds / unit))
+        results[name] = {
+            "ns_per_call": round(min(seconds for seconds, _ in samples) * 1e9, 1),
+            "relative": round(statistics.median(ratio for _, ratio in samples), 5)
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for hot backend primitives")
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timeit repeats per measurement")
+    parser.add_argument("--rounds", type=int, default=5, help="Calibrated measurements per benchmark")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown over baseline (0.25 = 25%%)")
+    parser.add_argument("--update", action="store_true", help="Write results as the new baselines")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.pattern or args.pattern in name]
+    results = run(names, args.repeat, args.rounds)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    baselines = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    if args.update:
+        baselines.update({name: result["relative"] for name, result in results.items()})
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Updated {len(results)} baselines in {BASELINE_FILE}")
+        return 0
+
+    failures = 0
+    print(f"{'benchmark':32} {'ns/call':>12} {'relative':>10} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"{name:32} {result['ns_per_call']:>12,.1f} {result['relative']:>10.4f} {'-':>10} {'new':>8}")
+            continue
+
+        change = result["relative"] / baseline - 1
+        status = ""
+        if change > args.threshold:
+            failures += 1
+            status = "  REGRESSION"
+        print(f"{name:32} {result['ns_per_call']:>12,.1f} {result['relative']:>10.4f} {baseline:>10.4f} {change:>+8.1%}{status}")
+
+    if failures:
+        print(f"\n{failures} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
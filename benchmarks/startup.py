@@ -0,0 +1,129 @@
+"""Worker cold start: import cost per module and time to first request.
+
+The import profile runs `python -X importtime -c "import server"` in a fresh
+interpreter and reports the cumulative cost of each module server.py imports
+(and of each top-level package). Time to first request starts a worker with
+loadtest.serve and polls /api/health until it answers 200, i.e. until the
+lifespan warm start has finished. The command fails when the median time to
+first request exceeds the budget.
+
+    python -m benchmarks.startup                      # in-memory MongoDB stand-in
+    python -m benchmarks.startup --mongo-url mongodb://localhost:27017
+    python -m benchmarks.startup --budget 2.5 --runs 5 --top 15
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+# Seconds from process start to the first successful request
+DEFAULT_BUDGET = 2.0
+STARTUP_TIMEOUT = 60.0
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def profile_imports(module: str = "server") -> List[Tuple[int, int, int, str]]:
+    """(self_us, cumulative_us, depth, name) for every module first imported by `module`"""
+    env = dict(os.environ, MONGO_URL=os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+               DB_NAME=os.environ.get("DB_NAME", "gamehub_startup"))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    # Modules already loaded by the interpreter (site, encodings) come before ours
+    start = max(index for index, row in enumerate(rows) if row[2] == 0 and row[3] == module)
+    end = start
+    while end > 0 and rows[end - 1][2] > 0:
+        end -= 1
+    return rows[end:start + 1]
+
+def summarize_imports(rows: List[Tuple[int, int, int, str]]) -> Dict[str, Dict[str, int]]:
+    """Cumulative cost of each direct import and self time per top-level package"""
+    direct = {name: cumulative for _, cumulative, depth, name in rows if depth == 1}
+    packages: Dict[str, int] = {}
+    for self_us, _, _, name in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return {"direct": direct, "packages": packages}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_first_request(mongo_url: Optional[str]) -> float:
+    """Seconds from spawning a worker to its first 200 from /api/health"""
+    port = free_port()
+    command = [sys.executable, "-m", "loadtest.serve", "--port", str(port)]
+    command += ["--mongo-url", mongo_url, "--db-name", "gamehub_startup"] if mongo_url else ["--in-memory"]
+    url = f"http://127.0.0.1:{port}/api/health"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - started < STARTUP_TIMEOUT:
+            if process.poll() is not None:
+                raise RuntimeError(f"Worker exited during startup:\n{process.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                pass  # Not listening yet, or 503 until the warm start is done
+            time.sleep(0.01)
+        raise RuntimeError(f"Worker not ready after {STARTUP_TIMEOUT:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import profile and time-to-first-request budget")
+    parser.add_argument("--mongo-url", default=None,
+                        help="Start against MongoDB (gamehub_startup database, dropped) instead of in-memory")
+    parser.add_argument("--runs", type=int, default=3, help="Worker starts to take the median of")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Seconds allowed to the first request")
+    parser.add_argument("--top", type=int, default=10, help="Modules to list in the import profile")
+    args = parser.parse_args()
+
+    rows = profile_imports()
+    summary = summarize_imports(rows)
+    total_ms = rows[-1][1] / 1000
+    print(f"import server: {total_ms:,.1f} ms")
+    print(f"\n{'imported by server.py':32} {'ms':>10}")
+    for name, cumulative in sorted(summary["direct"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:32} {cumulative / 1000:>10,.1f}")
+    print(f"\n{'package (self time)':32} {'ms':>10}")
+    for name, self_us in sorted(summary["packages"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:32} {self_us / 1000:>10,.1f}")
+
+    samples = [time_to_first_request(args.mongo_url) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"\ntime to first request: {median:.2f}s median of {args.runs} "
+          f"({', '.join(f'{sample:.2f}' for sample in samples)}), budget {args.budget:.2f}s")
+    if median > args.budget:
+        print(f"Startup over budget by {median - args.budget:.2f}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
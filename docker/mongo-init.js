@@ -18,6 +18,8 @@ db.users.createIndex({ "email": 1 }, { unique: true });
 db.bets.createIndex({ "user_id": 1, "created_at": -1 });
 db.transactions.createIndex({ "user_id": 1, "status": 1 });
 db.game_sessions.createIndex({ "user_id": 1, "status": 1 });
+db.game_sessions.createIndex({ "created_at": 1 }, { name: "active_sessions_by_age", partialFilterExpression: { "status": "active" } });
+// The finished_at TTL index is built at startup from FINISHED_SESSION_TTL_SECONDS
 db.site_config.createIndex({ "key": 1 }, { unique: true });
 db.game_config.createIndex({ "game_type": 1 }, { unique: true });
 
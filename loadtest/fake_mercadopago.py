@@ -0,0 +1,86 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+class FakeMercadoPagoService:
+    """In-process stand-in for MercadoPagoService used by the load test server.
+
+    The real SDK makes blocking HTTP calls from inside async handlers, so the
+    simulated latency uses time.sleep to reproduce the same event-loop stall.
+    """
+
+    # preference/payment id -> external_reference, shared across instances
+    payments: Dict[str, str] = {}
+    latency_ms: float = 0.0
+
+    def __init__(self, access_token: str):
+        self.access_token = access_token
+
+    def _simulate_call(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    async def create_payment_preference(self,
+                                        amount: float,
+                                        description: str,
+                                        external_reference: str,
+                                        user_email: str,
+                                        notification_url: str = None) -> Dict[str, Any]:
+        self._simulate_call()
+        preference_id = f"fake-{uuid.uuid4().hex}"
+        self.payments[preference_id] = external_reference
+        return {
+            "success": True,
+            "preference_id": preference_id,
+            "init_point": f"https://fake.mercadopago.local/checkout/{preference_id}",
+            "sandbox_init_point": f"https://fake.mercadopago.local/sandbox/{preference_id}"
+        }
+
+    async def get_payment(self, payment_id: str) -> Dict[str, Any]:
+        self._simulate_call()
+        external_reference = self.payments.pop(payment_id, None)
+        if external_reference is None:
+            return {"success": False, "error": {"status": 404}}
+        return {
+            "success": True,
+            "payment": {
+                "id": payment_id,
+                "status": "approved",
+                "status_detail": "accredited",
+                "amount": None,
+                "currency": "BRL",
+                "external_reference": external_reference,
+                "date_created": datetime.utcnow().isoformat(),
+                "date_approved": datetime.utcnow().isoformat(),
+                "payment_method": "pix",
+                "payer_email": None
+            }
+        }
+
+    async def create_refund(self, payment_id: str, amount: Optional[float] = None) -> Dict[str, Any]:
+        self._simulate_call()
+        return {"success": True, "refund": {"payment_id": payment_id, "amount": amount}}
+
+    def verify_webhook_signature(self, raw_body: bytes, signature: str, secret: str) -> bool:
+        return True
+
+    async def process_webhook_payment(self, payment_id: str) -> Dict[str, Any]:
+        payment_info = await self.get_payment(payment_id)
+        if not payment_info["success"]:
+            return payment_info
+
+        payment = payment_info["payment"]
+        return {
+            "success": True,
+            "payment_id": payment["id"],
+            "external_reference": payment["external_reference"],
+            "status": "completed",
+            "amount": payment["amount"],
+            "currency": payment["currency"],
+            "processed_at": datetime.utcnow()
+        }
+
+def get_fake_mp_service(access_token: str = None) -> Optional[FakeMercadoPagoService]:
+    """Drop-in replacement for payment_service.get_mp_service"""
+    return FakeMercadoPagoService(access_token or "TEST-loadtest")
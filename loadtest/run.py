@@ -0,0 +1,294 @@
+"""Load test the game and payment endpoints with concurrent virtual users.
+
+Each virtual user registers, logs in and then loops over a weighted mix of
+scenarios until the run ends. Per-route throughput and latency percentiles are
+written as JSON so runs can be compared over time.
+
+    python -m loadtest.run --users 100 --duration 60 --in-memory \\
+        --mix dice=6,mines=2,crash=2,deposit=1 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MIX = "dice=6,mines=2,crash=2,deposit=1"
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, route: str, elapsed_ms: float, status: int):
+        self.latencies[route].append(elapsed_ms)
+        self.statuses[route][status] += 1
+
+    def summary(self, duration: float) -> Dict[str, Dict]:
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            statuses = self.statuses[route]
+            routes[route] = {
+                "count": len(samples),
+                "rps": round(len(samples) / duration, 2),
+                "errors": sum(n for code, n in statuses.items() if code >= 500 or code == 0),
+                "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+                **latency_summary(samples)
+            }
+        return routes
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    if len(samples) > 1:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = samples[0]
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(max(samples), 3)
+    }
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, stats: RouteStats, rng: random.Random, username: str):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.username = username
+        self.headers: Dict[str, str] = {}
+        self.balance = 0.0
+
+    async def request(self, method: str, route: str, url: str = None, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url or route, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(f"{method} {route}", (time.perf_counter() - start) * 1000, 0)
+            return None
+        self.stats.record(f"{method} {route}", (time.perf_counter() - start) * 1000, response.status_code)
+        if response.status_code == 200:
+            body = response.json()
+            if isinstance(body, dict) and "new_balance" in body:
+                self.balance = body["new_balance"]
+            return response
+        return None
+
+    async def sign_up(self):
+        password = "loadtest-password"
+        await self.request("POST", "/api/auth/register", json={
+            "username": self.username,
+            "email": f"{self.username}@loadtest.local",
+            "password": password
+        })
+        response = await self.request("POST", "/api/auth/login", json={"username": self.username, "password": password})
+        if response is None:
+            raise RuntimeError(f"Login failed for {self.username}")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        me = await self.request("GET", "/api/auth/me")
+        if me is not None:
+            self.balance = me.json()["balance"]
+
+    async def dice(self):
+        await self.request("POST", "/api/games/dice/play", json={
+            "target": self.rng.uniform(5, 95),
+            "amount": 1.0,
+            "over": self.rng.random() < 0.5
+        })
+
+    async def mines(self):
+        response = await self.request("POST", "/api/games/mines/start", json={
+            "amount": 1.0,
+            "mines_count": self.rng.randint(1, 5)
+        })
+        if response is None:
+            return
+
+        game = response.json()
+        tiles = self.rng.sample(range(game["grid_size"]), self.rng.randint(1, 4))
+        for tile in tiles:
+            reveal = await self.request("POST", "/api/games/mines/reveal",
+                                        params={"game_id": game["game_id"], "tile_position": tile})
+            if reveal is None or reveal.json()["game_over"]:
+                return
+        await self.request("POST", "/api/games/mines/cashout", params={"game_id": game["game_id"]})
+
+    async def crash(self):
+        await self.request("POST", "/api/games/crash/play", json={
+            "amount": 1.0,
+            "auto_cash_out": round(self.rng.uniform(1.1, 5.0), 2)
+        })
+
+    async def deposit(self):
+        response = await self.request("POST", "/api/payments/deposit/create", json={"amount": 100.0})
+        if response is None:
+            return
+
+        deposit = response.json()
+        # Deliver the notification the fake MercadoPago would send once paid
+        await self.request("POST", "/api/payments/webhook", json={
+            "type": "payment",
+            "data": {"id": deposit["preference_id"]}
+        })
+        await self.request("GET", "/api/payments/status/{transaction_id}",
+                           url=f"/api/payments/status/{deposit['transaction_id']}")
+        me = await self.request("GET", "/api/auth/me")
+        if me is not None:
+            self.balance = me.json()["balance"]
+
+SCENARIOS = {
+    "dice": VirtualUser.dice,
+    "mines": VirtualUser.mines,
+    "crash": VirtualUser.crash,
+    "deposit": VirtualUser.deposit
+}
+
+async def run_user(user: VirtualUser, mix: Dict[str, int], deadline: float):
+    names = list(mix)
+    weights = list(mix.values())
+    while time.monotonic() < deadline:
+        # Top up through the payment flow instead of failing every bet on balance
+        scenario = "deposit" if user.balance < 5 else user.rng.choices(names, weights)[0]
+        await SCENARIOS[scenario](user)
+
+async def setup_admin(client: httpx.AsyncClient, stats: RouteStats, run_id: str):
+    """Register the admin (first user) and configure the fake MercadoPago token"""
+    admin = VirtualUser(client, stats, random.Random(), f"lt_admin_{run_id}")
+    await admin.sign_up()
+    await admin.request("POST", "/api/admin/config", json={"mercadopago_access_token": "TEST-loadtest"})
+
+async def run_load(base_url: str, users: int, duration: float, ramp_up: float, mix: Dict[str, int], seed: int) -> Dict:
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await setup_admin(client, RouteStats(), run_id)
+
+        stats = RouteStats()
+        virtual_users = [
+            VirtualUser(client, stats, random.Random(seed + i), f"lt_{run_id}_{i}")
+            for i in range(users)
+        ]
+
+        async def start_user(index: int, user: VirtualUser, deadline: float):
+            await asyncio.sleep(ramp_up * index / users)
+            await user.sign_up()
+            await run_user(user, mix, deadline)
+
+        started = time.monotonic()
+        deadline = started + ramp_up + duration
+        await asyncio.gather(*(start_user(i, user, deadline) for i, user in enumerate(virtual_users)))
+        elapsed = time.monotonic() - started
+
+    all_samples = [ms for samples in stats.latencies.values() for ms in samples]
+    return {
+        "run_id": run_id,
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "git_rev": git_revision(),
+        "config": {
+            "base_url": base_url,
+            "users": users,
+            "duration_s": duration,
+            "ramp_up_s": ramp_up,
+            "mix": mix,
+            "seed": seed
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total": {
+            "count": len(all_samples),
+            "rps": round(len(all_samples) / elapsed, 2),
+            **(latency_summary(all_samples) if all_samples else {})
+        },
+        "routes": stats.summary(elapsed)
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_server(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "loadtest.serve", "--port", str(args.port),
+               "--mongo-url", args.mongo_url, "--mp-latency-ms", str(args.mp_latency_ms)]
+    if args.in_memory:
+        command.append("--in-memory")
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    # Run from a scratch directory so uploads/ is not created in the repo
+    return subprocess.Popen(command, cwd=tempfile.mkdtemp(prefix="gamehub-loadtest-"), env=env)
+
+def wait_for_server(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("Load test server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/api/").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("Load test server did not start in time")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test GameHub Pro game and payment endpoints")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--base-url", help="Test an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock-motor instead of MongoDB")
+    parser.add_argument("--mp-latency-ms", type=float, default=50.0, help="Simulated MercadoPago call latency")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = start_server(args)
+
+    try:
+        if process:
+            wait_for_server(base_url, process)
+        results = asyncio.run(run_load(base_url, args.users, args.duration, args.ramp_up, mix, args.seed))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
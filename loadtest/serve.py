@@ -0,0 +1,53 @@
+"""Run the GameHub Pro API for load testing.
+
+Starts the real FastAPI app with MercadoPago replaced by an in-process fake,
+against either a local MongoDB (dedicated database, dropped on start) or an
+in-memory mongomock-motor stand-in.
+
+    python -m loadtest.serve --port 8001 --in-memory
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="gamehub_loadtest")
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock-motor instead of MongoDB")
+    parser.add_argument("--mp-latency-ms", type=float, default=50.0, help="Simulated MercadoPago call latency")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import uvicorn
+    import server
+    from settings import Settings
+    from loadtest.fake_mercadopago import FakeMercadoPagoService, get_fake_mp_service
+
+    FakeMercadoPagoService.latency_ms = args.mp_latency_ms
+    server.get_mp_service = get_fake_mp_service
+
+    if args.in_memory:
+        from mongomock_motor import AsyncMongoMockClient
+        server.create_mongo_client = lambda settings, slow_query_monitor: AsyncMongoMockClient()
+    else:
+        # Start from an empty database so the first registered user is the admin
+        import pymongo
+        pymongo.MongoClient(args.mongo_url).drop_database(args.db_name)
+
+    settings = Settings.from_env()
+    if args.in_memory:
+        settings.mongo_min_pool_size = 0
+        settings.settlement_transactions = "off"
+    uvicorn.run(server.create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
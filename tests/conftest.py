@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# server builds its module-level app from the environment on import
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from records import User
+from settings import Settings
+from settlement import SettlementCore
+
+def make_settings(tmp_path: Path) -> Settings:
+    """Settings for an in-memory app: no pool warm-up, no transactions (mongomock has neither)"""
+    return Settings(
+        mongo_url="mongodb://localhost:27017",
+        db_name="test",
+        mongo_min_pool_size=0,
+        upload_dir=str(tmp_path / "uploads"),
+        archive_dir=str(tmp_path / "archive"),
+        settlement_transactions="off"
+    )
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
+
+@pytest.fixture
+def settlement_core(db):
+    return SettlementCore(None, db)
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion (the suite doesn't depend on an asyncio pytest plugin)"""
+    return asyncio.run
+
+async def insert_user(db, balance: float = 100.0, username: str = "player") -> User:
+    user = User.new(username=username, email=f"{username}@example.com", hashed_password="x", balance=balance)
+    await db.users.insert_one(user.to_doc())
+    return user
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "create_mongo_client", lambda settings, slow_query_monitor: AsyncMongoMockClient())
+    return server.create_app(make_settings(tmp_path))
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def state(app, client):
+    return app.state.services
+
+def register(client: TestClient, username: str) -> dict:
+    """Register a player and return its auth headers (the first player registered is the admin)"""
+    response = client.post("/api/auth/register",
+                           json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
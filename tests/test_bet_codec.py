@@ -0,0 +1,72 @@
+import math
+import uuid
+from datetime import datetime
+
+import pytest
+
+from bet_codec import InvalidBet, decode_bet, encode_bet, round_money
+
+def make_bet(game_type: str, game_data: dict, **fields) -> dict:
+    bet = {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "game_type": game_type,
+        "amount": 12.34,
+        "multiplier": 1.98,
+        "result": "win",
+        "payout": 24.43,
+        "game_data": game_data,
+        "created_at": datetime(2026, 1, 2, 3, 4, 5),
+        "seed_pair_id": str(uuid.uuid4()),
+        "nonce": 7
+    }
+    bet.update(fields)
+    return bet
+
+@pytest.mark.parametrize("game_type, game_data", [
+    ("dice", {"target": 50.5, "over": True, "roll": 73.21, "house_edge": 0.01, "max_multiplier": 99.0}),
+    ("mines", {"mines_count": 3, "grid_size": 25, "house_edge": 0.01, "revealed_tiles": [0, 7, 24],
+               "cashed_out": True}),
+    ("crash", {"crash_point": 2.37, "auto_cash_out": 2.0, "manual_play": False, "house_edge": 0.01,
+               "max_multiplier": 10000.0})
+])
+def test_round_trip(game_type, game_data):
+    bet = make_bet(game_type, dict(game_data))
+    assert decode_bet(encode_bet(bet)) == bet
+
+def test_round_trip_legacy_seed_fields():
+    bet = make_bet("dice", {"target": 10.0, "over": False, "roll": 5.0, "house_edge": 0.01},
+                   seed_hash="ab" * 32, seed_reveal="cd" * 32)
+    del bet["seed_pair_id"], bet["nonce"]
+    assert decode_bet(encode_bet(bet)) == bet
+
+def test_unknown_game_data_keys_survive():
+    bet = make_bet("dice", {"target": 10.0, "over": True, "roll": 50.0, "house_edge": 0.01, "note": "extra"})
+    assert decode_bet(encode_bet(bet))["game_data"] == bet["game_data"]
+
+def test_legacy_document_decodes_unchanged():
+    doc = {"_id": "legacy", "id": "b1", "game_type": "dice", "amount": 1.0, "payout": 0.0}
+    assert decode_bet(doc) == {"id": "b1", "game_type": "dice", "amount": 1.0, "payout": 0.0}
+
+def test_amounts_are_stored_in_minor_units():
+    bet = make_bet("dice", {"target": 10.0, "over": True, "roll": 50.0, "house_edge": 0.01}, payout=1.005)
+    assert decode_bet(encode_bet(bet))["payout"] == round_money(1.005)
+
+@pytest.mark.parametrize("tiles", [[25, 300], [-1], [1.5]])
+def test_rejects_tiles_outside_a_byte(tiles):
+    bet = make_bet("mines", {"mines_count": 1, "grid_size": 25, "house_edge": 0.01, "revealed_tiles": tiles})
+    with pytest.raises(InvalidBet):
+        encode_bet(bet)
+
+@pytest.mark.parametrize("field, value", [
+    ("amount", -1.0), ("payout", math.nan), ("payout", math.inf), ("amount", "10")
+])
+def test_rejects_bad_amounts(field, value):
+    bet = make_bet("dice", {"target": 10.0, "over": True, "roll": 50.0, "house_edge": 0.01}, **{field: value})
+    with pytest.raises(InvalidBet):
+        encode_bet(bet)
+
+def test_rejects_bad_hex():
+    bet = make_bet("dice", {"target": 10.0, "over": True, "roll": 50.0, "house_edge": 0.01}, seed_hash="not hex")
+    with pytest.raises(InvalidBet):
+        encode_bet(bet)
@@ -0,0 +1,83 @@
+import pytest
+
+from tests.conftest import register
+
+def start_game(client, headers, amount: float = 10.0, mines_count: int = 3) -> dict:
+    response = client.post("/api/games/mines/start", json={"amount": amount, "mines_count": mines_count},
+                           headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def game_session(client, state, game_id: str) -> dict:
+    return client.portal.call(state.db.game_sessions.find_one, {"id": game_id})
+
+def balance(client, headers) -> float:
+    return client.get("/api/auth/me", headers=headers).json()["balance"]
+
+def test_reveal_safe_tile_then_cash_out(client, state):
+    headers = register(client, "alice")
+    game = start_game(client, headers)
+    assert game["new_balance"] == pytest.approx(90.0)
+
+    mines = game_session(client, state, game["game_id"])["mines_positions"]
+    safe_tile = next(tile for tile in range(game["grid_size"]) if tile not in mines)
+    reveal = client.post("/api/games/mines/reveal", params={"game_id": game["game_id"], "tile_position": safe_tile},
+                         headers=headers)
+    assert reveal.status_code == 200
+    assert reveal.json()["result"] == "safe"
+
+    again = client.post("/api/games/mines/reveal", params={"game_id": game["game_id"], "tile_position": safe_tile},
+                        headers=headers)
+    assert again.status_code == 400
+
+    cashout = client.post("/api/games/mines/cashout", params={"game_id": game["game_id"]}, headers=headers)
+    assert cashout.status_code == 200
+    payout = cashout.json()["payout"]
+    assert payout > 10.0
+    assert balance(client, headers) == pytest.approx(90.0 + payout)
+
+    # The session is closed: a second cashout can't pay twice
+    second = client.post("/api/games/mines/cashout", params={"game_id": game["game_id"]}, headers=headers)
+    assert second.status_code == 404
+    assert balance(client, headers) == pytest.approx(90.0 + payout)
+
+def test_reveal_mine_ends_the_game(client, state):
+    headers = register(client, "alice")
+    game = start_game(client, headers)
+    mine = game_session(client, state, game["game_id"])["mines_positions"][0]
+
+    reveal = client.post("/api/games/mines/reveal", params={"game_id": game["game_id"], "tile_position": mine},
+                         headers=headers)
+    assert reveal.status_code == 200
+    assert reveal.json()["result"] == "mine"
+    assert game_session(client, state, game["game_id"])["status"] == "lost"
+    assert balance(client, headers) == pytest.approx(90.0)
+
+    profile = client.get("/api/profile", headers=headers).json()["stats"]
+    assert profile["bets"] == 1 and profile["wins"] == 0
+
+@pytest.mark.parametrize("tile_position", [-1, 25, 1000])
+def test_reveal_rejects_tiles_off_the_grid(client, state, tile_position):
+    headers = register(client, "alice")
+    game = start_game(client, headers)
+
+    reveal = client.post("/api/games/mines/reveal",
+                         params={"game_id": game["game_id"], "tile_position": tile_position}, headers=headers)
+    assert reveal.status_code == 400
+    session = game_session(client, state, game["game_id"])
+    assert session["status"] == "active"
+    assert session["revealed_tiles"] == []
+
+def test_cash_out_needs_a_revealed_tile(client):
+    headers = register(client, "alice")
+    game = start_game(client, headers)
+
+    cashout = client.post("/api/games/mines/cashout", params={"game_id": game["game_id"]}, headers=headers)
+    assert cashout.status_code == 400
+
+def test_start_rejects_a_stake_above_the_balance(client):
+    headers = register(client, "alice")
+
+    response = client.post("/api/games/mines/start", json={"amount": 500.0, "mines_count": 3}, headers=headers)
+    assert response.status_code == 400
+    assert balance(client, headers) == pytest.approx(100.0)
@@ -0,0 +1,30 @@
+import pytest
+
+from player_search import SEARCH_COLLATION, InvalidSearch, build_search, decode_cursor, encode_cursor
+
+@pytest.mark.parametrize("filters, field", [
+    ({"username": "ab"}, "username"),
+    ({"email": "ab"}, "email"),
+    ({"sort": "username"}, "username"),
+    ({"sort": "email"}, "email")
+])
+def test_string_orders_use_the_search_collation(filters, field):
+    search = build_search(**filters)
+    assert search["field"] == field
+    assert search["collation"] == SEARCH_COLLATION
+
+@pytest.mark.parametrize("filters", [{}, {"sort": "balance"}, {"sort": "created_at", "min_balance": 5.0}])
+def test_numeric_and_date_orders_use_the_simple_collation(filters):
+    assert "collation" not in build_search(**filters)
+
+def test_balance_range_is_ordered_by_balance_by_default():
+    assert build_search(min_balance=10.0)["sort"] == [("balance", -1), ("id", -1)]
+    assert build_search()["sort"] == [("created_at", -1), ("id", -1)]
+    assert build_search(min_balance=10.0, sort="created_at")["field"] == "created_at"
+
+def test_cursor_round_trip_and_unknown_sort():
+    assert decode_cursor(encode_cursor("bob", "u1")) == ("bob", "u1")
+    with pytest.raises(InvalidSearch):
+        build_search(sort="password")
+    with pytest.raises(InvalidSearch):
+        decode_cursor("not a cursor")
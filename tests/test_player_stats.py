@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from bet_codec import encode_bet
+from player_stats import backfill
+from records import Bet
+from settlement import Settlement
+from tests.conftest import insert_user
+
+def dice_bet(user_id: str, amount: float, payout: float, **fields) -> dict:
+    bet = Bet.new(
+        user_id=user_id, game_type="dice", amount=amount, multiplier=payout / amount,
+        result="win" if payout else "loss", payout=payout,
+        game_data={"target": 50.0, "over": True, "roll": 75.0, "house_edge": 0.01}
+    ).to_doc()
+    bet.update(fields)
+    return bet
+
+def backfill_copy(users, bets) -> dict:
+    """Run the (sync pymongo) backfill over a copy of the async test database"""
+    db = mongomock.MongoClient().db
+    db.users.insert_many(users)
+    if bets:
+        db.bets.insert_many(bets)
+    result = backfill(db)
+    return result, db.users.find_one({}, {"_id": 0, "stats": 1})["stats"]
+
+def test_backfill_does_not_count_the_first_live_bet_again(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=100.0)
+        # Bet.new stamps created_at before the settlement runs
+        bet = dice_bet(user.id, 10.0, 0.0, created_at=datetime.utcnow() - timedelta(seconds=1))
+        await settlement_core.settle(Settlement(user_id=user.id, stake=10.0, bet=bet))
+        return await db.users.find().to_list(None), await db.bets.find().to_list(None)
+
+    users, bets = run(scenario())
+    result, stats = backfill_copy(users, bets)
+    assert result["bets"] == 0
+    assert stats["bets"] == 1
+    assert stats["wagered"] == 10.0
+
+def test_backfill_adds_bets_settled_before_the_counters(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=100.0)
+        old = dice_bet(user.id, 5.0, 9.9, created_at=datetime.utcnow() - timedelta(days=30))
+        await db.bets.insert_one(encode_bet(old))
+        await settlement_core.settle(Settlement(user_id=user.id, stake=10.0, bet=dice_bet(user.id, 10.0, 0.0)))
+        return await db.users.find().to_list(None), await db.bets.find().to_list(None)
+
+    users, bets = run(scenario())
+    result, stats = backfill_copy(users, bets)
+    assert result == {"users": 1, "bets": 1, "skipped": 0}
+    assert stats["bets"] == 2 and stats["wins"] == 1
+    assert stats["wagered"] == 15.0
+    assert stats["biggest_win"] == 9.9
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import seed_pairs
+from seed_pairs import LOCK_TIMEOUT_SECONDS, SeedPairConflict, SeedPairStore
+from tests.conftest import register
+
+@pytest.fixture
+def store(db, run):
+    store = SeedPairStore(db)
+    run(store.ensure_indexes())
+    return store
+
+async def nothing_in_play() -> bool:
+    return False
+
+def test_rotation_reveals_the_pair_and_commits_to_a_new_one(store, run):
+    async def scenario():
+        first = await store.next_round("u1")
+        rotated = await store.rotate("u1", "my seed", in_play=nothing_in_play)
+        return first, rotated, await store.next_round("u1")
+
+    first, rotated, second = run(scenario())
+    assert rotated["revealed"]["seed_pair_id"] == first.seed_pair_id
+    assert "server_seed" in rotated["revealed"]
+    assert rotated["active"]["client_seed"] == "my seed"
+    assert second.seed_pair_id == rotated["active"]["seed_pair_id"]
+    assert second.nonce == 0
+
+def test_rotation_waits_for_a_held_round(store, run):
+    async def scenario():
+        round_seed = await store.next_round("u1", hold=True)
+        with pytest.raises(SeedPairConflict):
+            await store.rotate("u1", in_play=nothing_in_play)
+        await store.release(round_seed)
+        return await store.rotate("u1", in_play=nothing_in_play)
+
+    assert run(scenario())["revealed"] is not None
+
+def test_round_opened_during_rotation_is_refused(store, run):
+    """The mines start/rotate race: a round reserved after the lock never gets the seed being revealed"""
+    async def scenario():
+        await store.get_active("u1")
+        opened = []
+
+        async def start_game_meanwhile() -> bool:
+            with pytest.raises(SeedPairConflict):
+                await store.next_round("u1", hold=True)
+            opened.append(True)
+            return False
+
+        rotated = await store.rotate("u1", in_play=start_game_meanwhile)
+        return opened, rotated, await store.next_round("u1")
+
+    opened, rotated, after = run(scenario())
+    assert opened == [True]
+    assert after.seed_pair_id == rotated["active"]["seed_pair_id"]
+
+def test_game_in_play_refuses_rotation_and_unlocks(store, run):
+    async def scenario():
+        pair = await store.get_active("u1")
+
+        async def game_in_play() -> bool:
+            return True
+
+        with pytest.raises(SeedPairConflict):
+            await store.rotate("u1", in_play=game_in_play)
+        return pair, await store.next_round("u1")
+
+    pair, round_seed = run(scenario())
+    assert round_seed.seed_pair_id == pair["id"]
+
+def test_stale_rotation_lock_does_not_block_rounds(store, db, run):
+    async def scenario():
+        pair = await store.get_active("u1")
+        stale = datetime.utcnow() - timedelta(seconds=LOCK_TIMEOUT_SECONDS + 1)
+        await db.seed_pairs.update_one({"id": pair["id"]}, {"$set": {"rotating_at": stale}})
+        round_seed = await store.next_round("u1")
+        return pair, round_seed, await db.seed_pairs.find_one({"id": pair["id"]})
+
+    pair, round_seed, stored = run(scenario())
+    assert round_seed.seed_pair_id == pair["id"]
+    assert "rotating_at" not in stored
+
+def test_pair_created_concurrently_is_a_conflict(store, run, monkeypatch):
+    """A bet that creates the next pair first would otherwise drop the requested client seed"""
+    async def scenario():
+        await store.get_active("u1")
+        insert_one = store.collection.insert_one
+
+        async def bet_creates_pair_first(doc, *args, **kwargs):
+            if doc.get("client_seed") == "my seed":
+                await insert_one(seed_pairs.new_seed_pair("u1"))
+            return await insert_one(doc, *args, **kwargs)
+
+        monkeypatch.setattr(store.collection, "insert_one", bet_creates_pair_first)
+        with pytest.raises(SeedPairConflict):
+            await store.rotate("u1", "my seed", in_play=nothing_in_play)
+        return await store.get_active("u1")
+
+    assert run(scenario())["client_seed"] != "my seed"
+
+def test_rotate_endpoint_refuses_during_a_mines_game(client):
+    headers = register(client, "alice")
+    start = client.post("/api/games/mines/start", json={"amount": 1.0, "mines_count": 3}, headers=headers)
+    assert start.status_code == 200
+
+    rotate = client.post("/api/seeds/rotate", json={"client_seed": "abc"}, headers=headers)
+    assert rotate.status_code == 409
+    # The start released its hold, so the pair is only blocked by the game itself
+    pair = client.get("/api/seeds", headers=headers).json()
+    assert pair["status"] == "active"
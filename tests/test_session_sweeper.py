@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bet_codec import decode_bet
+from session_sweeper import MinesSessionSweeper
+from tests.conftest import insert_user
+
+def mines_session(user, session_id: str, age: timedelta) -> dict:
+    return {
+        "id": session_id,
+        "user_id": user.id,
+        "amount": 10.0,
+        "mines_count": 3,
+        "grid_size": 25,
+        "house_edge": 0.01,
+        "mines_positions": [1, 2, 3],
+        "revealed_tiles": [7],
+        "current_multiplier": 1.13,
+        "status": "active",
+        "created_at": datetime.utcnow() - age
+    }
+
+def sweep(db, settlement_core, policy: str):
+    async def scenario():
+        user = await insert_user(db, balance=0.0)
+        await db.game_sessions.insert_many([
+            mines_session(user, "abandoned", timedelta(hours=2)),
+            mines_session(user, "in-play", timedelta(minutes=5))
+        ])
+        sweeper = MinesSessionSweeper(timeout_seconds=3600, policy=policy)
+        sweeper.db, sweeper.settlement_core = db, settlement_core
+        first = await sweeper.sweep()
+        second = await sweeper.sweep()
+        sessions = {session["id"]: session for session in await db.game_sessions.find().to_list(None)}
+        bets = [decode_bet(bet) for bet in await db.bets.find().to_list(None)]
+        return first, second, sessions, bets, await db.users.find_one({"id": user.id})
+    return scenario()
+
+def test_forfeit_expires_abandoned_sessions(db, settlement_core, run):
+    first, second, sessions, bets, user = run(sweep(db, settlement_core, "forfeit"))
+    assert first == {"settled": 1, "credited": 0.0, "failed": 0}
+    assert second["settled"] == 0
+    assert sessions["abandoned"]["status"] == "expired"
+    assert "sweep_id" not in sessions["abandoned"]
+    assert sessions["in-play"]["status"] == "active"
+    assert [(bet["id"], bet["result"], bet["payout"]) for bet in bets] == [("abandoned", "loss", 0.0)]
+    assert user["balance"] == 0.0
+    assert user["stats"]["bets"] == 1
+
+def test_cashout_pays_abandoned_sessions_once(db, settlement_core, run):
+    first, second, sessions, bets, user = run(sweep(db, settlement_core, "cashout"))
+    assert first["settled"] == 1
+    assert first["credited"] == pytest.approx(11.3)
+    assert second["settled"] == 0
+    assert sessions["abandoned"]["status"] == "won"
+    assert sessions["in-play"]["status"] == "active"
+    assert len(bets) == 1 and bets[0]["game_data"]["expired"]
+    assert user["balance"] == pytest.approx(11.3)
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        MinesSessionSweeper(policy="refund")
@@ -0,0 +1,83 @@
+import pytest
+
+from bet_codec import decode_bet
+from records import Bet
+from settlement import InsufficientBalance, SessionConflict, Settlement, SettlementError
+from tests.conftest import insert_user
+
+def dice_bet(user_id: str, amount: float, payout: float) -> dict:
+    return Bet.new(
+        user_id=user_id, game_type="dice", amount=amount, multiplier=payout / amount,
+        result="win" if payout else "loss", payout=payout,
+        game_data={"target": 50.0, "over": True, "roll": 75.0, "house_edge": 0.01}
+    ).to_doc()
+
+def settle_bet(settlement_core, user, amount: float, payout: float):
+    return settlement_core.settle(Settlement(
+        user_id=user.id, stake=amount, payout=payout, bet=dice_bet(user.id, amount, payout), username=user.username
+    ))
+
+def test_win_and_loss_update_balance_and_stats(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=100.0)
+        after_win = await settle_bet(settlement_core, user, 10.0, 19.8)
+        after_loss = await settle_bet(settlement_core, user, 5.0, 0.0)
+        return after_win, after_loss, await db.users.find_one({"id": user.id}), await db.bets.find().to_list(None)
+
+    after_win, after_loss, user, bets = run(scenario())
+    assert after_win == pytest.approx(109.8)
+    assert after_loss == pytest.approx(104.8)
+    assert user["balance"] == pytest.approx(104.8)
+    stats = user["stats"]
+    assert stats["bets"] == 2 and stats["wins"] == 1
+    assert stats["wagered"] == pytest.approx(15.0)
+    assert stats["payout"] == pytest.approx(19.8)
+    assert stats["biggest_win"] == pytest.approx(19.8)
+    assert stats["games"]["dice"]["bets"] == 2
+    assert sorted(decode_bet(bet)["result"] for bet in bets) == ["loss", "win"]
+
+def test_insufficient_balance_writes_nothing(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=5.0)
+        with pytest.raises(InsufficientBalance):
+            await settle_bet(settlement_core, user, 10.0, 0.0)
+        return await db.users.find_one({"id": user.id}), await db.bets.count_documents({})
+
+    user, bets = run(scenario())
+    assert user["balance"] == 5.0
+    assert "stats" not in user
+    assert bets == 0
+
+def test_amounts_are_rounded_before_crediting(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=0.0)
+        await settlement_core.settle(Settlement(user_id=user.id, payout=1.23456))
+        return await db.users.find_one({"id": user.id})
+
+    assert run(scenario())["balance"] == 1.23
+
+def test_settled_session_cannot_settle_again(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=0.0)
+        await db.game_sessions.insert_one({"id": "g1", "user_id": user.id, "status": "active"})
+        settlement = lambda: Settlement(  # noqa: E731
+            user_id=user.id, payout=2.0, session_filter={"id": "g1", "status": "active"},
+            session_update={"$set": {"status": "won"}}
+        )
+        await settlement_core.settle(settlement())
+        with pytest.raises(SessionConflict):
+            await settlement_core.settle(settlement())
+        return await db.users.find_one({"id": user.id})
+
+    assert run(scenario())["balance"] == 2.0
+
+def test_unstorable_bet_is_refused_before_any_write(db, settlement_core, run):
+    async def scenario():
+        user = await insert_user(db, balance=10.0)
+        bet = dice_bet(user.id, 1.0, 2.0)
+        bet["payout"] = float("nan")
+        with pytest.raises(SettlementError):
+            await settlement_core.settle(Settlement(user_id=user.id, stake=1.0, bet=bet))
+        return await db.users.find_one({"id": user.id})
+
+    assert run(scenario())["balance"] == 10.0
@@ -0,0 +1,24 @@
+import asyncio
+
+from slow_query import SlowQueryMonitor
+
+def test_flush_errors_do_not_stop_the_monitor(db, run):
+    monitor = SlowQueryMonitor()
+    monitor.flush_interval = 0.01
+    flushes = []
+
+    async def failing_flush():
+        flushes.append(True)
+        raise ValueError("unencodable command")
+
+    monitor.flush = failing_flush
+
+    async def scenario():
+        monitor.start(db)
+        await asyncio.sleep(0.1)
+        running = not monitor._task.done()
+        monitor.stop()
+        return running
+
+    assert run(scenario())
+    assert len(flushes) > 1
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+import withdrawal_review
+from records import Transaction
+from tests.conftest import insert_user
+
+async def request_withdrawal(db, user, amount: float) -> str:
+    """A pending withdrawal whose amount was already debited, as /payments/withdraw/request leaves it"""
+    await db.users.update_one({"id": user.id}, {"$inc": {"balance": -amount}})
+    transaction = Transaction.new(
+        id=f"w-{user.username}-{amount}", user_id=user.id, type="withdrawal", amount=amount, status="pending",
+        description=f"Withdrawal of ${amount}", metadata={"payment_method": "pix", "requested_at": datetime.utcnow()}
+    )
+    await db.transactions.insert_one(transaction.to_doc())
+    return transaction.id
+
+async def balances(db):
+    return {user["username"]: user["balance"] for user in await db.users.find().to_list(None)}
+
+def test_bulk_rejection_refunds_each_player_once(db, run):
+    async def scenario():
+        await withdrawal_review.ensure_indexes(db)
+        alice = await insert_user(db, balance=100.0, username="alice")
+        bob = await insert_user(db, balance=100.0, username="bob")
+        ids = [await request_withdrawal(db, alice, 20.0), await request_withdrawal(db, alice, 30.0),
+               await request_withdrawal(db, bob, 40.0)]
+        result = await withdrawal_review.review_withdrawals(None, db, ids + ["missing"], False, "admin", "kyc")
+        await db.transactions.insert_one({"id": "deposit", "user_id": alice.id, "type": "deposit",
+                                          "amount": 10.0, "status": "completed"})
+        # An already reviewed withdrawal and a deposit exist but are not pending withdrawals
+        again = await withdrawal_review.review_withdrawals(None, db, ids[:1] + ["deposit"], False, "admin", "kyc")
+        return result, again, await balances(db), await db.transactions.find().to_list(None)
+
+    result, again, balances_after, transactions = run(scenario())
+    assert result["processed"] == 3
+    assert result["refunded"] == pytest.approx(90.0)
+    assert [row["status"] for row in result["results"]] == ["rejected", "rejected", "rejected", "not_found"]
+    assert again["processed"] == 0
+    assert again["results"] == [
+        {"id": "w-alice-20.0", "status": "not_pending", "type": "withdrawal", "current_status": "rejected"},
+        {"id": "deposit", "status": "not_pending", "type": "deposit", "current_status": "completed"}
+    ]
+    assert balances_after == {"alice": pytest.approx(100.0), "bob": pytest.approx(100.0)}
+    assert all(transaction["status"] == "rejected" for transaction in transactions if transaction["type"] == "withdrawal")
+    assert not any("refund_pending" in transaction for transaction in transactions)
+
+def test_approval_does_not_refund(db, run):
+    async def scenario():
+        alice = await insert_user(db, balance=100.0, username="alice")
+        transaction_id = await request_withdrawal(db, alice, 25.0)
+        result = await withdrawal_review.review_withdrawals(None, db, [transaction_id], True, "admin")
+        return result, await balances(db)
+
+    result, balances_after = run(scenario())
+    assert result["results"][0]["status"] == "approved"
+    assert result["refunded"] == 0.0
+    assert balances_after == {"alice": pytest.approx(75.0)}
+
+def test_replay_finishes_an_interrupted_refund_exactly_once(db, run, monkeypatch):
+    async def scenario():
+        alice = await insert_user(db, balance=100.0, username="alice")
+        transaction_id = await request_withdrawal(db, alice, 20.0)
+
+        async def crash(*args, **kwargs):
+            raise RuntimeError("worker died")
+
+        # The rejection is recorded but the refund never runs
+        with monkeypatch.context() as patch:
+            patch.setattr(withdrawal_review, "_refund", crash)
+            with pytest.raises(RuntimeError):
+                await withdrawal_review.review_withdrawals(None, db, [transaction_id], False, "admin", "kyc")
+        pending = await balances(db)
+        replayed = await withdrawal_review.replay_pending_refunds(db)
+        replayed_again = await withdrawal_review.replay_pending_refunds(db)
+        return pending, replayed, replayed_again, await balances(db)
+
+    pending, replayed, replayed_again, balances_after = run(scenario())
+    assert pending == {"alice": pytest.approx(80.0)}
+    assert (replayed, replayed_again) == (1, 0)
+    assert balances_after == {"alice": pytest.approx(100.0)}